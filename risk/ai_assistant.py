@@ -4,6 +4,9 @@ import os
 from typing import Dict, List, Any, Optional, Union
 import time
 
+from instrumentation import span, record
+from metrics import LLM_REQUESTS, LLM_TOKENS
+
 class AIAssistant:
     """
     AI助手模块，整合Deepseek API的功能
@@ -47,19 +50,35 @@ class AIAssistant:
             "max_tokens": max_tokens
         }
         
+        # 记录提示词大小（字符数）
+        record("llm.prompt_chars", sum(len(str(m.get("content", ""))) for m in messages))
+        
+        response = None
         try:
-            response = requests.post(
-                f"{self.base_url}/v1/chat/completions",
-                headers=headers,
-                json=data
-            )
+            with span("llm.chat_completion"):
+                response = requests.post(
+                    f"{self.base_url}/v1/chat/completions",
+                    headers=headers,
+                    json=data
+                )
             
+            LLM_REQUESTS.inc(status=response.status_code)
             if response.status_code != 200:
                 print(f"AI聊天请求失败: {response.status_code}, {response.text}")
                 return {"error": response.text, "status_code": response.status_code}
             
-            return response.json()
+            result = response.json()
+            usage = result.get("usage") or {}
+            if "prompt_tokens" in usage:
+                record("llm.prompt_tokens", usage["prompt_tokens"])
+                LLM_TOKENS.inc(usage["prompt_tokens"], type="prompt")
+            if "completion_tokens" in usage:
+                record("llm.completion_tokens", usage["completion_tokens"])
+                LLM_TOKENS.inc(usage["completion_tokens"], type="completion")
+            return result
         except Exception as e:
+            if response is None:
+                LLM_REQUESTS.inc(status="error")
             print(f"AI聊天请求异常: {str(e)}")
             return {"error": str(e)}
     
@@ -157,20 +176,29 @@ class AIAssistant:
             print(f"解析AI回复异常: {str(e)}")
             return {"error": str(e)}
     
-    def analyze_portfolio(self, portfolio: List[Dict[str, Any]]) -> Dict[str, Any]:
+    def analyze_portfolio(self, 
+                        portfolio: List[Dict[str, Any]],
+                        metrics: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """
         分析投资组合
         
         参数:
         - portfolio: 投资组合，包含多个资产信息
+        - metrics: 已计算的量化指标摘要（可选），提供时代替原始组合数据发送
         
         返回:
         - 投资组合分析结果
         """
+        if metrics:
+            content = f"请基于以下投资组合量化指标进行分析（收益与波动率为年化值，VaR/CVaR为日度损失）:\n{json.dumps(metrics, ensure_ascii=False, separators=(',', ':'))}\n"
+        else:
+            content = f"请分析以下投资组合:\n{json.dumps(portfolio, ensure_ascii=False, indent=2)}\n"
+        content += "请评估组合的风险水平、多样化程度、预期收益，并提供优化建议。"
+        
         # 构建消息
         messages = [
             {"role": "system", "content": "你是一位专业的投资组合分析师，擅长评估投资组合的风险和收益特性。"},
-            {"role": "user", "content": f"请分析以下投资组合:\n{json.dumps(portfolio, ensure_ascii=False, indent=2)}\n请评估组合的风险水平、多样化程度、预期收益，并提供优化建议。"}
+            {"role": "user", "content": content}
         ]
         
         # 获取AI回复
@@ -0,0 +1,231 @@
+import numpy as np
+from functools import lru_cache
+from typing import Dict, List, Any, Optional, Tuple
+
+from product_assumptions import product_moments
+
+# 各风险等级的基础风险厌恶系数
+BASE_RISK_AVERSION = {'High': 1.0, 'Medium': 3.0, 'Low': 8.0}
+
+# 向策略性基准配置收缩的强度
+ANCHOR_STRENGTH = 0.3
+
+# 波动率高于此值的产品视为高波动产品
+HIGH_VOLATILITY = 0.25
+
+
+def age_bucket(age: Optional[int]) -> str:
+    """年龄分档，与个性化建议中的年龄提示保持一致"""
+    if age is None:
+        return 'unknown'
+    if age > 60:
+        return 'senior'
+    if age < 30:
+        return 'young'
+    return 'middle'
+
+
+def balance_bucket(balance: Optional[float]) -> str:
+    """余额分档，与个性化建议中的余额提示保持一致"""
+    if balance is None:
+        return 'unknown'
+    if balance < 5000:
+        return 'low'
+    if balance > 100000:
+        return 'high'
+    return 'middle'
+
+
+def project_to_bounds(v: np.ndarray, lower: np.ndarray, upper: np.ndarray) -> np.ndarray:
+    """
+    将向量投影到 {sum(w)=1, lower<=w<=upper} 上
+
+    sum(clip(v - tau, lower, upper)) 是 tau 的分段线性递减函数，
+    在所有断点上一次性求值后线性插值得到精确的 tau
+    """
+    breakpoints = np.sort(np.concatenate([v - upper, v - lower]))
+    totals = np.clip(v[:, None] - breakpoints[None, :], lower[:, None], upper[:, None]).sum(axis=0)
+    # totals 随断点递增而递减，找到跨过1的区间
+    k = np.searchsorted(-totals, -1.0)
+    if k == 0:
+        tau = breakpoints[0]
+    elif k >= len(breakpoints):
+        tau = breakpoints[-1]
+    else:
+        t0, t1 = breakpoints[k - 1], breakpoints[k]
+        s0, s1 = totals[k - 1], totals[k]
+        tau = t0 if s0 == s1 else t0 + (s0 - 1.0) * (t1 - t0) / (s0 - s1)
+    return np.clip(v - tau, lower, upper)
+
+
+def mean_variance_weights(mu: np.ndarray, cov: np.ndarray, risk_aversion: float,
+                          lower: np.ndarray, upper: np.ndarray,
+                          anchor: Optional[np.ndarray] = None, anchor_strength: float = 0.0,
+                          max_iter: int = 1000, tol: float = 1e-9) -> np.ndarray:
+    """
+    求解 max w'mu - risk_aversion/2 * w'Σw - anchor_strength/2 * ||w - anchor||²，
+    约束为权重之和为1且在上下限之间
+
+    anchor 为策略性基准配置，anchor_strength 控制向基准收缩的程度，避免结果集中在约束边界。
+    目标函数为凹函数，使用加速投影梯度法（FISTA），步长取Lipschitz常数的倒数
+    """
+    n = len(mu)
+    if anchor is None:
+        anchor = np.full(n, 1 / n)
+    hessian = risk_aversion * cov + anchor_strength * np.eye(n)
+    linear = mu + anchor_strength * anchor
+    step = 1.0 / np.linalg.eigvalsh(hessian).max()
+
+    w = project_to_bounds(anchor, lower, upper)
+    y = w
+    t = 1.0
+    for _ in range(max_iter):
+        updated = project_to_bounds(y + step * (linear - hessian @ y), lower, upper)
+        if np.abs(updated - w).max() < tol:
+            return updated
+        t_next = (1 + np.sqrt(1 + 4 * t * t)) / 2
+        y = updated + (t - 1) / t_next * (updated - w)
+        w, t = updated, t_next
+    return w
+
+
+def risk_parity_weights(cov: np.ndarray, lower: np.ndarray, upper: np.ndarray,
+                        max_iter: int = 500, tol: float = 1e-10) -> np.ndarray:
+    """
+    求解风险平价权重（各产品风险贡献相等），再投影到权重上下限内
+
+    使用不动点迭代 w_i ∝ 1 / (Σw)_i
+    """
+    w = 1 / np.sqrt(np.diag(cov))
+    w = w / w.sum()
+    for _ in range(max_iter):
+        marginal = cov @ w
+        updated = 1 / marginal
+        updated = updated / updated.sum()
+        # 取几何平均作为阻尼，避免震荡
+        updated = np.sqrt(w * updated)
+        updated = updated / updated.sum()
+        if np.abs(updated - w).max() < tol:
+            w = updated
+            break
+        w = updated
+    return project_to_bounds(w, lower, upper)
+
+
+def to_percentages(weights: np.ndarray) -> List[int]:
+    """使用最大余数法将权重转换为总和为100的整数百分比"""
+    raw = weights * 100
+    floors = np.floor(raw).astype(int)
+    remainder = 100 - floors.sum()
+    for i in np.argsort(-(raw - floors))[:remainder]:
+        floors[i] += 1
+    return floors.tolist()
+
+
+class AllocationOptimizer:
+    """
+    资产配置优化器，根据产品的预期收益、协方差和个人约束计算配置比例
+    """
+
+    def __init__(self, method: str = 'mean_variance', min_weight: float = 0.02, max_weight: float = 0.6,
+                 anchor_strength: float = ANCHOR_STRENGTH):
+        """
+        参数:
+        - method: 优化方法，'mean_variance'（均值-方差）或 'risk_parity'（风险平价）
+        - min_weight: 单个产品的最低配置比例
+        - max_weight: 单个产品的最高配置比例
+        - anchor_strength: 均值-方差优化向产品原始配置收缩的强度
+        """
+        if method not in ('mean_variance', 'risk_parity'):
+            raise ValueError(f"不支持的优化方法: {method}")
+        self.method = method
+        self.min_weight = min_weight
+        self.max_weight = max_weight
+        self.anchor_strength = anchor_strength
+
+    def constraints(self, risk_level: str, age_group: str, balance_group: str,
+                    has_loans: bool, volatility: np.ndarray) -> Tuple[float, np.ndarray, np.ndarray]:
+        """
+        根据个人情况确定风险厌恶系数和各产品的配置上下限
+
+        返回:
+        - (风险厌恶系数, 下限向量, 上限向量)
+        """
+        n = len(volatility)
+        risk_aversion = BASE_RISK_AVERSION.get(risk_level, BASE_RISK_AVERSION['Medium'])
+        lower = np.full(n, self.min_weight)
+        upper = np.full(n, self.max_weight)
+
+        if age_group == 'senior':
+            # 老年人提高风险厌恶，并限制高波动产品的比例
+            risk_aversion *= 2
+            upper[volatility > HIGH_VOLATILITY] = min(self.max_weight, 0.15)
+        elif age_group == 'young':
+            risk_aversion *= 0.7
+
+        if balance_group == 'low':
+            # 余额较低时，波动最低的产品至少配置20%作为应急资金
+            lower[np.argmin(volatility)] = max(self.min_weight, 0.2)
+        elif balance_group == 'high':
+            # 余额较高时强调分散投资
+            upper = np.minimum(upper, 0.4)
+
+        if has_loans:
+            risk_aversion *= 1.5
+
+        # 保证约束可行
+        upper = np.maximum(upper, lower)
+        if upper.sum() < 1:
+            upper = upper + (1 - upper.sum()) / n
+        return risk_aversion, lower, upper
+
+    def optimize(self, products: List[Dict[str, Any]], risk_level: str,
+                 age: Optional[int] = None, balance: Optional[float] = None,
+                 has_loans: bool = False) -> Dict[str, Any]:
+        """
+        计算一组产品的优化配置
+
+        参数:
+        - products: 产品列表，格式同 InvestmentAdvisor，原始配置比例作为均值-方差优化的基准
+        - risk_level: 风险等级
+        - age: 年龄
+        - balance: 账户余额
+        - has_loans: 是否有贷款
+
+        返回:
+        - 包含权重、整数百分比、组合预期收益和波动率的字典
+        """
+        names = tuple(p['name'] for p in products)
+        anchor = tuple(float(p['allocation']) for p in products)
+        return _optimize_bucket(names, anchor, risk_level, age_bucket(age), balance_bucket(balance),
+                                bool(has_loans), self.method, self.min_weight, self.max_weight,
+                                self.anchor_strength)
+
+
+@lru_cache(maxsize=256)
+def _optimize_bucket(names: Tuple[str, ...], anchor: Tuple[float, ...], risk_level: str,
+                     age_group: str, balance_group: str, has_loans: bool, method: str,
+                     min_weight: float, max_weight: float, anchor_strength: float) -> Dict[str, Any]:
+    """按参数分档缓存优化结果，同一分档的用户直接复用"""
+    optimizer = AllocationOptimizer(method=method, min_weight=min_weight, max_weight=max_weight,
+                                    anchor_strength=anchor_strength)
+    mu, cov = product_moments(list(names))
+    volatility = np.sqrt(np.diag(cov))
+    risk_aversion, lower, upper = optimizer.constraints(risk_level, age_group, balance_group, has_loans, volatility)
+
+    if method == 'risk_parity':
+        weights = risk_parity_weights(cov, lower, upper)
+    else:
+        anchor_weights = np.array(anchor) / sum(anchor)
+        weights = mean_variance_weights(mu, cov, risk_aversion, lower, upper,
+                                        anchor=anchor_weights, anchor_strength=anchor_strength)
+
+    weights.setflags(write=False)
+    return {
+        'method': method,
+        'weights': weights,
+        'allocations': to_percentages(weights),
+        'expected_return': float(weights @ mu),
+        'volatility': float(np.sqrt(weights @ cov @ weights)),
+        'risk_aversion': risk_aversion
+    }
@@ -0,0 +1,337 @@
+import os
+import sys
+import json
+import asyncio
+import contextlib
+import argparse
+import hashlib
+import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Optional
+
+import numpy as np
+import joblib
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+
+from risk_classifier import FamilyRiskClassifier, OPTIONAL_MODEL_FILE_NAMES, MODEL_TYPE_FILES
+from model_compression import COMPACT_RF_FILE, CompactForest
+from investment_advisor import InvestmentAdvisor
+from portfolio_analytics import analyze_stocks_data
+from inference_batcher import InferenceBatcher
+import metrics
+import profiling
+
+# 模型的转存副本目录，同一台机器上的多个服务进程共享
+SHARED_MODEL_DIR = os.path.join(os.path.dirname(__file__), 'cache', 'models')
+
+# 与 FamilyRiskClassifier.save_models 对应的模型属性和文件名
+MODEL_ATTRIBUTES = {
+    'dt_model': 'dt_model.pkl',
+    'rf_model': 'rf_model.pkl',
+    'hgb_model': 'hgb_model.pkl',
+    'confidence_calibrator': 'confidence_calibrator.pkl',
+    'label_encoders': 'label_encoders.pkl',
+    'risk_encoder': 'risk_encoder.pkl',
+    'feature_names': 'feature_names.pkl'
+}
+
+# 压缩随机森林的节点数组在转存目录中的子目录
+SHARED_COMPACT_DIR = 'rf_compact'
+
+# API密钥从环境变量读取
+FINANCIAL_API_KEY = os.environ.get('FINANCIAL_API_KEY')
+AI_API_KEY = os.environ.get('AI_API_KEY')
+
+
+def load_shared_classifier(model_path: Optional[str] = None,
+                           shared_dir: str = SHARED_MODEL_DIR,
+                           mmap_mode: Optional[str] = 'r') -> FamilyRiskClassifier:
+    """
+    加载可在多个进程间共享的风险分类器
+
+    首次加载时把 models/ 中的模型转存到 shared_dir（按模型文件的修改时间和大小区分版本），之后各进程从转存读取。
+    只有压缩的随机森林（见 model_compression.py）真正在进程间共享：它的节点数组保存为.npy文件，
+    以内存映射方式打开，所有进程使用操作系统页缓存中的同一份数据。
+    sklearn 的树模型在反序列化时会把节点数组复制到自己的缓冲区，内存映射对它们没有作用，
+    因此未压缩的随机森林、决策树和梯度提升模型以普通方式读入，每个进程各持有一份私有副本。
+    多进程部署时应先生成压缩模型。没有训练好的模型时返回规则型分类器。
+
+    参数:
+    - model_path: 模型目录，默认为 risk/models
+    - shared_dir: 转存副本的根目录
+    - mmap_mode: 压缩随机森林节点数组的内存映射模式，None 表示完整读入内存
+
+    返回:
+    - FamilyRiskClassifier 实例
+    """
+    classifier = FamilyRiskClassifier(auto_init=False)
+    if model_path:
+        classifier.model_path = model_path
+
+    # 可选的模型文件（如梯度提升模型）和未训练的模型不存在时不影响加载
+    optional = set(OPTIONAL_MODEL_FILE_NAMES) | set(MODEL_TYPE_FILES.values())
+    sources = {
+        attr: os.path.join(classifier.model_path, name) for attr, name in MODEL_ATTRIBUTES.items()
+        if name not in optional or os.path.exists(os.path.join(classifier.model_path, name))
+    }
+    if not all(os.path.exists(path) for path in sources.values()):
+        classifier._initialize_models()
+        return classifier
+
+    # 压缩的随机森林也参与版本计算，生成后各进程改用压缩模型
+    version_files = list(sources.values())
+    compact_path = os.path.join(classifier.model_path, COMPACT_RF_FILE)
+    if os.path.exists(compact_path):
+        version_files.append(compact_path)
+
+    digest = hashlib.sha256()
+    for path in version_files:
+        stat = os.stat(path)
+        digest.update(f"{os.path.basename(path)}:{stat.st_mtime_ns}:{stat.st_size}\n".encode('utf-8'))
+    version_dir = os.path.join(shared_dir, digest.hexdigest()[:16])
+
+    if not os.path.exists(version_dir):
+        if not classifier.load_models():
+            classifier._initialize_models()
+            return classifier
+        tmp_dir = f"{version_dir}.{os.getpid()}.tmp"
+        os.makedirs(tmp_dir, exist_ok=True)
+        for attr in MODEL_ATTRIBUTES:
+            model = getattr(classifier, attr)
+            if isinstance(model, CompactForest):
+                model.save_arrays(os.path.join(tmp_dir, SHARED_COMPACT_DIR))
+            else:
+                joblib.dump(model, os.path.join(tmp_dir, f"{attr}.joblib"))
+        try:
+            os.rename(tmp_dir, version_dir)
+        except OSError:
+            # 其他进程已经完成转存
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    for attr in MODEL_ATTRIBUTES:
+        path = os.path.join(version_dir, f"{attr}.joblib")
+        if attr == 'rf_model' and not os.path.exists(path):
+            classifier.rf_model = CompactForest.load_arrays(os.path.join(version_dir, SHARED_COMPACT_DIR), mmap_mode)
+        else:
+            setattr(classifier, attr, joblib.load(path))
+    classifier._set_model_version(classifier.compute_model_version())
+    return classifier
+
+
+def to_jsonable(value: Any) -> Any:
+    """把numpy/pandas类型递归转换为可JSON序列化的Python类型"""
+    if isinstance(value, dict):
+        return {str(k): to_jsonable(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [to_jsonable(v) for v in value]
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    if hasattr(value, 'to_dict'):
+        return to_jsonable(value.to_dict())
+    return value
+
+
+class RiskAdviceService:
+    """
+    风险评估与投资建议的HTTP服务
+
+    请求在事件循环中异步解析和响应，模型推理、组合计算和外部API调用在线程池中执行，
+    不阻塞其他请求。聊天助手和增强版风险分类器在首次使用时才创建。
+    """
+
+    def __init__(self,
+                 classifier: Optional[FamilyRiskClassifier] = None,
+                 advisor: Optional[InvestmentAdvisor] = None,
+                 chat_assistant=None,
+                 max_workers: Optional[int] = None,
+                 batch_size: Optional[int] = None,
+                 batch_wait_ms: Optional[float] = None):
+        """
+        参数:
+        - classifier: 风险分类器，默认由 load_shared_classifier 加载
+        - advisor: 投资顾问
+        - chat_assistant: AIFinancialChatAssistant 实例（可选）
+        - max_workers: 线程池大小，默认为 CPU核数 x 4
+        - batch_size: 风险评估每批最多的请求数，默认读取环境变量 API_BATCH_SIZE（64）
+        - batch_wait_ms: 风险评估收集一批请求的最长等待时间，默认读取环境变量 API_BATCH_WAIT_MS（2毫秒）
+        """
+        self.classifier = classifier if classifier is not None else load_shared_classifier()
+        self.batcher = InferenceBatcher(
+            self.classifier,
+            max_batch_size=batch_size or int(os.environ.get('API_BATCH_SIZE', 64)),
+            max_wait_ms=batch_wait_ms if batch_wait_ms is not None else float(os.environ.get('API_BATCH_WAIT_MS', 2.0))
+        )
+        self.advisor = advisor if advisor is not None else InvestmentAdvisor()
+        self._chat_assistant = chat_assistant
+        self._chat_lock = threading.Lock()
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers or (os.cpu_count() or 1) * 4,
+            thread_name_prefix='api-worker'
+        )
+
+    @property
+    def chat_assistant(self):
+        """延迟创建AI金融聊天助手"""
+        with self._chat_lock:
+            if self._chat_assistant is None:
+                from financial_integration import AIFinancialChatAssistant
+                self._chat_assistant = AIFinancialChatAssistant(
+                    financial_api_key=FINANCIAL_API_KEY,
+                    ai_api_key=AI_API_KEY
+                )
+            return self._chat_assistant
+
+    async def run(self, func, *args, **kwargs):
+        """在线程池中执行阻塞调用"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, lambda: func(*args, **kwargs))
+
+    @staticmethod
+    async def read_json(request: Request) -> Dict[str, Any]:
+        try:
+            payload = await request.json()
+        except (ValueError, json.JSONDecodeError):
+            raise ValueError("请求体不是有效的JSON")
+        if not isinstance(payload, dict):
+            raise ValueError("请求体必须是JSON对象")
+        return payload
+
+    # ---- 业务处理（同步函数在线程池中执行） ----
+
+    async def classify(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        # 并发的评估请求由微批处理队列合并为一次预测
+        member = {
+            'age': int(payload.get('age', 35)),
+            'balance': float(payload.get('balance', 0)),
+            'loan': payload.get('loan', False),
+            'housing': payload.get('housing', False),
+            'job': payload.get('job', 'unknown'),
+            'marital': payload.get('marital', 'unknown'),
+            'education': payload.get('education', 'unknown')
+        }
+        return await asyncio.wrap_future(self.batcher.submit(member))
+
+    def recommend(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        return self.advisor.get_personalized_recommendation(
+            risk_level=payload['risk_level'],
+            age=payload.get('age'),
+            balance=payload.get('balance'),
+            has_loans=bool(payload.get('has_loans', False))
+        )
+
+    def portfolio_analytics(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        portfolio = payload.get('portfolio', [])
+        if 'stocks_data' in payload:
+            # 调用方已提供价格数据时只做本地计算
+            return {'metrics': analyze_stocks_data(portfolio, payload['stocks_data'])}
+        return self.chat_assistant.risk_classifier.analyze_portfolio(portfolio)
+
+    def chat(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        return self.chat_assistant.process_query(payload['query'], payload.get('chat_history'))
+
+    # ---- HTTP端点 ----
+
+    @staticmethod
+    def _run_profiled(profile, handler, payload):
+        # 在执行处理函数的线程中采样
+        with profile:
+            return handler(payload)
+
+    def endpoint(self, handler):
+        """
+        把业务处理函数包装为异步端点，统一处理参数错误和异常
+
+        查询参数带 profile=1（或设置了 RISK_PROFILE=1）时对本次请求做性能剖析，
+        结果文件路径通过响应头 X-Profile-Path 返回。
+        """
+        async def route(request: Request) -> JSONResponse:
+            profile = None
+            if profiling.is_requested(request.query_params):
+                profile = profiling.Profile('api' + request.url.path.replace('/', '.'))
+            try:
+                payload = await self.read_json(request)
+                if asyncio.iscoroutinefunction(handler):
+                    with profile or contextlib.nullcontext():
+                        result = await handler(payload)
+                elif profile is not None:
+                    result = await self.run(self._run_profiled, profile, handler, payload)
+                else:
+                    result = await self.run(handler, payload)
+            except KeyError as e:
+                return JSONResponse({'error': f"缺少参数: {e.args[0]}"}, status_code=400)
+            except (ValueError, TypeError) as e:
+                return JSONResponse({'error': str(e)}, status_code=400)
+            except Exception as e:
+                return JSONResponse({'error': f"处理请求时出错: {str(e)}"}, status_code=500)
+            headers = {'X-Profile-Path': profile.path} if profile is not None and profile.path else None
+            return JSONResponse(to_jsonable(result), headers=headers)
+        return route
+
+    async def health(self, request: Request) -> JSONResponse:
+        return JSONResponse({
+            'status': 'ok',
+            'model_loaded': self.classifier.model_version != 'rules',
+            'model_version': self.classifier.model_version
+        })
+
+    async def metrics(self, request: Request) -> Response:
+        """Prometheus抓取端点"""
+        return Response(metrics.render(), media_type=metrics.CONTENT_TYPE)
+
+    def create_app(self) -> Starlette:
+        routes = [
+            Route('/health', self.health, methods=['GET']),
+            Route('/metrics', self.metrics, methods=['GET']),
+            Route('/risk/classify', self.endpoint(self.classify), methods=['POST']),
+            Route('/recommendations', self.endpoint(self.recommend), methods=['POST']),
+            Route('/portfolio/analytics', self.endpoint(self.portfolio_analytics), methods=['POST']),
+            Route('/chat', self.endpoint(self.chat), methods=['POST'])
+        ]
+        @contextlib.asynccontextmanager
+        async def lifespan(app):
+            yield
+            self.batcher.close()
+            self.executor.shutdown(wait=False)
+
+        return Starlette(routes=routes, lifespan=lifespan)
+
+
+def create_app(**kwargs) -> Starlette:
+    """ASGI应用工厂，供 uvicorn --factory 使用"""
+    return RiskAdviceService(**kwargs).create_app()
+
+
+def main():
+    """启动REST服务"""
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="家康智投系统 REST 服务")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--workers', type=int, default=1, help="服务进程数，各进程共享内存映射的压缩随机森林，其余模型各持有一份副本")
+    parser.add_argument('--batch-size', type=int, default=64, help="风险评估每批最多的请求数")
+    parser.add_argument('--batch-wait-ms', type=float, default=2.0, help="风险评估收集一批请求的最长等待时间（毫秒）")
+    parser.add_argument('--profile', action='store_true', help="对每个请求做性能剖析（也可以只在请求中加 ?profile=1）")
+    args = parser.parse_args()
+
+    # 通过环境变量传给各服务进程中的应用工厂
+    os.environ['API_BATCH_SIZE'] = str(args.batch_size)
+    os.environ['API_BATCH_WAIT_MS'] = str(args.batch_wait_ms)
+    if args.profile:
+        os.environ['RISK_PROFILE'] = '1'
+
+    # 启动前转存一次共享模型，避免多个进程同时转存
+    load_shared_classifier()
+
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    uvicorn.run('api_server:create_app', factory=True, host=args.host, port=args.port, workers=args.workers)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,17 +2,27 @@ import streamlit as st
 import pandas as pd
 import numpy as np
 import os
+import sys
 import matplotlib.pyplot as plt
 import seaborn as sns
 import json
-import time
+import sqlite3
 from typing import Dict, List, Any, Optional, Union
 
 # 导入原有模块
-from risk_classifier import FamilyRiskClassifier
+from risk_classifier import FamilyRiskClassifier, MODEL_TYPES
 from investment_advisor import InvestmentAdvisor
 from matplotlib_chinese import setup_chinese_fonts
 from streamlit_config import setup_streamlit_config
+from dataset_loader import load_dataset
+from chart_cache import render_pie_chart
+from training_jobs import TrainingJobManager, DEFAULT_FEATURES
+from member_store import MemberStore
+from family_store import FamilyStore, member_key
+import instrumentation
+import metrics
+import profiling
+from instrumentation import timed
 
 # 导入新增模块
 from financial_data_provider import FinancialDataProvider
@@ -74,9 +84,650 @@ def load_chat_assistant():
         ai_api_key=AI_API_KEY
     )
 
+# 财富预测结果按每月投资金额和投资期限缓存
+@st.cache_data(show_spinner=False)
+def project_wealth(monthly_savings, investment_horizon):
+    return load_investment_advisor().project_wealth(monthly_savings, investment_horizon)
+
+def reload_classifiers(job):
+    """
+    训练任务发布新模型后清除缓存的分类器和聊天助手（其中也有一个分类器）
+
+    下一次运行重新创建并完整加载新模型的实例；不在正在使用的实例上逐个替换模型，
+    进行中的运行继续使用旧实例，不会混用新旧模型。
+    """
+    load_classifier.clear()
+    load_chat_assistant.clear()
+
+# 初始化模型训练任务管理器，训练完成后重新加载所有共享的分类器
+@st.cache_resource
+def load_training_manager():
+    manager = TrainingJobManager(model_path=FamilyRiskClassifier(auto_init=False).model_path)
+    manager.add_publish_listener(reload_classifiers)
+    return manager
+
+# 成员特征库：保存每个成员预先计算的风险评估，输入或模型版本变化时才重新评估
+@st.cache_resource
+def load_member_store():
+    return MemberStore()
+
+def refresh_member_risks(family_members):
+    """从成员特征库读取风险等级，输入或模型版本变化的成员批量重新评估，结果有变化的写回家庭档案"""
+    changed = {}
+    keys = [member_key(member['household_id'], member['name']) for member in family_members]
+    for member, result in zip(family_members, member_store.score(classifier, family_members, keys)):
+        risks = {
+            'risk_rule': result['rule_based'],
+            'risk_dt': result['decision_tree'],
+            'risk_rf': result['random_forest'],
+            'confidence': result['confidence']
+        }
+        if any(member.get(field) != value for field, value in risks.items()):
+            member.update(risks)
+            changed[member['member_id']] = risks
+    if changed:
+        family_store.update_members(changed)
+
+# 家庭档案库：家庭和成员持久保存，会话结束后仍然保留
+@st.cache_resource
+def load_family_store():
+    return FamilyStore(member_store=load_member_store())
+
+# 新会话默认使用的家庭
+DEFAULT_HOUSEHOLD = "我的家庭"
+
+def select_household():
+    """侧边栏搜索、选择或新建家庭，返回当前家庭ID"""
+    household_id = st.session_state.get('household_id')
+    if household_id is None or family_store.get_household(household_id) is None:
+        household_id = family_store.create_household(DEFAULT_HOUSEHOLD)
+    
+    with st.sidebar.expander("🏠 家庭档案"):
+        prefix = st.text_input("按名称搜索家庭")
+        households = family_store.list_households(prefix=prefix, limit=50)
+        options = {h['household_id']: f"{h['name']}（{h['member_count']}人）" for h in households}
+        if household_id not in options:
+            options = {household_id: family_store.get_household(household_id)['name'], **options}
+        household_id = st.selectbox("当前家庭", list(options), index=list(options).index(household_id),
+                                    format_func=options.get)
+        st.caption(f"共 {family_store.count_households()} 个家庭")
+        
+        new_name = st.text_input("新建家庭")
+        if st.button("创建家庭") and new_name.strip():
+            household_id = family_store.create_household(new_name.strip())
+            st.session_state.household_id = household_id
+            st.rerun()
+    
+    st.session_state.household_id = household_id
+    return household_id
+
+# 设置环境变量 METRICS_PORT 后在本机启动Prometheus指标抓取端点（每个进程一次）
+@st.cache_resource
+def start_metrics_server():
+    port = os.environ.get('METRICS_PORT')
+    return metrics.start_http_server(int(port)) if port else None
+
+start_metrics_server()
 classifier = load_classifier()
 investment_advisor = load_investment_advisor()
 chat_assistant = load_chat_assistant()
+training_manager = load_training_manager()
+member_store = load_member_store()
+family_store = load_family_store()
+
+def show_model_accuracies(metrics):
+    """按模型类型显示准确率；还没有评估结果时（超参数搜索中）显示交叉验证准确率，都没有时不显示"""
+    for suffix, label in (('accuracy', "准确率"), ('cv_score', "交叉验证准确率")):
+        trained = [(name, metrics[f'{model_type}_{suffix}']) for model_type, (_, name) in MODEL_TYPES.items()
+                   if f'{model_type}_{suffix}' in metrics]
+        if trained:
+            break
+    else:
+        return
+    for col, (name, accuracy) in zip(st.columns(len(trained)), trained):
+        with col:
+            st.metric(f"{name}{label}", f"{accuracy:.2%}")
+
+def show_training_job(job):
+    """显示训练任务的进度或结果"""
+    if job['status'] in ('pending', 'running'):
+        st.progress(job['progress'], text=job['message'])
+        if job['metrics']:
+            show_model_accuracies(job['metrics'])
+        return
+    
+    if job['status'] == 'failed':
+        st.error("模型训练失败")
+        with st.expander("错误详情"):
+            st.code(job['error'])
+        return
+    
+    results = job['results']
+    st.success(f"模型训练完成！已发布模型版本 v{job['version']}")
+    
+    # 显示准确率
+    show_model_accuracies(results)
+    
+    # 显示超参数搜索得到的参数
+    tuned = {name: results[f'{model_type}_best_params'] for model_type, (_, name) in MODEL_TYPES.items()
+             if f'{model_type}_best_params' in results}
+    if tuned:
+        with st.expander("最优超参数"):
+            st.json(tuned)
+    
+    # 显示分类报告
+    for model_type, (_, name) in MODEL_TYPES.items():
+        if f'{model_type}_report' in results:
+            st.subheader(f"{name}模型评估")
+            st.dataframe(pd.DataFrame(results[f'{model_type}_report']).transpose())
+
+# 训练进行中时每秒刷新任务状态，只重新运行这一部分页面
+@st.fragment(run_every=1.0)
+@timed('app.poll_training_job')
+def poll_training_job(job_id):
+    job = training_manager.get(job_id)
+    show_training_job(job)
+    if job['status'] not in ('pending', 'running'):
+        st.rerun()
+
+# 风险等级中文映射
+RISK_LEVEL_ZH = {
+    'High': '高风险',
+    'Medium': '中风险',
+    'Low': '低风险'
+}
+
+# 投资产品中文映射
+PRODUCT_NAME_ZH = {
+    'Stocks': '股票',
+    'Bonds': '债券',
+    'Cash': '现金',
+    'Real Estate': '房地产',
+    'Commodities': '大宗商品',
+    'Cryptocurrencies': '加密货币',
+    'ETFs': 'ETF基金',
+    'Mutual Funds': '共同基金',
+    'CDs': '定期存款',
+    'Treasury Bills': '国债',
+    'High-Yield Bonds': '高收益债券',
+    'Growth Stocks': '成长股',
+    'Value Stocks': '价值股',
+    'Index Funds': '指数基金',
+    'Money Market': '货币市场'
+}
+
+# 家庭汇总数据按成员数据缓存，成员未变化时不重新计算
+@st.cache_data(show_spinner=False, max_entries=100)
+def summarize_family(family_members):
+    members_df = pd.DataFrame(family_members)
+    
+    # 选择要显示的列
+    display_columns = ['name', 'age', 'balance', 'risk_rf', 'investment_portfolio', 'monthly_savings', 'investment_horizon', 'investment_goal']
+    # 确保所有列都存在（家庭档案库中未设置的字段为空）
+    for col in display_columns:
+        if col not in members_df.columns or members_df[col].isna().all():
+            members_df[col] = "未设置"
+    
+    # 重命名列以便显示
+    column_rename = {
+        'name': '姓名',
+        'age': '年龄',
+        'balance': '账户余额',
+        'risk_rf': '风险等级',
+        'investment_portfolio': '投资组合',
+        'monthly_savings': '每月投资',
+        'investment_horizon': '投资期限',
+        'investment_goal': '投资目标'
+    }
+    
+    # 随机森林风险分布，转换为中文标签
+    risk_counts_rf = members_df['risk_rf'].value_counts()
+    risk_counts_zh = pd.Series(
+        risk_counts_rf.values,
+        index=[RISK_LEVEL_ZH.get(idx, idx) for idx in risk_counts_rf.index]
+    )
+    
+    # 计算高风险成员比例，并确定建议的资产配置
+    high_risk_percent = len(members_df[members_df['risk_rf'] == 'High']) / len(members_df) * 100
+    if high_risk_percent > 50:
+        portfolio_allocation = {'高风险资产': 20, '中风险资产': 40, '低风险资产': 40}
+    elif high_risk_percent > 30:
+        portfolio_allocation = {'高风险资产': 30, '中风险资产': 40, '低风险资产': 30}
+    else:
+        portfolio_allocation = {'高风险资产': 40, '中风险资产': 40, '低风险资产': 20}
+    
+    monthly_investment = pd.to_numeric(members_df['monthly_savings'], errors='coerce').sum()
+    return {
+        'display_df': members_df[display_columns].rename(columns=column_rename),
+        'risk_counts': risk_counts_zh,
+        'portfolio_counts': members_df['investment_portfolio'].value_counts(),
+        'total_balance': members_df['balance'].sum(),
+        'monthly_investment': monthly_investment,
+        # 计算年度投资收益预估（假设年化收益率5%）
+        'estimated_return': monthly_investment * 12 * 0.05,
+        'high_risk_percent': high_risk_percent,
+        'portfolio_allocation': portfolio_allocation
+    }
+
+# 家庭概览：成员表、分布图、投资概览和整体配置建议
+@st.fragment
+@timed('app.family_overview_panel')
+def family_overview_panel(family_members):
+    summary = summarize_family(family_members)
+    
+    # 显示家庭成员列表
+    st.subheader("家庭成员列表")
+    st.dataframe(summary['display_df'], width=800)
+    
+    # 创建风险分布和投资组合分布图表
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        st.subheader("家庭风险分布")
+        # 使用中文字体渲染饼图，相同数据的图表直接复用渲染缓存
+        st.write("### 家庭风险分布")
+        st.image(render_pie_chart(summary['risk_counts'].values, summary['risk_counts'].index))
+    
+    with col2:
+        st.subheader("投资组合分布")
+        # 使用中文字体渲染饼图，相同数据的图表直接复用渲染缓存
+        st.write("### 投资组合分布")
+        st.image(render_pie_chart(summary['portfolio_counts'].values, summary['portfolio_counts'].index))
+    
+    # 家庭投资总额和月度投资总额
+    st.subheader("家庭投资概览")
+    
+    col1, col2, col3 = st.columns(3)
+    
+    with col1:
+        st.metric("家庭总资产", f"¥{summary['total_balance']:,.2f}")
+    
+    with col2:
+        st.metric("每月总投资额", f"¥{summary['monthly_investment']:,.2f}")
+    
+    with col3:
+        st.metric("预估年度投资收益", f"¥{summary['estimated_return']:,.2f}", 
+                 delta="5%", delta_color="normal",
+                 help="基于5%的年化收益率估算")
+    
+    # 家庭投资建议
+    st.subheader("家庭投资建议")
+    
+    high_risk_percent = summary['high_risk_percent']
+    if high_risk_percent > 50:
+        st.error("⚠️ 家庭整体风险较高，建议降低高风险资产配置，增加稳健型投资比例。")
+        st.info("建议家庭投资组合配置：20%高风险资产，40%中风险资产，40%低风险资产")
+    elif high_risk_percent > 30:
+        st.warning("⚠️ 家庭存在一定风险，建议平衡投资组合。")
+        st.info("建议家庭投资组合配置：30%高风险资产，40%中风险资产，30%低风险资产")
+    else:
+        st.success("✅ 家庭整体风险较低，可以适当增加收益型资产比例。")
+        st.info("建议家庭投资组合配置：40%高风险资产，40%中风险资产，20%低风险资产")
+    
+    # 显示家庭投资组合建议图表
+    st.subheader("家庭整体投资组合建议")
+    
+    portfolio_allocation = summary['portfolio_allocation']
+    # 使用中文字体渲染饼图，相同数据的图表直接复用渲染缓存
+    st.write("### 建议家庭资产配置")
+    st.image(render_pie_chart(list(portfolio_allocation.values()), list(portfolio_allocation.keys())))
+
+# 家庭成员投资详情：筛选只重新运行这一部分
+@st.fragment
+@timed('app.family_member_details_panel')
+def family_member_details_panel(family_members):
+    st.subheader("家庭成员投资详情")
+    
+    risk_filter = st.multiselect(
+        "按风险等级筛选",
+        options=['High', 'Medium', 'Low'],
+        default=['High', 'Medium', 'Low'],
+        format_func=lambda level: RISK_LEVEL_ZH[level]
+    )
+    
+    # 按风险等级排序
+    risk_order = {'High': 0, 'Medium': 1, 'Low': 2}
+    sorted_members = sorted(
+        [m for m in family_members if m.get('risk_rf') in risk_filter or m.get('risk_rf') not in risk_order],
+        key=lambda x: (risk_order.get(x.get('risk_rf', 'Low'), 3), -x.get('age', 0))
+    )
+    
+    # 显示每个成员的投资详情
+    for member in sorted_members:
+        with st.expander(f"{member['name']} ({member['age']}岁) - {member.get('investment_portfolio') or '未设置投资组合'}"):
+            col1, col2 = st.columns(2)
+            
+            with col1:
+                st.write("#### 基本信息")
+                st.write(f"**账户余额:** ¥{member['balance']:,.2f}")
+                risk_color = "red" if member['risk_rf'] == "High" else "orange" if member['risk_rf'] == "Medium" else "green"
+                st.write(f"**风险等级:** <span style='color:{risk_color}'>{member['risk_rf']}</span>", unsafe_allow_html=True)
+                
+                if member.get('monthly_savings') is not None:
+                    st.write(f"**每月投资:** ¥{member['monthly_savings']:,.2f}")
+                if member.get('investment_horizon') is not None:
+                    st.write(f"**投资期限:** {member['investment_horizon']}")
+                if member.get('investment_goal') is not None:
+                    st.write(f"**投资目标:** {member['investment_goal']}")
+            
+            with col2:
+                st.write("#### 投资建议")
+                # 获取该成员的投资建议
+                if 'risk_rf' in member:
+                    investment_rec = investment_advisor.get_investment_recommendation(member['risk_rf'])
+                    
+                    # 转换为中文标签
+                    products_zh = [PRODUCT_NAME_ZH.get(p['name'], p['name']) for p in investment_rec['products']]
+                    allocations = [p['allocation'] for p in investment_rec['products']]
+                    
+                    # 使用中文字体渲染饼图，相同数据的图表直接复用渲染缓存
+                    st.write("### 建议投资配置")
+                    st.image(render_pie_chart(allocations, products_zh))
+
+# 金融数据提供者（所有会话共享）
+@st.cache_resource
+def load_financial_data():
+    return FinancialDataProvider(api_key=FINANCIAL_API_KEY)
+
+# 金融数据API的查询结果按方法和参数缓存
+@st.cache_data(ttl=300, show_spinner=False)
+def fetch_financial_data(method, *args, **kwargs):
+    return getattr(load_financial_data(), method)(*args, **kwargs)
+
+def get_financial_data(method, *args, **kwargs):
+    """读取缓存的金融数据，失败的结果不保留在缓存中"""
+    result = fetch_financial_data(method, *args, **kwargs)
+    if isinstance(result, dict) and 'error' in result:
+        fetch_financial_data.clear(method, *args, **kwargs)
+    return result
+
+def show_stock_prices(ticker):
+    """显示股票快照和历史价格"""
+    # 获取股票价格
+    end_date = pd.Timestamp.now().strftime('%Y-%m-%d')
+    start_date = (pd.Timestamp.now() - pd.Timedelta(days=365)).strftime('%Y-%m-%d')
+    
+    stock_data = get_financial_data(
+        'get_stock_prices',
+        ticker=ticker,
+        start_date=start_date,
+        end_date=end_date,
+        interval="day",
+        interval_multiplier=1
+    )
+    
+    if 'error' in stock_data:
+        st.error(f"获取股票数据失败: {stock_data['error']}")
+        return
+    
+    # 显示股票快照数据
+    snapshot = get_financial_data('get_stock_snapshot', ticker)
+    if 'error' not in snapshot:
+        st.subheader(f"{ticker} 当前数据")
+        col1, col2, col3 = st.columns(3)
+        
+        with col1:
+            current_price = snapshot.get('price', 'N/A')
+            st.metric("当前价格", f"${current_price}")
+        
+        with col2:
+            change = snapshot.get('change', 'N/A')
+            change_percent = snapshot.get('change_percent', 'N/A')
+            # 确保change是数值类型才进行比较
+            delta_color = "normal" if isinstance(change, (int, float)) and change >= 0 else "inverse"
+            st.metric("价格变动", f"${change}", f"{change_percent}%", delta_color=delta_color)
+        
+        with col3:
+            market_cap = snapshot.get('market_cap', 'N/A')
+            if isinstance(market_cap, (int, float)) and market_cap > 1000000000:
+                market_cap = f"${market_cap/1000000000:.2f}B"
+            st.metric("市值", market_cap)
+    
+    # 显示历史价格图表
+    if 'results' in stock_data.get('historical', {}):
+        st.subheader(f"{ticker} 历史价格")
+        
+        # 转换为DataFrame
+        prices_df = pd.DataFrame(stock_data['historical']['results'])
+        prices_df['date'] = pd.to_datetime(prices_df['date'])
+        prices_df = prices_df.sort_values('date')
+        prices_df = prices_df.set_index('date')
+        
+        # 显示价格图表
+        st.line_chart(prices_df['close'])
+        
+        # 显示交易量图表
+        st.subheader("交易量")
+        st.bar_chart(prices_df['volume'])
+        
+        # 显示数据表格
+        st.subheader("价格数据")
+        st.dataframe(prices_df[['open', 'high', 'low', 'close', 'volume']])
+
+def show_financial_statements(ticker):
+    """按选项卡显示三张财务报表"""
+    tabs = st.tabs(["损益表", "资产负债表", "现金流量表"])
+    statements = [("income", "损益表"), ("balance", "资产负债表"), ("cashflow", "现金流量表")]
+    
+    for tab, (statement_type, title) in zip(tabs, statements):
+        with tab:
+            st.subheader(f"{ticker} {title}")
+            statement_data = get_financial_data('get_financial_statements', ticker, statement_type=statement_type)
+            if 'error' in statement_data:
+                st.error(f"获取{title}失败: {statement_data['error']}")
+            elif 'results' in statement_data:
+                statement_df = pd.DataFrame(statement_data['results'])
+                if not statement_df.empty:
+                    st.dataframe(statement_df)
+                else:
+                    st.info(f"没有找到{title}数据")
+
+def show_financial_metrics(ticker):
+    """显示关键财务指标和完整指标表"""
+    metrics_data = get_financial_data('get_financial_metrics', ticker)
+    if 'error' in metrics_data:
+        st.error(f"获取财务指标失败: {metrics_data['error']}")
+        return
+    
+    st.subheader(f"{ticker} 财务指标")
+    if 'results' in metrics_data:
+        metrics_df = pd.DataFrame(metrics_data['results'])
+        if not metrics_df.empty:
+            # 显示关键指标
+            st.subheader("关键财务指标")
+            col1, col2, col3 = st.columns(3)
+            
+            # 获取最新的财务指标
+            latest_metrics = metrics_df.iloc[0]
+            
+            with col1:
+                pe_ratio = latest_metrics.get('pe_ratio', 'N/A')
+                st.metric("市盈率 (P/E)", pe_ratio)
+            
+            with col2:
+                pb_ratio = latest_metrics.get('pb_ratio', 'N/A')
+                st.metric("市净率 (P/B)", pb_ratio)
+            
+            with col3:
+                roe = latest_metrics.get('roe', 'N/A')
+                if isinstance(roe, (int, float)):
+                    roe = f"{roe:.2%}"
+                st.metric("股本回报率 (ROE)", roe)
+            
+            # 显示完整数据表格
+            st.subheader("完整财务指标")
+            st.dataframe(metrics_df)
+        else:
+            st.info("没有找到财务指标数据")
+
+def show_news_list(ticker):
+    """显示公司新闻列表"""
+    news_data = get_financial_data('get_news', ticker)
+    if 'error' in news_data:
+        st.error(f"获取公司新闻失败: {news_data['error']}")
+        return
+    
+    st.subheader(f"{ticker} 相关新闻")
+    for news in news_data.get('results', []):
+        with st.container():
+            st.markdown(f"### [{news.get('title', 'No Title')}]({news.get('url', '#')})")
+            st.markdown(f"**来源**: {news.get('source', 'Unknown')} | **日期**: {news.get('date', 'Unknown')}")
+            st.markdown(news.get('summary', 'No summary available'))
+            st.divider()
+
+# 股票数据查询：修改输入或查询只重新运行这一部分
+@st.fragment
+@timed('app.stock_query_panel')
+def stock_query_panel():
+    st.subheader("股票数据查询")
+    
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        ticker = st.text_input("股票代码", "AAPL")
+    
+    with col2:
+        data_type = st.selectbox(
+            "数据类型",
+            options=["股票价格", "财务报表", "财务指标", "公司新闻"],
+            index=0
+        )
+    
+    if st.button("获取数据", type="primary"):
+        st.session_state['stock_query'] = (ticker, data_type)
+    
+    # 保留最近一次查询的结果，页面其他部分的交互不会清除它
+    if 'stock_query' not in st.session_state:
+        return
+    
+    ticker, data_type = st.session_state['stock_query']
+    with st.spinner(f"正在获取 {ticker} 的{data_type}..."):
+        try:
+            if data_type == "股票价格":
+                show_stock_prices(ticker)
+            elif data_type == "财务报表":
+                show_financial_statements(ticker)
+            elif data_type == "财务指标":
+                show_financial_metrics(ticker)
+            elif data_type == "公司新闻":
+                show_news_list(ticker)
+        except Exception as e:
+            st.error(f"处理数据时出错: {str(e)}")
+
+def show_macro_data(data, title, trend_title, empty_message, limit=5):
+    """显示宏观数据表格和趋势图"""
+    st.write(f"### {title}")
+    
+    # 转换为DataFrame以便显示
+    try:
+        macro_df = pd.DataFrame(data['results'][:limit])
+        if macro_df.empty:
+            st.info(empty_message)
+            return
+        
+        # 格式化日期和数值
+        if 'date' in macro_df.columns:
+            macro_df['date'] = pd.to_datetime(macro_df['date']).dt.strftime('%Y-%m-%d')
+        
+        # 显示表格
+        st.dataframe(macro_df)
+        
+        # 如果有足够的数据，显示图表
+        if len(macro_df) > 1 and 'value' in macro_df.columns and 'date' in macro_df.columns:
+            macro_df['value'] = pd.to_numeric(macro_df['value'], errors='coerce')
+            macro_df = macro_df.sort_values('date')
+            
+            st.subheader(trend_title)
+            st.line_chart(macro_df.set_index('date')['value'])
+    except Exception as e:
+        st.error(f"处理{title}时出错: {str(e)}")
+
+# 市场概览：使用投资顾问共享的市场数据快照（并发获取，按TTL缓存）
+@st.fragment
+@timed('app.market_overview_panel')
+def market_overview_panel():
+    st.subheader("市场概览")
+    
+    if st.button("加载市场数据"):
+        st.session_state['market_overview_loaded'] = True
+    
+    if not st.session_state.get('market_overview_loaded'):
+        return
+    
+    with st.spinner("正在获取市场数据..."):
+        try:
+            market_data = investment_advisor.get_market_data()
+        except Exception as e:
+            st.error(f"获取市场数据时出错: {str(e)}")
+            return
+    
+    macro = market_data.get('macro', {})
+    
+    # 显示宏观经济指标
+    st.subheader("宏观经济指标")
+    if 'results' in macro.get('interest_rates', {}):
+        show_macro_data(macro['interest_rates'], "利率数据", "利率趋势", "暂无利率数据")
+    else:
+        st.info("暂无宏观经济数据，请稍后再试")
+    
+    if 'results' in macro.get('inflation', {}):
+        show_macro_data(macro['inflation'], "通胀数据", "通胀趋势", "暂无通胀数据")
+    
+    if 'results' in macro.get('gdp', {}):
+        show_macro_data(macro['gdp'], "GDP数据", "GDP趋势", "暂无GDP数据")
+    else:
+        st.info("暂无GDP数据，请稍后再试")
+    
+    # 显示热门公司概况
+    st.subheader("热门公司概况")
+    
+    popular_stocks = ['AAPL', 'MSFT', 'GOOGL', 'AMZN', 'TSLA']
+    company_data = market_data.get('company_profiles', {})
+    available_stocks = [stock for stock in popular_stocks if stock in company_data]
+    if not available_stocks:
+        st.info("暂时无法获取公司数据，请稍后再试。")
+        return
+    
+    for stock in available_stocks:
+        with st.expander(f"{stock} - 公司概况", expanded=False):
+            data = company_data[stock]
+            
+            if 'results' in data and data['results']:
+                profile = data['results'][0] if isinstance(data['results'], list) else data['results']
+                
+                col1, col2 = st.columns(2)
+                
+                with col1:
+                    st.write(f"**公司名称:** {profile.get('name', 'N/A')}")
+                    st.write(f"**股票代码:** {profile.get('ticker', 'N/A')}")
+                    st.write(f"**行业:** {profile.get('industry', 'N/A')}")
+                    st.write(f"**部门:** {profile.get('sector', 'N/A')}")
+                
+                with col2:
+                    st.write(f"**市值:** {profile.get('market_cap', 'N/A')}")
+                    st.write(f"**员工数:** {profile.get('employees', 'N/A')}")
+                    st.write(f"**国家:** {profile.get('country', 'N/A')}")
+                    st.write(f"**交易所:** {profile.get('exchange', 'N/A')}")
+                
+                st.write("**公司描述:**")
+                st.write(profile.get('description', 'N/A'))
+            else:
+                st.info(f"暂无{stock}的公司概况数据")
+    
+    # 显示收益数据
+    st.subheader("最新收益报告")
+    
+    earnings_data = market_data.get('earnings', {})
+    for stock in available_stocks:
+        earnings = earnings_data.get(stock, {})
+        if earnings.get('results'):
+            with st.expander(f"{stock} - 收益报告", expanded=False):
+                # 转换为DataFrame
+                earnings_df = pd.DataFrame(earnings['results'][:3])
+                if not earnings_df.empty:
+                    st.dataframe(earnings_df)
+                else:
+                    st.info(f"暂无{stock}的收益数据")
 
 # 侧边栏
 st.sidebar.title("家康智投系统")
@@ -85,6 +736,17 @@ st.sidebar.image("https://img.icons8.com/color/96/000000/investment-portfolio.pn
 # 主页面
 page = st.sidebar.radio("选择功能", ["首页", "模型训练", "风险评估", "投资建议", "家庭投资组合", "AI投资助手", "市场数据"])
 
+# 当前家庭
+household_id = select_household()
+
+# 页面整体渲染耗时（设置 RISK_INSTRUMENTATION=1 开启）
+page_timer = instrumentation.start(f"page.{page}")
+
+# 性能剖析：地址带 ?profile=1、设置 RISK_PROFILE=1 或以 streamlit run app.py -- --profile 启动
+if '--profile' in sys.argv[1:]:
+    os.environ['RISK_PROFILE'] = '1'
+page_profile = profiling.start(f"page.{page}") if profiling.is_requested(st.query_params) else None
+
 # 首页
 if page == "首页":
     st.title("🏠 家康智投系统")
@@ -133,8 +795,8 @@ elif page == "模型训练":
     
     if dataset_found:
         
-        # 加载并显示数据集预览
-        data = pd.read_csv(dataset_path, sep=',')
+        # 加载并显示数据集预览（首次解析后使用列式缓存）
+        data = load_dataset(dataset_path)
         st.subheader("数据集预览")
         st.dataframe(data.head())
         
@@ -146,32 +808,18 @@ elif page == "模型训练":
         with col2:
             st.info(f"特征: {', '.join(data.columns.tolist())}")
         
-        # 训练模型
+        # 训练模型（在后台进程中执行，不阻塞页面）
+        tune = st.checkbox("超参数搜索", help="交叉验证并行搜索决策树、随机森林和梯度提升的参数，耗时较长")
         if st.button("训练风险分类模型", type="primary"):
-            with st.spinner("正在训练模型，请稍候..."):
-                features = ['age', 'job', 'marital', 'education', 'balance', 'housing', 'loan']
-                data_subset = data[features]
-                
-                results = classifier.train(data_subset)
-                
-                # 显示训练结果
-                st.success("模型训练完成！")
-                
-                # 显示准确率
-                col1, col2 = st.columns(2)
-                with col1:
-                    st.metric("决策树准确率", f"{results['dt_accuracy']:.2%}")
-                with col2:
-                    st.metric("随机森林准确率", f"{results['rf_accuracy']:.2%}")
-                
-                # 显示分类报告
-                st.subheader("决策树模型评估")
-                dt_report = pd.DataFrame(results['dt_report']).transpose()
-                st.dataframe(dt_report)
-                
-                st.subheader("随机森林模型评估")
-                rf_report = pd.DataFrame(results['rf_report']).transpose()
-                st.dataframe(rf_report)
+            st.session_state['training_job_id'] = training_manager.submit(dataset_path, DEFAULT_FEATURES, tune=tune)
+        
+        # 显示本会话提交的任务，没有时显示最近一次训练任务
+        job = training_manager.get(st.session_state.get('training_job_id')) or training_manager.latest()
+        if job is not None:
+            if job['status'] in ('pending', 'running'):
+                poll_training_job(job['id'])
+            else:
+                show_training_job(job)
     else:
         st.error("未找到数据集: Dataset/bank.csv")
         st.info("请确保数据集文件位于正确的路径，或者手动上传数据集")
@@ -234,6 +882,10 @@ elif page == "风险评估":
                 index=1
             )
         
+        # 跳过和强制选项随表单一起提交；默认只在边界或模型有分歧时调用AI
+        skip_ai = st.checkbox("跳过AI深度分析（加快处理速度）")
+        force_ai = st.checkbox("总是进行AI深度分析", help="默认只在账户余额接近风险等级分界、模型置信度较低或各模型结果不一致时调用AI，其余情况使用模板解释")
+        
         submit = st.form_submit_button("评估风险")
     
     # 处理表单提交
@@ -260,33 +912,29 @@ elif page == "风险评估":
             'education': education_map[education]
         }
         
-        # 使用增强版风险分析 - 添加详细进度指示器
+        # 使用增强版风险分析 - 进度条在每个阶段实际完成后推进
         progress_bar = st.progress(0)
         status_text = st.empty()
         
-        # 第一阶段：初始化
-        status_text.text("正在初始化风险分析...")
-        progress_bar.progress(10)
-        time.sleep(0.5)  # 短暂延迟以显示进度
-        
-        # 第二阶段：基础风险评估
+        # 第一阶段：基础风险评估（成员特征库中有相同输入和模型版本的结果时直接读取）
         status_text.text("正在进行基础风险评估...")
-        progress_bar.progress(30)
-        basic_risk = classifier.classify_risk_level(
-            age=member_data.get('age', 35),
-            balance=member_data.get('balance', 0),
-            loan="yes" if member_data.get('loan', False) else "no",
-            housing="yes" if member_data.get('housing', False) else "no",
-            job=member_data.get('job', 'unknown'),
-            marital=member_data.get('marital', 'unknown'),
-            education=member_data.get('education', 'unknown')
-        )
+        existing = family_store.get_member(household_id, name)
+        basic_risk = member_store.score(classifier, [member_data], [member_key(household_id, name)])[0]
+        
+        # 保存到家庭档案（一次写入，保留原有的投资相关信息）
+        family_store.upsert_member(household_id, {
+            **member_data,
+            'risk_rule': basic_risk['rule_based'],
+            'risk_dt': basic_risk['decision_tree'],
+            'risk_rf': basic_risk['random_forest'],
+            'confidence': basic_risk['confidence']
+        })
         
         # 显示初步结果
         progress_bar.progress(50)
         status_text.text("基础评估完成，正在进行AI深度分析...")
         
-        # 第三阶段：AI深度分析
+        # 第二阶段：AI深度分析
         with st.expander("查看初步评估结果", expanded=True):
             col1, col2 = st.columns(2)
             with col1:
@@ -296,30 +944,20 @@ elif page == "风险评估":
                 risk_color = "🔴" if basic_risk['random_forest'] == "High" else "🟠" if basic_risk['random_forest'] == "Medium" else "🟢"
                 st.info(f"模型评估: {risk_color} {basic_risk['random_forest']}")
         
-        # 添加跳过选项
-        skip_ai = st.checkbox("跳过AI深度分析（加快处理速度）")
-        
         if skip_ai:
             # 如果用户选择跳过AI分析
             progress_bar.progress(100)
             status_text.text("分析完成！")
             risk = basic_risk
         else:
-            # 继续AI深度分析
-            progress_bar.progress(70)
+            # 继续AI深度分析（结果一致且远离分界时使用模板解释，不调用AI）
             status_text.text("AI正在进行深度风险分析...")
-            ai_risk_analysis = classifier.ai_assistant.analyze_investment_risk(member_data)
+            analysis = classifier.ai_risk_analysis(member_data, basic_risk, force=force_ai)
             progress_bar.progress(90)
             status_text.text("正在整合分析结果...")
             
             # 整合所有结果
-            risk = {
-                'rule_based': basic_risk['rule_based'],
-                'decision_tree': basic_risk['decision_tree'],
-                'random_forest': basic_risk['random_forest'],
-                'ai_analysis': ai_risk_analysis.get('risk_level', basic_risk['random_forest']),
-                'detailed_analysis': ai_risk_analysis.get('analysis', '')
-            }
+            risk = dict(basic_risk, **analysis)
             
             progress_bar.progress(100)
             status_text.text("分析完成！")
@@ -331,7 +969,8 @@ elif page == "风险评估":
         st.subheader(f"{name}的风险评估结果")
         
         # 使用列显示不同模型的结果
-        col1, col2, col3 = st.columns(3)
+        columns = st.columns(4 if 'gradient_boosting' in risk else 3)
+        col1, col2, col3 = columns[:3]
         
         with col1:
             risk_color = "🔴" if risk['rule_based'] == "High" else "🟠" if risk['rule_based'] == "Medium" else "🟢"
@@ -345,6 +984,11 @@ elif page == "风险评估":
             risk_color = "🔴" if risk['random_forest'] == "High" else "🟠" if risk['random_forest'] == "Medium" else "🟢"
             st.info(f"随机森林评估: {risk_color} {risk['random_forest']}")
         
+        if 'gradient_boosting' in risk:
+            with columns[3]:
+                risk_color = "🔴" if risk['gradient_boosting'] == "High" else "🟠" if risk['gradient_boosting'] == "Medium" else "🟢"
+                st.info(f"梯度提升评估: {risk_color} {risk['gradient_boosting']}")
+        
         # 风险解释
         st.subheader("风险解释")
         if final_risk == "High":
@@ -356,17 +1000,20 @@ elif page == "风险评估":
             
         # 显示AI分析结果
         if 'ai_analysis' in risk:
-            st.subheader("AI风险分析")
+            templated = risk.get('analysis_source') == 'template'
+            st.subheader("风险分析" if templated else "AI风险分析")
             
-            # 显示AI风险等级
+            # 显示AI风险等级（模板解释时为模型结果）
             ai_risk = risk['ai_analysis']
             risk_color = "🔴" if ai_risk == "High" else "🟠" if ai_risk == "Medium" else "🟢"
-            st.info(f"AI风险评估: {risk_color} {ai_risk}")
+            st.info(f"{'综合' if templated else 'AI'}风险评估: {risk_color} {ai_risk}")
             
             # 显示详细分析
             if 'detailed_analysis' in risk and risk['detailed_analysis']:
                 with st.expander("查看详细分析", expanded=True):
                     st.markdown(risk['detailed_analysis'])
+            if risk.get('analysis_source') == 'ai' and risk.get('gating_reasons'):
+                st.caption(f"调用AI分析的原因: {'；'.join(risk['gating_reasons'])}")
                     
         # 显示投资组合分析（如果有）
         if 'portfolio_analysis' in risk and risk['portfolio_analysis']:
@@ -374,46 +1021,9 @@ elif page == "风险评估":
             with st.expander("查看投资组合分析"):
                 st.markdown(risk['portfolio_analysis'].get('ai_analysis', '暂无投资组合分析'))
         
-        # 保存到会话状态
-        if 'family_members' not in st.session_state:
-            st.session_state.family_members = []
-        
-        # 检查是否已存在相同姓名的成员
-        existing_names = [member['name'] for member in st.session_state.family_members]
-        if name in existing_names:
-            # 更新现有成员
-            for i, member in enumerate(st.session_state.family_members):
-                if member['name'] == name:
-                    # 保留原有的投资相关信息（如果有的话）
-                    investment_portfolio = member.get('investment_portfolio', None)
-                    monthly_savings = member.get('monthly_savings', 0)
-                    investment_horizon = member.get('investment_horizon', None)
-                    investment_goal = member.get('investment_goal', None)
-                    
-                    st.session_state.family_members[i] = {
-                        'name': name,
-                        'age': age,
-                        'balance': balance,
-                        'risk_rule': risk['rule_based'],
-                        'risk_dt': risk['decision_tree'],
-                        'risk_rf': risk['random_forest'],
-                        'investment_portfolio': investment_portfolio,
-                        'monthly_savings': monthly_savings,
-                        'investment_horizon': investment_horizon,
-                        'investment_goal': investment_goal
-                    }
-                    st.success(f"已更新 {name} 的风险评估")
-                    break
+        if existing is not None:
+            st.success(f"已更新 {name} 的风险评估")
         else:
-            # 添加新成员
-            st.session_state.family_members.append({
-                'name': name,
-                'age': age,
-                'balance': balance,
-                'risk_rule': risk['rule_based'],
-                'risk_dt': risk['decision_tree'],
-                'risk_rf': risk['random_forest']
-            })
             st.success(f"已添加 {name} 到家庭成员列表")
             
         # 提示用户前往投资建议页面
@@ -424,15 +1034,19 @@ elif page == "投资建议":
     st.title("💰 投资建议")
     
     # 检查是否有家庭成员
-    if 'family_members' not in st.session_state or len(st.session_state.family_members) == 0:
+    family_members = family_store.members(household_id)
+    if len(family_members) == 0:
         st.warning("尚未添加任何家庭成员，请先在'风险评估'页面添加成员")
     else:
+        # 模型更新后只重新评估受影响的成员
+        refresh_member_risks(family_members)
+        
         # 选择家庭成员
-        members = [member['name'] for member in st.session_state.family_members]
+        members = [member['name'] for member in family_members]
         selected_member = st.selectbox("选择家庭成员", members)
         
-        # 获取选中成员信息
-        member = next((m for m in st.session_state.family_members if m['name'] == selected_member), None)
+        # 获取选中成员信息（按家庭和姓名的索引查询）
+        member = family_store.get_member(household_id, selected_member)
         
         if member:
             # 显示成员基本信息
@@ -469,7 +1083,7 @@ elif page == "投资建议":
                     )
                 
                 with col2:
-                    monthly_savings = st.number_input("每月可投资金额", min_value=0, value=member.get('monthly_savings', 1000))
+                    monthly_savings = st.number_input("每月可投资金额", min_value=0, value=int(member['monthly_savings']) if member.get('monthly_savings') is not None else 1000)
                     
                     risk_tolerance = st.slider(
                         "风险承受能力 (1-10)",
@@ -481,7 +1095,7 @@ elif page == "投资建议":
                 
                 submit = st.form_submit_button("获取投资建议")
             
-            if submit or 'investment_portfolio' in member:
+            if submit or member.get('investment_portfolio') is not None:
                 # 获取增强版投资建议
                 has_loans = member.get('housing', False) or member.get('loan', False)
                 
@@ -492,18 +1106,16 @@ elif page == "投资建议":
                     'risk_tolerance': risk_tolerance
                 }
                 
-                # 使用进度指示器替代spinner
+                # 使用进度指示器替代spinner，进度条在每个阶段实际完成后推进
                 progress_bar = st.progress(0)
                 status_text = st.empty()
                 
-                # 第一阶段：初始化
-                status_text.text("正在初始化投资建议生成...")
-                progress_bar.progress(10)
-                time.sleep(0.5)  # 短暂延迟以显示进度
+                def show_progress(progress, message):
+                    progress_bar.progress(int(progress * 100))
+                    status_text.text(message)
                 
-                # 第二阶段：基础投资建议
+                # 第一阶段：基础投资建议
                 status_text.text("正在生成基础投资建议...")
-                progress_bar.progress(30)
                 base_recommendation = investment_advisor.get_personalized_recommendation(
                     risk_level=risk_level,
                     age=member['age'],
@@ -515,7 +1127,7 @@ elif page == "投资建议":
                 progress_bar.progress(50)
                 status_text.text("基础建议生成完成，正在获取市场数据...")
                 
-                # 第三阶段：获取市场数据
+                # 第二阶段：获取市场数据
                 with st.expander("查看初步投资建议", expanded=True):
                     st.markdown(f"### {base_recommendation['name']}")
                     st.write(base_recommendation['description'][:200] + "...")
@@ -529,19 +1141,16 @@ elif page == "投资建议":
                     status_text.text("投资建议生成完成！")
                     investment_rec = base_recommendation
                 else:
-                    # 继续获取市场数据和AI建议
-                    progress_bar.progress(70)
+                    # 继续获取市场数据和AI建议（进度占 50%-100%）
                     status_text.text("正在获取市场数据和AI增强建议...")
                     investment_rec = investment_advisor.get_enhanced_recommendation(
                         risk_level=risk_level,
                         age=member['age'],
                         balance=member['balance'],
                         has_loans=has_loans,
-                        additional_data=additional_data
+                        additional_data=additional_data,
+                        progress_callback=lambda progress, message: show_progress(0.5 + 0.5 * progress, message)
                     )
-                    
-                    progress_bar.progress(100)
-                    status_text.text("投资建议生成完成！")
                 
                 # 显示投资建议
                 st.subheader("🔮 投资建议")
@@ -552,6 +1161,9 @@ elif page == "投资建议":
                 
                 # 投资产品分配
                 st.subheader("推荐投资产品配置")
+                if 'optimization' in investment_rec:
+                    optimization = investment_rec['optimization']
+                    st.caption(f"配置比例根据您的年龄、余额和贷款情况优化，组合预期年化收益 {optimization['expected_return']:.2%}，年化波动率 {optimization['volatility']:.2%}")
                 
                 # 直接使用Streamlit的原生图表功能，避免matplotlib中文问题
                 products = [p['name'] for p in investment_rec['products']]
@@ -585,23 +1197,9 @@ elif page == "投资建议":
                     '分配比例': allocations
                 })
                 
-                # 使用matplotlib创建饼图，确保使用中文字体
+                # 使用中文字体渲染饼图，相同数据的图表直接复用渲染缓存
                 st.write("### 投资产品配置比例")
-                fig, ax = plt.subplots()
-                # 确保使用中文字体 - 使用系统字体
-                try:
-                    # 尝试使用系统字体
-                    font_path = fm.findfont(fm.FontProperties(family=['SimHei', 'Microsoft YaHei']))
-                    prop = fm.FontProperties(fname=font_path)
-                    ax.pie(pie_data['分配比例'], labels=pie_data['产品'], autopct='%1.1f%%', startangle=90,
-                          textprops={'fontproperties': prop})
-                except Exception as e:
-                    st.warning(f"使用系统字体失败: {str(e)}，尝试使用默认字体")
-                    # 如果系统字体失败，使用默认字体
-                    ax.pie(pie_data['分配比例'], labels=pie_data['产品'], autopct='%1.1f%%', startangle=90)
-                
-                ax.axis('equal')  # 确保饼图是圆的
-                st.pyplot(fig)
+                st.image(render_pie_chart(pie_data['分配比例'], pie_data['产品']))
                 
                 
                 # 产品详情表格 - 使用中文标题
@@ -723,292 +1321,95 @@ elif page == "投资建议":
                         })
                     
                     st.table(pd.DataFrame(monthly_allocations))
+                    
+                    # 蒙特卡洛财富预测
+                    st.subheader("财富预测")
+                    projection = project_wealth(monthly_savings, investment_horizon)
+                    member_projection = projection.get(risk_level)
+                    if member_projection:
+                        bands = member_projection['bands']
+                        band_df = pd.DataFrame({
+                            '悲观情景(5%)': bands[5],
+                            '中位数': bands[50],
+                            '乐观情景(95%)': bands[95],
+                            '累计投入': member_projection['contributed']
+                        }, index=pd.Index(member_projection['months'], name='月份'))
+                        st.line_chart(band_df)
+                    
+                    # 各风险等级组合的期末财富对比
+                    risk_names = {'High': '高风险', 'Medium': '中风险', 'Low': '低风险'}
+                    st.table(pd.DataFrame([
+                        {
+                            '投资组合': risk_names.get(level, level),
+                            '预期年化收益': f"{result['expected_return']:.2%}",
+                            '年化波动率': f"{result['volatility']:.2%}",
+                            '期末财富中位数': f"¥{result['final']['median']:,.0f}",
+                            '悲观情景(5%)': f"¥{result['bands'][5][-1]:,.0f}",
+                            '乐观情景(95%)': f"¥{result['bands'][95][-1]:,.0f}",
+                            '亏损概率': f"{result['final']['probability_of_loss']:.1%}"
+                        }
+                        for level, result in projection.items()
+                    ]))
+                    total_contributed = next(iter(projection.values()))['final']['total_contributed']
+                    st.caption(f"基于100,000条蒙特卡洛模拟路径，累计投入¥{total_contributed:,.0f}，收益假设仅供参考。")
                 
-                # 更新会话状态中的成员信息
-                for i, m in enumerate(st.session_state.family_members):
-                    if m['name'] == selected_member:
-                        st.session_state.family_members[i].update({
-                            'investment_portfolio': investment_rec['name'],
-                            'monthly_savings': monthly_savings,
-                            'investment_horizon': investment_horizon,
-                            'investment_goal': investment_goal
-                        })
-                        if submit:
-                            st.success(f"已更新 {selected_member} 的投资建议")
-                        break
+                # 更新家庭档案中的成员信息
+                family_store.upsert_member(household_id, {
+                    'name': selected_member,
+                    'investment_portfolio': investment_rec['name'],
+                    'monthly_savings': monthly_savings,
+                    'investment_horizon': investment_horizon,
+                    'investment_goal': investment_goal
+                })
+                if submit:
+                    st.success(f"已更新 {selected_member} 的投资建议")
 
 # 家庭投资组合页面
 elif page == "家庭投资组合":
     st.title("👨‍👩‍👧‍👦 家庭投资组合")
     
-    if 'family_members' not in st.session_state or len(st.session_state.family_members) == 0:
-        st.warning("尚未添加任何家庭成员，请先在'风险评估'页面添加成员")
-    else:
-        # 显示家庭成员列表
-        st.subheader("家庭成员列表")
-        members_df = pd.DataFrame(st.session_state.family_members)
-        
-        # 选择要显示的列
-        display_columns = ['name', 'age', 'balance', 'risk_rf', 'investment_portfolio', 'monthly_savings', 'investment_horizon', 'investment_goal']
-        # 确保所有列都存在
-        for col in display_columns:
-            if col not in members_df.columns:
-                members_df[col] = "未设置"
-                
-        # 重命名列以便显示
-        column_rename = {
-            'name': '姓名',
-            'age': '年龄',
-            'balance': '账户余额',
-            'risk_rf': '风险等级',
-            'investment_portfolio': '投资组合',
-            'monthly_savings': '每月投资',
-            'investment_horizon': '投资期限',
-            'investment_goal': '投资目标'
-        }
-        
-        display_df = members_df[display_columns].rename(columns=column_rename)
-        st.dataframe(display_df, width=800)
-        
-        # 创建风险分布和投资组合分布图表
-        col1, col2 = st.columns(2)
-        
-        with col1:
-            st.subheader("家庭风险分布")
-            # 随机森林风险分布
-            risk_counts_rf = members_df['risk_rf'].value_counts()
-            
-            # 创建风险等级中文映射
-            risk_mapping = {
-                'High': '高风险',
-                'Medium': '中风险',
-                'Low': '低风险'
-            }
-            
-            # 转换为中文标签
-            risk_counts_zh = pd.Series(
-                risk_counts_rf.values,
-                index=[risk_mapping.get(idx, idx) for idx in risk_counts_rf.index]
-            )
-            
-            # 使用matplotlib创建饼图，确保使用中文字体
-            st.write("### 家庭风险分布")
-            fig, ax = plt.subplots()
-            # 确保使用中文字体 - 使用系统字体
+    # 批量导入导出（CSV的 household 列为家庭名称，没有该列或为空时导入到当前家庭）
+    with st.expander("批量导入/导出"):
+        uploaded = st.file_uploader("导入成员CSV", type=['csv'])
+        if uploaded is not None and st.button("导入"):
             try:
-                # 尝试使用系统字体
-                font_path = fm.findfont(fm.FontProperties(family=['SimHei', 'Microsoft YaHei']))
-                prop = fm.FontProperties(fname=font_path)
-                ax.pie(risk_counts_zh.values, labels=risk_counts_zh.index, autopct='%1.1f%%', startangle=90,
-                      textprops={'fontproperties': prop})
-            except Exception as e:
-                st.warning(f"使用系统字体失败: {str(e)}，尝试使用默认字体")
-                # 如果系统字体失败，使用默认字体
-                ax.pie(risk_counts_zh.values, labels=risk_counts_zh.index, autopct='%1.1f%%', startangle=90)
-            
-            ax.axis('equal')  # 确保饼图是圆的
-            st.pyplot(fig)
-        
-        with col2:
-            st.subheader("投资组合分布")
-            # 投资组合分布
-            if 'investment_portfolio' in members_df.columns:
-                portfolio_counts = members_df['investment_portfolio'].value_counts()
-                
-                # 使用matplotlib创建饼图，确保使用中文字体
-                st.write("### 投资组合分布")
-                fig, ax = plt.subplots()
-                # 确保使用中文字体 - 使用系统字体
-                try:
-                    # 尝试使用系统字体
-                    font_path = fm.findfont(fm.FontProperties(family=['SimHei', 'Microsoft YaHei']))
-                    prop = fm.FontProperties(fname=font_path)
-                    ax.pie(portfolio_counts.values, labels=portfolio_counts.index, autopct='%1.1f%%', startangle=90,
-                          textprops={'fontproperties': prop})
-                except Exception as e:
-                    st.warning(f"使用系统字体失败: {str(e)}，尝试使用默认字体")
-                    # 如果系统字体失败，使用默认字体
-                    ax.pie(portfolio_counts.values, labels=portfolio_counts.index, autopct='%1.1f%%', startangle=90)
-                
-                ax.axis('equal')  # 确保饼图是圆的
-                st.pyplot(fig)
-            else:
-                st.info("尚无投资组合数据")
-        
-        # 家庭投资总额和月度投资总额
-        st.subheader("家庭投资概览")
-        
-        col1, col2, col3 = st.columns(3)
-        
-        with col1:
-            total_balance = members_df['balance'].sum()
-            balance_color = "red" if total_balance < 0 else "orange" if total_balance < 5000 else "green"
-            st.metric("家庭总资产", f"¥{total_balance:,.2f}")
-        
-        with col2:
-            if 'monthly_savings' in members_df.columns:
-                monthly_investment = members_df['monthly_savings'].sum()
-                st.metric("每月总投资额", f"¥{monthly_investment:,.2f}")
+                result = family_store.import_csv(uploaded, default_household=family_store.get_household(household_id)['name'])
+            except (ValueError, sqlite3.Error) as e:
+                st.error(f"导入失败，没有导入任何成员: {e}")
             else:
-                st.metric("每月总投资额", "未设置")
-        
-        with col3:
-            # 计算年度投资收益预估（假设年化收益率5%）
-            if 'monthly_savings' in members_df.columns:
-                annual_investment = members_df['monthly_savings'].sum() * 12
-                estimated_return = annual_investment * 0.05
-                st.metric("预估年度投资收益", f"¥{estimated_return:,.2f}", 
-                         delta="5%", delta_color="normal",
-                         help="基于5%的年化收益率估算")
-            else:
-                st.metric("预估年度投资收益", "未设置")
-        
-        # 家庭投资建议
-        st.subheader("家庭投资建议")
-        
-        # 计算高风险成员比例
-        high_risk_count = len(members_df[members_df['risk_rf'] == 'High'])
-        high_risk_percent = high_risk_count / len(members_df) * 100
-        
-        # 计算家庭平均月度投资额
-        if 'monthly_savings' in members_df.columns:
-            avg_monthly_investment = members_df['monthly_savings'].mean()
-        else:
-            avg_monthly_investment = 0
-        
-        # 显示家庭投资建议
-        if high_risk_percent > 50:
-            st.error("⚠️ 家庭整体风险较高，建议降低高风险资产配置，增加稳健型投资比例。")
-            st.info("建议家庭投资组合配置：20%高风险资产，40%中风险资产，40%低风险资产")
-        elif high_risk_percent > 30:
-            st.warning("⚠️ 家庭存在一定风险，建议平衡投资组合。")
-            st.info("建议家庭投资组合配置：30%高风险资产，40%中风险资产，30%低风险资产")
-        else:
-            st.success("✅ 家庭整体风险较低，可以适当增加收益型资产比例。")
-            st.info("建议家庭投资组合配置：40%高风险资产，40%中风险资产，20%低风险资产")
-        
-        # 显示家庭投资组合建议图表
-        st.subheader("家庭整体投资组合建议")
-        
-        # 根据风险比例确定建议的资产配置
-        if high_risk_percent > 50:
-            portfolio_allocation = {'高风险资产': 20, '中风险资产': 40, '低风险资产': 40}
-        elif high_risk_percent > 30:
-            portfolio_allocation = {'高风险资产': 30, '中风险资产': 40, '低风险资产': 30}
-        else:
-            portfolio_allocation = {'高风险资产': 40, '中风险资产': 40, '低风险资产': 20}
-        
-        # 转换为DataFrame以便使用Streamlit原生饼图
-        allocation_df = pd.DataFrame({
-            '资产类型': list(portfolio_allocation.keys()),
-            '比例': list(portfolio_allocation.values())
-        })
-        
-        # 使用matplotlib创建饼图，确保使用中文字体
-        st.write("### 建议家庭资产配置")
-        fig, ax = plt.subplots()
-        # 确保使用中文字体 - 使用系统字体
-        try:
-            # 尝试使用系统字体
-            font_path = fm.findfont(fm.FontProperties(family=['SimHei', 'Microsoft YaHei']))
-            prop = fm.FontProperties(fname=font_path)
-            ax.pie(allocation_df['比例'], labels=allocation_df['资产类型'], autopct='%1.1f%%', startangle=90,
-                  textprops={'fontproperties': prop})
-        except Exception as e:
-            st.warning(f"使用系统字体失败: {str(e)}，尝试使用默认字体")
-            # 如果系统字体失败，使用默认字体
-            ax.pie(allocation_df['比例'], labels=allocation_df['资产类型'], autopct='%1.1f%%', startangle=90)
-        
-        ax.axis('equal')  # 确保饼图是圆的
-        st.pyplot(fig)
-        
-        # 家庭成员投资详情
-        st.subheader("家庭成员投资详情")
-        
-        # 按风险等级排序
-        risk_order = {'High': 0, 'Medium': 1, 'Low': 2}
-        sorted_members = sorted(st.session_state.family_members, 
-                               key=lambda x: (risk_order.get(x.get('risk_rf', 'Low'), 3), -x.get('age', 0)))
+                st.session_state.pop('family_export', None)
+                st.success(f"已导入 {result['imported']} 个成员")
+                if result['skipped']:
+                    st.warning(f"跳过 {len(result['skipped'])} 行: " + "；".join(
+                        f"第{skipped['row']}行{skipped['reason']}" for skipped in result['skipped'][:20]))
+        # 导出文件只在点击时生成，其他操作重新运行页面时不查询和编码全部成员
+        scope = st.radio("导出范围", ["当前家庭", "全部家庭"], horizontal=True)
+        export_key = (scope, household_id if scope == "当前家庭" else None)
+        if st.button("生成导出文件"):
+            export = family_store.export_members([household_id] if scope == "当前家庭" else None)
+            st.session_state.family_export = (export_key, export.to_csv(index=False).encode('utf-8-sig'))
+        exported = st.session_state.get('family_export')
+        if exported is not None and exported[0] == export_key:
+            st.download_button("下载成员CSV", exported[1], file_name="family_members.csv", mime="text/csv")
+    
+    family_members = family_store.members(household_id)
+    if len(family_members) == 0:
+        st.warning("尚未添加任何家庭成员，请先在'风险评估'页面添加成员")
+    else:
+        # 模型更新后只重新评估受影响的成员
+        refresh_member_risks(family_members)
         
-        # 显示每个成员的投资详情
-        for i, member in enumerate(sorted_members):
-            with st.expander(f"{member['name']} ({member['age']}岁) - {member.get('investment_portfolio', '未设置投资组合')}"):
-                col1, col2 = st.columns(2)
-                
-                with col1:
-                    st.write("#### 基本信息")
-                    st.write(f"**账户余额:** ¥{member['balance']:,.2f}")
-                    risk_color = "red" if member['risk_rf'] == "High" else "orange" if member['risk_rf'] == "Medium" else "green"
-                    st.write(f"**风险等级:** <span style='color:{risk_color}'>{member['risk_rf']}</span>", unsafe_allow_html=True)
-                    
-                    if 'monthly_savings' in member:
-                        st.write(f"**每月投资:** ¥{member['monthly_savings']:,.2f}")
-                    if 'investment_horizon' in member:
-                        st.write(f"**投资期限:** {member['investment_horizon']}")
-                    if 'investment_goal' in member:
-                        st.write(f"**投资目标:** {member['investment_goal']}")
-                
-                with col2:
-                    st.write("#### 投资建议")
-                    # 获取该成员的投资建议
-                    if 'risk_rf' in member:
-                        investment_rec = investment_advisor.get_investment_recommendation(member['risk_rf'])
-                        
-                        # 显示投资产品分配
-                        products = [p['name'] for p in investment_rec['products']]
-                        allocations = [p['allocation'] for p in investment_rec['products']]
-                        
-                        
-                        # 创建投资产品映射
-                        product_mapping = {
-                            'Stocks': '股票',
-                            'Bonds': '债券',
-                            'Cash': '现金',
-                            'Real Estate': '房地产',
-                            'Commodities': '大宗商品',
-                            'Cryptocurrencies': '加密货币',
-                            'ETFs': 'ETF基金',
-                            'Mutual Funds': '共同基金',
-                            'CDs': '定期存款',
-                            'Treasury Bills': '国债',
-                            'High-Yield Bonds': '高收益债券',
-                            'Growth Stocks': '成长股',
-                            'Value Stocks': '价值股',
-                            'Index Funds': '指数基金',
-                            'Money Market': '货币市场'
-                        }
-                        
-                        # 转换为中文标签
-                        products_zh = [product_mapping.get(p, p) for p in products]
-                        
-                        # 创建DataFrame
-                        product_df = pd.DataFrame({
-                            '产品': products_zh,
-                            '比例': allocations
-                        })
-                        
-                        # 使用matplotlib创建饼图，确保使用中文字体
-                        st.write("### 建议投资配置")
-                        fig, ax = plt.subplots()
-                        # 确保使用中文字体 - 使用系统字体
-                        try:
-                            # 尝试使用系统字体
-                            font_path = fm.findfont(fm.FontProperties(family=['SimHei', 'Microsoft YaHei']))
-                            prop = fm.FontProperties(fname=font_path)
-                            ax.pie(product_df['比例'], labels=product_df['产品'], autopct='%1.1f%%', startangle=90,
-                                  textprops={'fontproperties': prop})
-                        except Exception as e:
-                            st.warning(f"使用系统字体失败: {str(e)}，尝试使用默认字体")
-                            # 如果系统字体失败，使用默认字体
-                            ax.pie(product_df['比例'], labels=product_df['产品'], autopct='%1.1f%%', startangle=90)
-                        
-                        ax.axis('equal')  # 确保饼图是圆的
-                        st.pyplot(fig)
+        # 概览和成员详情是独立的片段，操作其中一个只重新运行该部分
+        family_overview_panel(family_members)
+        family_member_details_panel(family_members)
         
         # 添加清除按钮
         if st.button("清除所有家庭成员"):
-            st.session_state.family_members = []
+            family_store.delete_members(household_id)
+            st.session_state.pop('family_export', None)
             st.success("已清除所有家庭成员数据")
+            if page_profile is not None:
+                page_profile.stop()
             st.rerun()
 
 # AI投资助手页面
@@ -1053,8 +1454,6 @@ elif page == "AI投资助手":
             # 处理每个任务并显示进度
             task_results = []
             for i, task in enumerate(tasks):
-                progress_percent = int((i / len(tasks)) * 80)  # 前80%用于任务处理
-                progress_bar.progress(progress_percent)
                 progress_text.text(f"正在处理: {task}")
                 
                 # 执行任务
@@ -1063,10 +1462,11 @@ elif page == "AI投资助手":
                     "task": task,
                     "result": result_task
                 })
-                time.sleep(0.5)  # 短暂延迟以显示进度
+                
+                # 任务完成后推进进度，前80%用于任务处理
+                progress_bar.progress(int(((i + 1) / len(tasks)) * 80))
             
             # 生成最终回复
-            progress_bar.progress(90)
             progress_text.text("正在生成最终回复...")
             
             # 构建完整结果
@@ -1147,358 +1547,14 @@ elif page == "AI投资助手":
 elif page == "市场数据":
     st.title("📊 市场数据")
     
-    # 初始化金融数据提供者
-    financial_data = FinancialDataProvider(api_key=FINANCIAL_API_KEY)
-    
-    # 股票查询部分
-    st.subheader("股票数据查询")
-    
-    col1, col2 = st.columns(2)
-    
-    with col1:
-        ticker = st.text_input("股票代码", "AAPL")
-    
-    with col2:
-        data_type = st.selectbox(
-            "数据类型",
-            options=["股票价格", "财务报表", "财务指标", "公司新闻"],
-            index=0
-        )
-    
-    if st.button("获取数据", type="primary"):
-        with st.spinner(f"正在获取 {ticker} 的{data_type}..."):
-            try:
-                if data_type == "股票价格":
-                    # 获取股票价格
-                    end_date = pd.Timestamp.now().strftime('%Y-%m-%d')
-                    start_date = (pd.Timestamp.now() - pd.Timedelta(days=365)).strftime('%Y-%m-%d')
-                    
-                    # 确保日期参数有效
-                    if not start_date or not end_date:
-                        import datetime
-                        end_date = datetime.datetime.now().strftime('%Y-%m-%d')
-                        start_date = (datetime.datetime.now() - datetime.timedelta(days=365)).strftime('%Y-%m-%d')
-                    
-                    stock_data = financial_data.get_stock_prices(
-                        ticker=ticker,
-                        start_date=start_date,
-                        end_date=end_date,
-                        interval="day",
-                        interval_multiplier=1
-                    )
-                    
-                    if 'error' in stock_data:
-                        st.error(f"获取股票数据失败: {stock_data['error']}")
-                    else:
-                        # 显示股票快照数据
-                        snapshot = financial_data.get_stock_snapshot(ticker)
-                        if 'error' not in snapshot:
-                            st.subheader(f"{ticker} 当前数据")
-                            col1, col2, col3 = st.columns(3)
-                            
-                            with col1:
-                                current_price = snapshot.get('price', 'N/A')
-                                st.metric("当前价格", f"${current_price}")
-                            
-                            with col2:
-                                change = snapshot.get('change', 'N/A')
-                                change_percent = snapshot.get('change_percent', 'N/A')
-                                # 确保change是数值类型才进行比较
-                                delta_color = "normal" if isinstance(change, (int, float)) and change >= 0 else "inverse"
-                                st.metric("价格变动", f"${change}", f"{change_percent}%", delta_color=delta_color)
-                            
-                            with col3:
-                                market_cap = snapshot.get('market_cap', 'N/A')
-                                if isinstance(market_cap, (int, float)) and market_cap > 1000000000:
-                                    market_cap = f"${market_cap/1000000000:.2f}B"
-                                st.metric("市值", market_cap)
-                        
-                        # 显示历史价格图表
-                        if 'results' in stock_data.get('historical', {}):
-                            st.subheader(f"{ticker} 历史价格")
-                            
-                            # 转换为DataFrame
-                            prices_df = pd.DataFrame(stock_data['historical']['results'])
-                            prices_df['date'] = pd.to_datetime(prices_df['date'])
-                            prices_df = prices_df.sort_values('date')
-                            prices_df = prices_df.set_index('date')
-                            
-                            # 显示价格图表
-                            st.line_chart(prices_df['close'])
-                            
-                            # 显示交易量图表
-                            st.subheader("交易量")
-                            st.bar_chart(prices_df['volume'])
-                            
-                            # 显示数据表格
-                            st.subheader("价格数据")
-                            st.dataframe(prices_df[['open', 'high', 'low', 'close', 'volume']])
-                
-                elif data_type == "财务报表":
-                    # 创建选项卡
-                    tab1, tab2, tab3 = st.tabs(["损益表", "资产负债表", "现金流量表"])
-                    
-                    with tab1:
-                        st.subheader(f"{ticker} 损益表")
-                        income_data = financial_data.get_financial_statements(ticker, statement_type="income")
-                        if 'error' in income_data:
-                            st.error(f"获取损益表失败: {income_data['error']}")
-                        else:
-                            if 'results' in income_data:
-                                income_df = pd.DataFrame(income_data['results'])
-                                if not income_df.empty:
-                                    st.dataframe(income_df)
-                                else:
-                                    st.info("没有找到损益表数据")
-                    
-                    with tab2:
-                        st.subheader(f"{ticker} 资产负债表")
-                        balance_data = financial_data.get_financial_statements(ticker, statement_type="balance")
-                        if 'error' in balance_data:
-                            st.error(f"获取资产负债表失败: {balance_data['error']}")
-                        else:
-                            if 'results' in balance_data:
-                                balance_df = pd.DataFrame(balance_data['results'])
-                                if not balance_df.empty:
-                                    st.dataframe(balance_df)
-                                else:
-                                    st.info("没有找到资产负债表数据")
-                    
-                    with tab3:
-                        st.subheader(f"{ticker} 现金流量表")
-                        cashflow_data = financial_data.get_financial_statements(ticker, statement_type="cashflow")
-                        if 'error' in cashflow_data:
-                            st.error(f"获取现金流量表失败: {cashflow_data['error']}")
-                        else:
-                            if 'results' in cashflow_data:
-                                cashflow_df = pd.DataFrame(cashflow_data['results'])
-                                if not cashflow_df.empty:
-                                    st.dataframe(cashflow_df)
-                                else:
-                                    st.info("没有找到现金流量表数据")
-                
-                elif data_type == "财务指标":
-                    # 获取财务指标
-                    metrics_data = financial_data.get_financial_metrics(ticker)
-                    if 'error' in metrics_data:
-                        st.error(f"获取财务指标失败: {metrics_data['error']}")
-                    else:
-                        st.subheader(f"{ticker} 财务指标")
-                        if 'results' in metrics_data:
-                            metrics_df = pd.DataFrame(metrics_data['results'])
-                            if not metrics_df.empty:
-                                # 显示关键指标
-                                st.subheader("关键财务指标")
-                                col1, col2, col3 = st.columns(3)
-                                
-                                # 获取最新的财务指标
-                                latest_metrics = metrics_df.iloc[0] if not metrics_df.empty else {}
-                                
-                                with col1:
-                                    pe_ratio = latest_metrics.get('pe_ratio', 'N/A')
-                                    st.metric("市盈率 (P/E)", pe_ratio)
-                                
-                                with col2:
-                                    pb_ratio = latest_metrics.get('pb_ratio', 'N/A')
-                                    st.metric("市净率 (P/B)", pb_ratio)
-                                
-                                with col3:
-                                    roe = latest_metrics.get('roe', 'N/A')
-                                    if isinstance(roe, (int, float)):
-                                        roe = f"{roe:.2%}"
-                                    st.metric("股本回报率 (ROE)", roe)
-                                
-                                # 显示完整数据表格
-                                st.subheader("完整财务指标")
-                                st.dataframe(metrics_df)
-                            else:
-                                st.info("没有找到财务指标数据")
-                
-                elif data_type == "公司新闻":
-                    # 获取公司新闻
-                    news_data = financial_data.get_news(ticker)
-                    if 'error' in news_data:
-                        st.error(f"获取公司新闻失败: {news_data['error']}")
-                    else:
-                        st.subheader(f"{ticker} 相关新闻")
-                        if 'results' in news_data:
-                            for news in news_data['results']:
-                                with st.container():
-                                    st.markdown(f"### [{news.get('title', 'No Title')}]({news.get('url', '#')})")
-                                    st.markdown(f"**来源**: {news.get('source', 'Unknown')} | **日期**: {news.get('date', 'Unknown')}")
-                                    st.markdown(news.get('summary', 'No summary available'))
-                                    st.divider()
-            
-            except Exception as e:
-                st.error(f"处理数据时出错: {str(e)}")
-    
-    # 市场概览部分
-    st.subheader("市场概览")
-    
-    if st.button("加载市场数据"):
-        with st.spinner("正在获取市场数据..."):
-            try:
-                # 获取宏观经济数据（免费API）
-                macro_data = financial_data.get_macro_data("interest_rates", limit=5)
-                
-                # 显示宏观经济指标
-                st.subheader("宏观经济指标")
-                
-                if 'error' not in macro_data and 'results' in macro_data:
-                    # 显示利率数据
-                    st.write("### 利率数据")
-                    
-                    # 转换为DataFrame以便显示
-                    try:
-                        rates_df = pd.DataFrame(macro_data['results'])
-                        if not rates_df.empty:
-                            # 格式化日期和数值
-                            if 'date' in rates_df.columns:
-                                rates_df['date'] = pd.to_datetime(rates_df['date']).dt.strftime('%Y-%m-%d')
-                            
-                            # 显示表格
-                            st.dataframe(rates_df)
-                            
-                            # 如果有足够的数据，显示图表
-                            if len(rates_df) > 1 and 'value' in rates_df.columns and 'date' in rates_df.columns:
-                                rates_df['value'] = pd.to_numeric(rates_df['value'], errors='coerce')
-                                rates_df = rates_df.sort_values('date')
-                                
-                                st.subheader("利率趋势")
-                                st.line_chart(rates_df.set_index('date')['value'])
-                        else:
-                            st.info("暂无利率数据")
-                    except Exception as e:
-                        st.error(f"处理利率数据时出错: {str(e)}")
-                else:
-                    st.info("暂无宏观经济数据，请稍后再试")
-                
-                # 获取通胀数据
-                inflation_data = financial_data.get_macro_data("inflation", limit=5)
-                
-                if 'error' not in inflation_data and 'results' in inflation_data:
-                    # 显示通胀数据
-                    st.write("### 通胀数据")
-                    
-                    # 转换为DataFrame以便显示
-                    try:
-                        inflation_df = pd.DataFrame(inflation_data['results'])
-                        if not inflation_df.empty:
-                            # 格式化日期和数值
-                            if 'date' in inflation_df.columns:
-                                inflation_df['date'] = pd.to_datetime(inflation_df['date']).dt.strftime('%Y-%m-%d')
-                            
-                            # 显示表格
-                            st.dataframe(inflation_df)
-                            
-                            # 如果有足够的数据，显示图表
-                            if len(inflation_df) > 1 and 'value' in inflation_df.columns and 'date' in inflation_df.columns:
-                                inflation_df['value'] = pd.to_numeric(inflation_df['value'], errors='coerce')
-                                inflation_df = inflation_df.sort_values('date')
-                                
-                                st.subheader("通胀趋势")
-                                st.line_chart(inflation_df.set_index('date')['value'])
-                        else:
-                            st.info("暂无通胀数据")
-                    except Exception as e:
-                        st.error(f"处理通胀数据时出错: {str(e)}")
-                
-                # 获取GDP数据
-                gdp_data = financial_data.get_macro_data("gdp", limit=5)
-                
-                if 'error' not in gdp_data and 'results' in gdp_data:
-                    # 显示GDP数据
-                    st.write("### GDP数据")
-                    
-                    # 转换为DataFrame以便显示
-                    try:
-                        gdp_df = pd.DataFrame(gdp_data['results'])
-                        if not gdp_df.empty:
-                            # 格式化日期和数值
-                            if 'date' in gdp_df.columns:
-                                gdp_df['date'] = pd.to_datetime(gdp_df['date']).dt.strftime('%Y-%m-%d')
-                            
-                            # 显示表格
-                            st.dataframe(gdp_df)
-                            
-                            # 如果有足够的数据，显示图表
-                            if len(gdp_df) > 1 and 'value' in gdp_df.columns and 'date' in gdp_df.columns:
-                                gdp_df['value'] = pd.to_numeric(gdp_df['value'], errors='coerce')
-                                gdp_df = gdp_df.sort_values('date')
-                                
-                                st.subheader("GDP趋势")
-                                st.line_chart(gdp_df.set_index('date')['value'])
-                        else:
-                            st.info("暂无GDP数据")
-                    except Exception as e:
-                        st.error(f"处理GDP数据时出错: {str(e)}")
-                else:
-                    st.info("暂无GDP数据，请稍后再试")
-                
-                # 获取热门股票公司概况数据（免费API）
-                popular_stocks = ['AAPL', 'MSFT', 'GOOGL', 'AMZN', 'TSLA']
-                company_data = {}
-                
-                for stock in popular_stocks:
-                    try:
-                        profile = financial_data.get_company_profile(stock)
-                        if 'error' not in profile:
-                            company_data[stock] = profile
-                        else:
-                            print(f"获取{stock}公司概况失败: {profile.get('error', '未知错误')}")
-                    except Exception as e:
-                        print(f"获取{stock}公司概况异常: {str(e)}")
-                
-                # 显示热门公司概况
-                st.subheader("热门公司概况")
-                
-                # 创建列，但只为有数据的股票创建
-                available_stocks = [stock for stock in popular_stocks if stock in company_data]
-                if available_stocks:
-                    for stock in available_stocks:
-                        with st.expander(f"{stock} - 公司概况", expanded=False):
-                            data = company_data[stock]
-                            
-                            if 'results' in data and data['results']:
-                                profile = data['results'][0] if isinstance(data['results'], list) else data['results']
-                                
-                                col1, col2 = st.columns(2)
-                                
-                                with col1:
-                                    st.write(f"**公司名称:** {profile.get('name', 'N/A')}")
-                                    st.write(f"**股票代码:** {profile.get('ticker', 'N/A')}")
-                                    st.write(f"**行业:** {profile.get('industry', 'N/A')}")
-                                    st.write(f"**部门:** {profile.get('sector', 'N/A')}")
-                                
-                                with col2:
-                                    st.write(f"**市值:** {profile.get('market_cap', 'N/A')}")
-                                    st.write(f"**员工数:** {profile.get('employees', 'N/A')}")
-                                    st.write(f"**国家:** {profile.get('country', 'N/A')}")
-                                    st.write(f"**交易所:** {profile.get('exchange', 'N/A')}")
-                                
-                                st.write("**公司描述:**")
-                                st.write(profile.get('description', 'N/A'))
-                            else:
-                                st.info(f"暂无{stock}的公司概况数据")
-                    
-                    # 获取收益数据
-                    st.subheader("最新收益报告")
-                    
-                    for stock in available_stocks:
-                        try:
-                            earnings = financial_data.get_earnings(stock, limit=3)
-                            if 'error' not in earnings and 'results' in earnings and earnings['results']:
-                                with st.expander(f"{stock} - 收益报告", expanded=False):
-                                    # 转换为DataFrame
-                                    earnings_df = pd.DataFrame(earnings['results'])
-                                    if not earnings_df.empty:
-                                        st.dataframe(earnings_df)
-                                    else:
-                                        st.info(f"暂无{stock}的收益数据")
-                        except Exception as e:
-                            st.error(f"获取{stock}收益数据异常: {str(e)}")
-                else:
-                    st.info("暂时无法获取公司数据，请稍后再试。")
-            
-            except Exception as e:
-                st.error(f"获取市场数据时出错: {str(e)}")
\ No newline at end of file
+    # 股票查询和市场概览是独立的片段，操作其中一个只重新运行该部分
+    stock_query_panel()
+    market_overview_panel()
+
+page_timer.stop()
+if page_profile is not None:
+    st.sidebar.caption(f"性能剖析已保存: {page_profile.stop()}")
+
+if instrumentation.is_enabled():
+    with st.sidebar.expander("⏱️ 耗时统计"):
+        st.code(instrumentation.report())
@@ -0,0 +1,121 @@
+import io
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Optional, Sequence, Tuple
+
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+import matplotlib.font_manager as fm
+
+from metrics import CACHE_REQUESTS
+
+# 饼图标签优先使用的中文字体
+CHART_FONT_FAMILIES = ('SimHei', 'Microsoft YaHei')
+
+
+@lru_cache(maxsize=16)
+def resolve_font_path(families: Tuple[str, ...] = CHART_FONT_FAMILIES) -> Optional[str]:
+    """查找字体文件路径，结果在进程内缓存；查找失败时返回None（使用默认字体）"""
+    try:
+        return fm.findfont(fm.FontProperties(family=list(families)))
+    except Exception as e:
+        print(f"查找字体失败: {e}")
+        return None
+
+
+@lru_cache(maxsize=16)
+def _font_properties(font_path: Optional[str]) -> Optional[fm.FontProperties]:
+    return fm.FontProperties(fname=font_path) if font_path else None
+
+
+class ChartCache:
+    """
+    图表渲染缓存
+
+    以图表数据、字体和输出格式为键缓存渲染好的图片字节，超过容量时淘汰最久未使用的图表。
+    相同的图表在重新运行和不同用户之间直接返回缓存的字节，不再经过matplotlib。
+    """
+
+    def __init__(self, max_entries: int = 256, dpi: int = 150):
+        """
+        参数:
+        - max_entries: 最多缓存的图表数量
+        - dpi: 渲染分辨率
+        """
+        self.max_entries = max_entries
+        self.dpi = dpi
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[tuple, bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def pie(self, values: Sequence[float], labels: Sequence[str],
+            font_families: Tuple[str, ...] = CHART_FONT_FAMILIES, fmt: str = 'png') -> bytes:
+        """
+        渲染饼图（带百分比标签）
+
+        参数:
+        - values: 各部分的数值
+        - labels: 各部分的标签
+        - font_families: 标签字体
+        - fmt: 输出格式，'png' 或 'svg'
+
+        返回:
+        - 图片字节
+        """
+        font_path = resolve_font_path(tuple(font_families))
+        key = ('pie', tuple(float(v) for v in values), tuple(str(l) for l in labels), font_path, fmt, self.dpi)
+
+        with self._lock:
+            image = self._entries.get(key)
+            if image is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                CACHE_REQUESTS.inc(cache='chart', result='hit')
+                return image
+            self.misses += 1
+        CACHE_REQUESTS.inc(cache='chart', result='miss')
+
+        image = self._render_pie(key[1], key[2], font_path, fmt)
+
+        with self._lock:
+            self._entries[key] = image
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return image
+
+    def _render_pie(self, values, labels, font_path, fmt) -> bytes:
+        # 直接使用Figure而不是pyplot，避免全局状态，渲染后即可释放
+        fig = Figure()
+        FigureCanvasAgg(fig)
+        ax = fig.add_subplot()
+        prop = _font_properties(font_path)
+        textprops = {'fontproperties': prop} if prop is not None else None
+        ax.pie(values, labels=labels, autopct='%1.1f%%', startangle=90, textprops=textprops)
+        ax.axis('equal')  # 确保饼图是圆的
+
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format=fmt, dpi=self.dpi, bbox_inches='tight')
+        return buffer.getvalue()
+
+    def clear(self) -> None:
+        """清空缓存"""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+# 进程内共享的图表缓存
+_CHART_CACHE = ChartCache()
+
+
+def render_pie_chart(values: Sequence[float], labels: Sequence[str],
+                     font_families: Tuple[str, ...] = CHART_FONT_FAMILIES, fmt: str = 'png') -> bytes:
+    """使用共享缓存渲染饼图，返回图片字节"""
+    return _CHART_CACHE.pie(values, labels, font_families, fmt)
@@ -0,0 +1,141 @@
+import os
+import json
+import hashlib
+import pandas as pd
+from typing import Dict, Optional
+
+# 数据集与列式缓存的默认位置
+DATASET_PATH = os.path.join(os.path.dirname(__file__), 'Dataset', 'bank.csv')
+DATASET_CACHE_DIR = os.path.join(os.path.dirname(__file__), 'cache', 'datasets')
+
+# bank.csv 的列类型：分类列使用category，数值列使用紧凑的整数类型
+BANK_DTYPES = {
+    'age': 'int16',
+    'job': 'category',
+    'marital': 'category',
+    'education': 'category',
+    'default': 'category',
+    'balance': 'int32',
+    'housing': 'category',
+    'loan': 'category',
+    'contact': 'category',
+    'day': 'int8',
+    'month': 'category',
+    'duration': 'int32',
+    'campaign': 'int16',
+    'pdays': 'int16',
+    'previous': 'int16',
+    'poutcome': 'category',
+    'deposit': 'category'
+}
+
+
+def file_sha256(path: str, chunk_size: int = 1 << 20) -> str:
+    """计算文件的SHA-256哈希"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def parse_bank_csv(path: str = DATASET_PATH, dtypes: Optional[Dict[str, str]] = None) -> pd.DataFrame:
+    """
+    按预定义的列类型解析数据集CSV
+
+    参数:
+    - path: CSV文件路径
+    - dtypes: 列类型映射，默认使用 BANK_DTYPES
+
+    返回:
+    - 带类型的 DataFrame
+    """
+    dtypes = BANK_DTYPES if dtypes is None else dtypes
+    header = pd.read_csv(path, sep=',', nrows=0).columns
+    return pd.read_csv(path, sep=',', dtype={col: dtype for col, dtype in dtypes.items() if col in header})
+
+
+def _feather_available() -> bool:
+    try:
+        import pyarrow  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def load_dataset(path: str = DATASET_PATH,
+                 cache_dir: str = DATASET_CACHE_DIR,
+                 use_cache: bool = True) -> pd.DataFrame:
+    """
+    加载数据集，首次解析后写入Feather列式缓存，之后直接读取缓存
+
+    缓存以文件的修改时间和大小快速校验；修改时间变化时再比较内容哈希，
+    内容未变只更新元数据，内容变化才重新解析CSV。未安装pyarrow时直接解析CSV。
+
+    参数:
+    - path: CSV文件路径
+    - cache_dir: 缓存目录
+    - use_cache: 是否使用缓存
+
+    返回:
+    - 带类型的 DataFrame
+    """
+    if not use_cache or not _feather_available():
+        return parse_bank_csv(path)
+
+    name = os.path.splitext(os.path.basename(path))[0]
+    meta_path = os.path.join(cache_dir, f"{name}.json")
+    stat = os.stat(path)
+
+    meta = None
+    if os.path.exists(meta_path):
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            meta = None
+
+    if meta and os.path.exists(os.path.join(cache_dir, meta['cache_file'])):
+        cache_path = os.path.join(cache_dir, meta['cache_file'])
+        if meta['mtime_ns'] == stat.st_mtime_ns and meta['size'] == stat.st_size:
+            return pd.read_feather(cache_path)
+
+        # 修改时间变化但内容未变（例如重新复制了同一个文件）
+        sha256 = file_sha256(path)
+        if meta['sha256'] == sha256:
+            meta.update({'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size})
+            _write_json(meta_path, meta)
+            return pd.read_feather(cache_path)
+    else:
+        sha256 = file_sha256(path)
+
+    data = parse_bank_csv(path)
+
+    os.makedirs(cache_dir, exist_ok=True)
+    cache_file = f"{name}-{sha256[:16]}.feather"
+    tmp_path = os.path.join(cache_dir, f".{cache_file}.tmp")
+    data.to_feather(tmp_path)
+    os.replace(tmp_path, os.path.join(cache_dir, cache_file))
+
+    # 清理旧版本的缓存文件
+    if meta and meta.get('cache_file') != cache_file:
+        old_path = os.path.join(cache_dir, meta['cache_file'])
+        if os.path.exists(old_path):
+            os.remove(old_path)
+
+    _write_json(meta_path, {
+        'source': os.path.abspath(path),
+        'mtime_ns': stat.st_mtime_ns,
+        'size': stat.st_size,
+        'sha256': sha256,
+        'cache_file': cache_file
+    })
+    return data
+
+
+def _write_json(path: str, payload: Dict) -> None:
+    """原子地写入JSON文件"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(payload, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
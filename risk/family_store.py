@@ -0,0 +1,373 @@
+import os
+import time
+import argparse
+from typing import Dict, Any, List, Optional, Iterable, Sequence, Union
+
+import pandas as pd
+
+from member_store import SQLiteStore
+
+# 家庭档案库的默认路径
+FAMILY_STORE_PATH = os.path.join(os.path.dirname(__file__), 'cache', 'family_store.sqlite')
+
+# 成员字段（members表中除主键、家庭和更新时间以外的列），与会话中的成员字典一致
+MEMBER_FIELDS = [
+    'name', 'age', 'balance', 'loan', 'housing', 'job', 'marital', 'education',
+    'risk_rule', 'risk_dt', 'risk_rf', 'confidence',
+    'investment_portfolio', 'monthly_savings', 'investment_horizon', 'investment_goal'
+]
+
+# 以整数保存的布尔字段
+_BOOLEAN_FIELDS = ('loan', 'housing')
+
+# 布尔字段表示“是”的字符串（原始数据集为 yes/no，导出的CSV为 True/False）
+_TRUE_STRINGS = ('yes', 'true', '1')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS households (
+    household_id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS members (
+    member_id INTEGER PRIMARY KEY,
+    household_id INTEGER NOT NULL REFERENCES households(household_id) ON DELETE CASCADE,
+    name TEXT NOT NULL,
+    age INTEGER,
+    balance REAL,
+    loan INTEGER,
+    housing INTEGER,
+    job TEXT,
+    marital TEXT,
+    education TEXT,
+    risk_rule TEXT,
+    risk_dt TEXT,
+    risk_rf TEXT,
+    confidence REAL,
+    investment_portfolio TEXT,
+    monthly_savings REAL,
+    investment_horizon TEXT,
+    investment_goal TEXT,
+    updated_at REAL NOT NULL,
+    UNIQUE (household_id, name)
+);
+CREATE INDEX IF NOT EXISTS idx_members_name ON members (name);
+CREATE INDEX IF NOT EXISTS idx_members_risk ON members (risk_rf, household_id);
+"""
+
+_MEMBER_COLUMN_NAMES = ['member_id', 'household_id'] + MEMBER_FIELDS
+_MEMBER_COLUMNS = ', '.join(_MEMBER_COLUMN_NAMES)
+
+
+def member_key(household_id: int, name: str) -> str:
+    """成员在成员特征库（MemberStore）中的键，与 members 表的 (household_id, name) 唯一约束对应"""
+    return f"{household_id}/{name}"
+
+
+def _prefix_range(prefix: str) -> tuple:
+    """前缀查询转换为可以使用索引的范围条件参数"""
+    return prefix, prefix + '\U0010ffff'
+
+
+def _blank(value: Any) -> bool:
+    """空值、NaN和空白字符串"""
+    return value is None or (isinstance(value, float) and value != value) or (isinstance(value, str) and not value.strip())
+
+
+def _to_db(field: str, value: Any) -> Any:
+    if value is None or (isinstance(value, float) and value != value):
+        return None
+    if field in _BOOLEAN_FIELDS:
+        return int(value.strip().lower() in _TRUE_STRINGS if isinstance(value, str) else bool(value))
+    return value.item() if hasattr(value, 'item') else value
+
+
+class FamilyStore(SQLiteStore):
+    """
+    家庭档案库
+
+    households 表保存家庭，members 表保存成员（按 member_id 标识，同一家庭内成员姓名唯一），
+    按家庭、姓名和风险等级的查询都走索引，数千个家庭的顾问名册也可以即时加载和筛选。
+    支持从CSV/DataFrame批量导入（一个事务）和导出。
+    删除成员或家庭时，同时删除成员特征库中按 member_key 保存的评估结果。
+    """
+
+    SCHEMA = _SCHEMA
+
+    def __init__(self, path: Optional[str] = None, member_store=None):
+        """
+        参数:
+        - path: SQLite文件路径，默认为 FAMILY_STORE_PATH；':memory:' 表示只在内存中保存
+        - member_store: 成员特征库（MemberStore），删除成员时级联删除其中的记录
+        """
+        super().__init__(path or FAMILY_STORE_PATH)
+        self.member_store = member_store
+
+    @staticmethod
+    def _member(row: Sequence[Any]) -> Dict[str, Any]:
+        member = dict(zip(_MEMBER_COLUMN_NAMES, row))
+        for field in _BOOLEAN_FIELDS:
+            if member[field] is not None:
+                member[field] = bool(member[field])
+        return member
+
+    # ---- 家庭 ----
+
+    def create_household(self, name: str) -> int:
+        """创建家庭，同名家庭已存在时返回其ID"""
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("INSERT OR IGNORE INTO households (name, created_at, updated_at) VALUES (?, ?, ?)",
+                         (name, now, now))
+            return conn.execute("SELECT household_id FROM households WHERE name = ?", (name,)).fetchone()[0]
+
+    def get_household(self, household_id: int) -> Optional[Dict[str, Any]]:
+        with self._connect() as conn:
+            row = conn.execute("SELECT household_id, name, created_at, updated_at FROM households "
+                               "WHERE household_id = ?", (household_id,)).fetchone()
+        return dict(zip(('household_id', 'name', 'created_at', 'updated_at'), row)) if row else None
+
+    def find_household(self, name: str) -> Optional[Dict[str, Any]]:
+        """按名称查找家庭"""
+        with self._connect() as conn:
+            row = conn.execute("SELECT household_id FROM households WHERE name = ?", (name,)).fetchone()
+        return self.get_household(row[0]) if row else None
+
+    def list_households(self, prefix: str = '', limit: int = 100, offset: int = 0) -> List[Dict[str, Any]]:
+        """
+        按名称排序列出家庭及成员数量
+
+        参数:
+        - prefix: 家庭名称前缀
+        - limit / offset: 分页
+        """
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT h.household_id, h.name, "
+                "(SELECT COUNT(*) FROM members m WHERE m.household_id = h.household_id) "
+                "FROM households h WHERE h.name >= ? AND h.name < ? ORDER BY h.name LIMIT ? OFFSET ?",
+                (*_prefix_range(prefix), limit, offset)).fetchall()
+        return [{'household_id': row[0], 'name': row[1], 'member_count': row[2]} for row in rows]
+
+    def count_households(self, prefix: str = '') -> int:
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM households WHERE name >= ? AND name < ?",
+                                _prefix_range(prefix)).fetchone()[0]
+
+    def delete_household(self, household_id: int) -> None:
+        """删除家庭及其所有成员"""
+        with self._connect() as conn:
+            names = [row[0] for row in conn.execute("SELECT name FROM members WHERE household_id = ?",
+                                                    (household_id,))]
+            conn.execute("DELETE FROM households WHERE household_id = ?", (household_id,))
+        self._delete_member_features(household_id, names)
+
+    def _delete_member_features(self, household_id: int, names: Sequence[str]) -> None:
+        if self.member_store is not None and names:
+            self.member_store.delete([member_key(household_id, name) for name in names])
+
+    # ---- 成员 ----
+
+    def members(self, household_id: int, risk_levels: Optional[Sequence[str]] = None) -> List[Dict[str, Any]]:
+        """
+        家庭的成员列表（按添加顺序）
+
+        参数:
+        - household_id: 家庭ID
+        - risk_levels: 只返回这些风险等级（随机森林结果）的成员
+        """
+        query = f"SELECT {_MEMBER_COLUMNS} FROM members WHERE household_id = ?"
+        params: List[Any] = [household_id]
+        if risk_levels is not None:
+            query += f" AND risk_rf IN ({','.join('?' * len(risk_levels))})"
+            params.extend(risk_levels)
+        with self._connect() as conn:
+            rows = conn.execute(query + " ORDER BY member_id", params).fetchall()
+        return [self._member(row) for row in rows]
+
+    def get_member(self, household_id: int, name: str) -> Optional[Dict[str, Any]]:
+        """按家庭和姓名查找成员"""
+        with self._connect() as conn:
+            row = conn.execute(f"SELECT {_MEMBER_COLUMNS} FROM members WHERE household_id = ? AND name = ?",
+                               (household_id, name)).fetchone()
+        return self._member(row) if row else None
+
+    def find_members(self, name: Optional[str] = None, risk_level: Optional[str] = None,
+                     limit: int = 100) -> List[Dict[str, Any]]:
+        """跨家庭按姓名或风险等级查找成员，结果带家庭名称"""
+        conditions, params = [], []
+        if name is not None:
+            conditions.append("m.name = ?")
+            params.append(name)
+        if risk_level is not None:
+            conditions.append("m.risk_rf = ?")
+            params.append(risk_level)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        columns = ', '.join(f"m.{column}" for column in _MEMBER_COLUMN_NAMES)
+        with self._connect() as conn:
+            rows = conn.execute(f"SELECT {columns}, h.name FROM members m "
+                                f"JOIN households h ON h.household_id = m.household_id {where} "
+                                "ORDER BY m.member_id LIMIT ?", (*params, limit)).fetchall()
+        return [dict(self._member(row[:-1]), household=row[-1]) for row in rows]
+
+    def upsert_member(self, household_id: int, member: Dict[str, Any]) -> int:
+        """
+        添加或更新成员（按家庭和姓名），只更新 member 中给出的字段
+
+        返回:
+        - 成员ID
+        """
+        fields = [field for field in MEMBER_FIELDS if field in member]
+        if 'name' not in fields:
+            raise ValueError("成员必须包含姓名")
+        values = [_to_db(field, member[field]) for field in fields]
+        updates = ', '.join(f"{field} = excluded.{field}" for field in fields + ['updated_at'] if field != 'name')
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                f"INSERT INTO members (household_id, {', '.join(fields)}, updated_at) "
+                f"VALUES (?, {', '.join('?' * len(fields))}, ?) "
+                f"ON CONFLICT (household_id, name) DO UPDATE SET {updates}",
+                (household_id, *values, now))
+            conn.execute("UPDATE households SET updated_at = ? WHERE household_id = ?", (now, household_id))
+            return conn.execute("SELECT member_id FROM members WHERE household_id = ? AND name = ?",
+                                (household_id, member['name'])).fetchone()[0]
+
+    def update_members(self, updates: Dict[int, Dict[str, Any]]) -> None:
+        """
+        批量更新成员字段（一个事务）
+
+        参数:
+        - updates: 成员ID -> 要更新的字段
+        """
+        now = time.time()
+        with self._connect() as conn:
+            for member_id, values in updates.items():
+                fields = [field for field in MEMBER_FIELDS if field in values and field != 'name']
+                if not fields:
+                    continue
+                conn.execute(
+                    f"UPDATE members SET {', '.join(f'{field} = ?' for field in fields)}, updated_at = ? "
+                    "WHERE member_id = ?",
+                    (*[_to_db(field, values[field]) for field in fields], now, member_id))
+
+    def delete_members(self, household_id: int, names: Optional[Sequence[str]] = None) -> None:
+        """删除家庭的成员，names 为None时删除全部成员"""
+        with self._connect() as conn:
+            if names is None:
+                names = [row[0] for row in conn.execute("SELECT name FROM members WHERE household_id = ?",
+                                                        (household_id,))]
+                conn.execute("DELETE FROM members WHERE household_id = ?", (household_id,))
+            else:
+                conn.executemany("DELETE FROM members WHERE household_id = ? AND name = ?",
+                                 [(household_id, name) for name in names])
+        self._delete_member_features(household_id, names)
+
+    # ---- 批量导入导出 ----
+
+    def import_members(self, rows: Union[pd.DataFrame, Iterable[Dict[str, Any]]],
+                       default_household: Optional[str] = None) -> Dict[str, Any]:
+        """
+        批量导入成员（一个事务），家庭不存在时自动创建，同一家庭的同名成员被覆盖
+
+        导入前先校验每一行：没有姓名的行被跳过；家庭为空的行导入到 default_household，
+        没有 default_household 时同样跳过。跳过的行不影响其余行的导入。
+
+        参数:
+        - rows: DataFrame或字典序列，'household' 列为家庭名称，其余列同 MEMBER_FIELDS（缺少的列为空）
+        - default_household: 家庭为空（或没有 'household' 列）时使用的家庭名称
+
+        返回:
+        - {'imported': 导入的成员数量, 'skipped': [{'row': 数据行号（从1开始，不含表头）, 'reason': 原因}, ...]}
+        """
+        records = rows.to_dict('records') if isinstance(rows, pd.DataFrame) else list(rows)
+        valid, skipped = [], []
+        for row, record in enumerate(records, start=1):
+            household = record.get('household')
+            if _blank(record.get('name')):
+                skipped.append({'row': row, 'reason': "缺少姓名"})
+            elif _blank(household) and _blank(default_household):
+                skipped.append({'row': row, 'reason': "缺少家庭"})
+            else:
+                valid.append((str(default_household if _blank(household) else household).strip(),
+                              dict(record, name=str(record['name']).strip())))
+        if not valid:
+            return {'imported': 0, 'skipped': skipped}
+
+        now = time.time()
+        with self._connect() as conn:
+            names = list(dict.fromkeys(household for household, _ in valid))
+            conn.executemany("INSERT OR IGNORE INTO households (name, created_at, updated_at) VALUES (?, ?, ?)",
+                             [(name, now, now) for name in names])
+            household_ids = dict(conn.execute("SELECT name, household_id FROM households"))
+            updates = ', '.join(f"{field} = excluded.{field}" for field in MEMBER_FIELDS[1:] + ['updated_at'])
+            conn.executemany(
+                f"INSERT INTO members (household_id, {', '.join(MEMBER_FIELDS)}, updated_at) "
+                f"VALUES (?, {', '.join('?' * len(MEMBER_FIELDS))}, ?) "
+                f"ON CONFLICT (household_id, name) DO UPDATE SET {updates}",
+                [(household_ids[household], *[_to_db(field, record.get(field)) for field in MEMBER_FIELDS], now)
+                 for household, record in valid])
+            conn.executemany("UPDATE households SET updated_at = ? WHERE household_id = ?",
+                             [(now, household_ids[name]) for name in names])
+        return {'imported': len(valid), 'skipped': skipped}
+
+    def export_members(self, household_ids: Optional[Sequence[int]] = None) -> pd.DataFrame:
+        """
+        导出成员，'household' 列为家庭名称，可以直接交给 import_members 导入
+
+        参数:
+        - household_ids: 只导出这些家庭，默认导出全部
+        """
+        columns = ', '.join(f"m.{field}" for field in MEMBER_FIELDS)
+        query = f"SELECT h.name AS household, {columns} FROM members m JOIN households h ON h.household_id = m.household_id"
+        params: List[Any] = []
+        if household_ids is not None:
+            query += f" WHERE m.household_id IN ({','.join('?' * len(household_ids))})"
+            params.extend(household_ids)
+        with self._connect() as conn:
+            data = pd.read_sql_query(query + " ORDER BY h.name, m.member_id", conn, params=params)
+        for field in _BOOLEAN_FIELDS:
+            data[field] = data[field].map({1: True, 0: False})
+        return data
+
+    def import_csv(self, path, default_household: Optional[str] = None) -> Dict[str, Any]:
+        """从CSV文件（路径或文件对象）批量导入成员，返回值同 import_members"""
+        return self.import_members(pd.read_csv(path, dtype={'household': str, 'name': str}), default_household)
+
+    def export_csv(self, path: str, household_ids: Optional[Sequence[int]] = None) -> int:
+        """导出成员到CSV文件，返回导出的成员数量"""
+        data = self.export_members(household_ids)
+        data.to_csv(path, index=False)
+        return len(data)
+
+
+def main():
+    """命令行导入导出家庭档案"""
+    parser = argparse.ArgumentParser(description="家庭档案批量导入导出")
+    parser.add_argument('--store', help="家庭档案库路径，默认为 cache/family_store.sqlite")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    import_parser = subparsers.add_parser('import', help="从CSV导入成员（household列为家庭名称）")
+    import_parser.add_argument('path')
+    export_parser = subparsers.add_parser('export', help="导出成员到CSV")
+    export_parser.add_argument('path')
+    export_parser.add_argument('--household', action='append', help="只导出指定名称的家庭，可以重复")
+    args = parser.parse_args()
+
+    store = FamilyStore(args.store)
+    if args.command == 'import':
+        result = store.import_csv(args.path)
+        print(f"已导入 {result['imported']} 个成员，共 {store.count_households()} 个家庭")
+        for skipped in result['skipped']:
+            print(f"跳过第 {skipped['row']} 行: {skipped['reason']}")
+    else:
+        household_ids = None
+        if args.household:
+            households = [store.find_household(name) for name in args.household]
+            household_ids = [household['household_id'] for household in households if household]
+        count = store.export_csv(args.path, household_ids)
+        print(f"已导出 {count} 个成员到 {args.path}")
+
+
+if __name__ == "__main__":
+    main()
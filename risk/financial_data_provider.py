@@ -4,6 +4,9 @@ import numpy as np
 from typing import Dict, List, Optional, Union, Any
 import os
 
+from instrumentation import span
+from metrics import FINANCIAL_API_REQUESTS
+
 class FinancialDataProvider:
     """
     金融数据提供者，整合Financial Datasets API的功能
@@ -19,6 +22,30 @@ class FinancialDataProvider:
         
         self.base_url = "https://api.financialdatasets.ai"
     
+    def _request(self, method: str, path: str, **kwargs) -> requests.Response:
+        """
+        发送API请求，每个端点的耗时记录到 api.<路径> 计时中，请求次数按端点和状态码计数
+        
+        参数:
+        - method: HTTP方法
+        - path: 以 / 开头的端点路径
+        - kwargs: 传给 requests.request 的其他参数（params、json等）
+        """
+        endpoint = path.strip("/").replace("/", ".")
+        try:
+            with span("api." + endpoint):
+                response = requests.request(
+                    method,
+                    f"{self.base_url}{path}",
+                    headers={"X-API-Key": self.api_key},
+                    **kwargs
+                )
+        except Exception:
+            FINANCIAL_API_REQUESTS.inc(endpoint=endpoint, status="error")
+            raise
+        FINANCIAL_API_REQUESTS.inc(endpoint=endpoint, status=response.status_code)
+        return response
+    
     def get_stock_prices(self, ticker: str, 
                         start_date: Optional[str] = None, 
                         end_date: Optional[str] = None,
@@ -49,10 +76,10 @@ class FinancialDataProvider:
             params["end_date"] = end_date
             
         # 发送请求
-        response = requests.get(
-            f"{self.base_url}/prices/", 
-            params=params,
-            headers={"X-API-Key": self.api_key}
+        response = self._request(
+            "GET",
+            "/prices/",
+            params=params
         )
         
         # 检查响应
@@ -73,10 +100,10 @@ class FinancialDataProvider:
         返回:
         - 包含股票当前数据的字典
         """
-        response = requests.get(
-            f"{self.base_url}/prices/snapshot", 
-            params={"ticker": ticker},
-            headers={"X-API-Key": self.api_key}
+        response = self._request(
+            "GET",
+            "/prices/snapshot",
+            params={"ticker": ticker}
         )
         
         if response.status_code != 200:
@@ -117,10 +144,10 @@ class FinancialDataProvider:
         params = {"ticker": ticker, "period": period, "limit": limit}
         
         # 发送请求
-        response = requests.get(
-            f"{self.base_url}/financials/{endpoint}/",
-            params=params,
-            headers={"X-API-Key": self.api_key}
+        response = self._request(
+            "GET",
+            f"/financials/{endpoint}/",
+            params=params
         )
         
         # 检查响应
@@ -148,10 +175,10 @@ class FinancialDataProvider:
         """
         params = {"ticker": ticker, "period": period, "limit": limit}
         
-        response = requests.get(
-            f"{self.base_url}/financial-metrics/",
-            params=params,
-            headers={"X-API-Key": self.api_key}
+        response = self._request(
+            "GET",
+            "/financial-metrics/",
+            params=params
         )
         
         if response.status_code != 200:
@@ -183,13 +210,10 @@ class FinancialDataProvider:
         }
         
         # 发送请求
-        response = requests.post(
-            f"{self.base_url}/financials/search/",
-            json=body,
-            headers={
-                "X-API-Key": self.api_key,
-                "Content-Type": "application/json"
-            }
+        response = self._request(
+            "POST",
+            "/financials/search/",
+            json=body
         )
         
         # 检查响应
@@ -211,10 +235,10 @@ class FinancialDataProvider:
         返回:
         - 包含新闻数据的字典
         """
-        response = requests.get(
-            f"{self.base_url}/news/",
-            params={"ticker": ticker, "limit": limit},
-            headers={"X-API-Key": self.api_key}
+        response = self._request(
+            "GET",
+            "/news/",
+            params={"ticker": ticker, "limit": limit}
         )
         
         if response.status_code != 200:
@@ -250,10 +274,10 @@ class FinancialDataProvider:
         params = {"limit": limit}
         
         # 发送请求
-        response = requests.get(
-            f"{self.base_url}/{endpoint}/",
-            params=params,
-            headers={"X-API-Key": self.api_key}
+        response = self._request(
+            "GET",
+            f"/{endpoint}/",
+            params=params
         )
         
         # 检查响应
@@ -274,10 +298,10 @@ class FinancialDataProvider:
         返回:
         - 包含公司概况的字典
         """
-        response = requests.get(
-            f"{self.base_url}/company/profile/",
-            params={"ticker": ticker},
-            headers={"X-API-Key": self.api_key}
+        response = self._request(
+            "GET",
+            "/company/profile/",
+            params={"ticker": ticker}
         )
         
         if response.status_code != 200:
@@ -297,10 +321,10 @@ class FinancialDataProvider:
         返回:
         - 包含收益数据的字典
         """
-        response = requests.get(
-            f"{self.base_url}/company/earnings/",
-            params={"ticker": ticker, "limit": limit},
-            headers={"X-API-Key": self.api_key}
+        response = self._request(
+            "GET",
+            "/company/earnings/",
+            params={"ticker": ticker, "limit": limit}
         )
         
         if response.status_code != 200:
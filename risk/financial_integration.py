@@ -3,15 +3,111 @@ import pandas as pd
 import numpy as np
 from typing import Dict, List, Any, Optional, Union
 import json
+import copy
+import hashlib
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed, TimeoutError as FuturesTimeoutError
 
 # 导入家康智投系统的核心模块
 from risk_classifier import FamilyRiskClassifier
 from investment_advisor import InvestmentAdvisor
+from portfolio_analytics import analyze_stocks_data
+from instrumentation import timed
+from metrics import AI_RISK_ANALYSES, CACHE_REQUESTS
+from portfolio_backtester import load_product_prices
 
 # 导入新增的模块
 from financial_data_provider import FinancialDataProvider
 from ai_assistant import AIAssistant
 
+# 市场数据快照缓存，进程内所有EnhancedInvestmentAdvisor实例共享，按数据源和凭据区分：
+# {键: {'data': 快照, 'timestamp': 获取时间}}；正在获取的键在 _MARKET_DATA_INFLIGHT 中，值为等待结果的Future。
+# 锁只保护这两个字典，不在获取数据期间持有
+_MARKET_DATA_CACHE: Dict[tuple, Dict[str, Any]] = {}
+_MARKET_DATA_INFLIGHT: Dict[tuple, Future] = {}
+_MARKET_DATA_LOCK = threading.Lock()
+
+
+def _market_data_key(financial_data) -> tuple:
+    """市场数据缓存键：数据源类型、地址和API密钥的摘要（不保存密钥本身）"""
+    api_key = str(getattr(financial_data, 'api_key', None) or '')
+    return (type(financial_data).__name__, getattr(financial_data, 'base_url', None),
+            hashlib.sha256(api_key.encode('utf-8')).hexdigest()[:16])
+
+# 风险等级中文名称和模板解释
+RISK_LEVEL_NAMES = {'High': '高风险', 'Medium': '中风险', 'Low': '低风险'}
+RISK_LEVEL_EXPLANATIONS = {
+    'High': "账户余额为负，或同时背负住房贷款和个人贷款，短期偿债压力较大。建议优先偿还高息负债、保留应急资金，投资以保本型产品为主。",
+    'Medium': "账户余额在0-1000之间，财务状况基本稳定但缓冲有限。建议先积累3-6个月的应急资金，再逐步配置稳健型产品。",
+    'Low': "账户余额超过1000且没有叠加的贷款负担，财务缓冲充足。可以在分散配置的前提下适当提高权益类资产比例。"
+}
+
+
+class AIAnalysisGate:
+    """
+    AI深度风险分析的门控策略
+
+    规则型分类和各模型结果一致、模型置信度高且账户余额远离等级分界（0和1000）时，
+    大模型的分析不会改变结论，直接使用模板解释；只有边界或有分歧的情况才调用大模型。
+    """
+
+    def __init__(self, balance_thresholds=(0, 1000), balance_margin=100, min_confidence=0.9):
+        """
+        参数:
+        - balance_thresholds: 风险等级的账户余额分界
+        - balance_margin: 余额与分界的距离不超过该值时视为边界情况
+        - min_confidence: 模型置信度低于该值时调用大模型
+        """
+        self.balance_thresholds = balance_thresholds
+        self.balance_margin = balance_margin
+        self.min_confidence = min_confidence
+
+    def reasons(self, member_data: Dict[str, Any], basic_risk: Dict[str, Any]) -> List[str]:
+        """
+        需要调用大模型的原因，为空表示可以跳过
+
+        参数:
+        - member_data: 家庭成员数据
+        - basic_risk: classify_risk_level 的结果
+        """
+        reasons = []
+        levels = {basic_risk[key] for key in ('rule_based', 'decision_tree', 'random_forest', 'gradient_boosting')
+                  if key in basic_risk}
+        if len(levels) > 1:
+            reasons.append("各模型的评估结果不一致")
+
+        confidence = basic_risk.get('confidence')
+        if confidence is not None and confidence < self.min_confidence:
+            reasons.append(f"模型置信度较低（{confidence:.0%}）")
+
+        balance = member_data.get('balance', 0)
+        for threshold in self.balance_thresholds:
+            if abs(balance - threshold) <= self.balance_margin:
+                reasons.append(f"账户余额接近风险等级分界（{threshold}）")
+                break
+        return reasons
+
+    def should_call_ai(self, member_data: Dict[str, Any], basic_risk: Dict[str, Any]) -> bool:
+        return bool(self.reasons(member_data, basic_risk))
+
+
+def templated_risk_analysis(member_data: Dict[str, Any], basic_risk: Dict[str, Any]) -> str:
+    """结果一致时使用的模板化风险解释（Markdown）"""
+    level = basic_risk['random_forest']
+    lines = [f"规则型分类与机器学习模型的评估结果一致：**{RISK_LEVEL_NAMES.get(level, level)}**"
+             + (f"（模型置信度 {basic_risk['confidence']:.0%}）" if 'confidence' in basic_risk else "") + "。",
+             "",
+             f"- 账户余额：{member_data.get('balance', 0)}",
+             f"- 住房贷款：{'有' if member_data.get('housing') else '无'}",
+             f"- 个人贷款：{'有' if member_data.get('loan') else '无'}",
+             "",
+             RISK_LEVEL_EXPLANATIONS.get(level, ""),
+             "",
+             "该成员的情况远离风险等级分界，未调用AI深度分析。"]
+    return '\n'.join(lines)
+
+
 class EnhancedRiskClassifier(FamilyRiskClassifier):
     """
     增强版风险分类器，整合AI能力和金融数据
@@ -27,17 +123,60 @@ class EnhancedRiskClassifier(FamilyRiskClassifier):
         
         # 初始化AI助手
         self.ai_assistant = AIAssistant(api_key=ai_api_key)
+        
+        # AI深度分析的门控策略
+        self.ai_gate = AIAnalysisGate()
     
-    def enhanced_risk_analysis(self, member_data: Dict[str, Any]) -> Dict[str, Any]:
+    def ai_risk_analysis(self, member_data: Dict[str, Any], basic_risk: Dict[str, Any],
+                         force: bool = False) -> Dict[str, Any]:
+        """
+        按门控策略进行深度风险分析：边界或有分歧的情况调用大模型，其余使用模板解释
+        
+        参数:
+        - member_data: 家庭成员数据
+        - basic_risk: classify_risk_level 的结果
+        - force: 是否忽略门控策略，总是调用大模型
+        
+        返回:
+        - 'ai_analysis'（风险等级）、'detailed_analysis'（分析文本）、
+          'analysis_source'（'ai' 或 'template'）和 'gating_reasons'（调用大模型的原因）
+        """
+        reasons = self.ai_gate.reasons(member_data, basic_risk)
+        if force or reasons:
+            AI_RISK_ANALYSES.inc(source='ai')
+            ai_risk_analysis = self.ai_assistant.analyze_investment_risk(member_data)
+            return {
+                'ai_analysis': ai_risk_analysis.get('risk_level') or basic_risk['random_forest'],
+                'detailed_analysis': ai_risk_analysis.get('analysis', ''),
+                'analysis_source': 'ai',
+                'gating_reasons': reasons
+            }
+        
+        AI_RISK_ANALYSES.inc(source='template')
+        return {
+            'ai_analysis': basic_risk['random_forest'],
+            'detailed_analysis': templated_risk_analysis(member_data, basic_risk),
+            'analysis_source': 'template',
+            'gating_reasons': []
+        }
+    
+    def enhanced_risk_analysis(self, member_data: Dict[str, Any], progress_callback=None,
+                               force_ai: bool = False) -> Dict[str, Any]:
         """
         增强版风险分析，结合规则型分类、机器学习模型和AI分析
         
         参数:
         - member_data: 家庭成员数据
+        - progress_callback: 进度回调 callback(进度0-1, 阶段描述)，在每个阶段完成时调用
+        - force_ai: 是否总是调用大模型（默认只在边界或有分歧的情况调用，见 AIAnalysisGate）
         
         返回:
         - 增强版风险分析结果
         """
+        def report(progress, message):
+            if progress_callback is not None:
+                progress_callback(progress, message)
+        
         # 获取基础风险评估
         basic_risk = self.classify_risk_level(
             age=member_data.get('age', 35),
@@ -49,23 +188,26 @@ class EnhancedRiskClassifier(FamilyRiskClassifier):
             education=member_data.get('education', 'unknown')
         )
         
-        # 使用AI进行深度风险分析
-        ai_risk_analysis = self.ai_assistant.analyze_investment_risk(member_data)
+        has_portfolio = bool(member_data.get('portfolio'))
+        report(0.3, "基础评估完成，正在进行AI深度分析...")
         
-        # 整合风险评估结果
+        # 只有边界或有分歧的情况才使用AI进行深度风险分析
         final_risk = {
             'rule_based': basic_risk['rule_based'],
             'decision_tree': basic_risk['decision_tree'],
-            'random_forest': basic_risk['random_forest'],
-            'ai_analysis': ai_risk_analysis.get('risk_level', basic_risk['random_forest']),
-            'detailed_analysis': ai_risk_analysis.get('analysis', '')
+            'random_forest': basic_risk['random_forest']
         }
+        if 'confidence' in basic_risk:
+            final_risk['confidence'] = basic_risk['confidence']
+        final_risk.update(self.ai_risk_analysis(member_data, basic_risk, force=force_ai))
+        report(0.7 if has_portfolio else 0.9, "正在分析投资组合..." if has_portfolio else "正在整合分析结果...")
         
         # 如果提供了投资组合，进行组合分析
-        if 'portfolio' in member_data and member_data['portfolio']:
+        if has_portfolio:
             portfolio_analysis = self.analyze_portfolio(member_data['portfolio'])
             final_risk['portfolio_analysis'] = portfolio_analysis
         
+        report(1.0, "分析完成！")
         return final_risk
     
     def analyze_portfolio(self, portfolio: List[Dict[str, Any]]) -> Dict[str, Any]:
@@ -100,12 +242,16 @@ class EnhancedRiskClassifier(FamilyRiskClassifier):
                 except Exception as e:
                     print(f"获取股票数据异常: {str(e)}")
         
-        # 使用AI分析投资组合
-        ai_portfolio_analysis = self.ai_assistant.analyze_portfolio(portfolio)
+        # 基于对齐的价格矩阵计算量化指标
+        summary = analyze_stocks_data(portfolio, stocks_data)
+        
+        # 使用AI分析投资组合，有量化指标时只发送精简后的指标
+        ai_portfolio_analysis = self.ai_assistant.analyze_portfolio(portfolio, metrics=summary)
         
         # 返回分析结果
         return {
             'stocks_data': stocks_data,
+            'metrics': summary,
             'ai_analysis': ai_portfolio_analysis.get('analysis', '')
         }
 
@@ -115,7 +261,8 @@ class EnhancedInvestmentAdvisor(InvestmentAdvisor):
     增强版投资顾问，整合AI能力和金融数据
     """
     
-    def __init__(self, financial_api_key=None, ai_api_key=None):
+    def __init__(self, financial_api_key=None, ai_api_key=None,
+                 market_data_ttl=300, market_data_timeout=8.0):
         """初始化增强版投资顾问"""
         # 初始化原始投资顾问
         super().__init__()
@@ -125,13 +272,18 @@ class EnhancedInvestmentAdvisor(InvestmentAdvisor):
         
         # 初始化AI助手
         self.ai_assistant = AIAssistant(api_key=ai_api_key)
+        
+        # 市场数据快照的缓存时间和获取截止时间（秒）
+        self.market_data_ttl = market_data_ttl
+        self.market_data_timeout = market_data_timeout
     
     def get_enhanced_recommendation(self, 
                                   risk_level: str, 
                                   age: Optional[int] = None,
                                   balance: Optional[float] = None,
                                   has_loans: bool = False,
-                                  additional_data: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+                                  additional_data: Optional[Dict[str, Any]] = None,
+                                  progress_callback=None) -> Dict[str, Any]:
         """
         获取增强版投资建议
         
@@ -141,10 +293,15 @@ class EnhancedInvestmentAdvisor(InvestmentAdvisor):
         - balance: 账户余额
         - has_loans: 是否有贷款
         - additional_data: 额外数据
+        - progress_callback: 进度回调 callback(进度0-1, 阶段描述)，在每个阶段（含每个市场数据端点）完成时调用
         
         返回:
         - 增强版投资建议
         """
+        def report(progress, message):
+            if progress_callback is not None:
+                progress_callback(progress, message)
+        
         # 获取基础投资建议
         base_recommendation = self.get_personalized_recommendation(
             risk_level=risk_level,
@@ -153,8 +310,13 @@ class EnhancedInvestmentAdvisor(InvestmentAdvisor):
             has_loans=has_loans
         )
         
-        # 获取市场数据
-        market_data = self.get_market_data()
+        report(0.1, "基础建议生成完成，正在获取市场数据...")
+        
+        # 获取市场数据（进度占 10%-70%）
+        market_data = self.get_market_data(
+            progress_callback=lambda fraction, message: report(0.1 + 0.6 * fraction, message)
+        )
+        report(0.7, "正在生成AI增强建议...")
         
         # 构建用户数据
         user_data = {
@@ -178,83 +340,174 @@ class EnhancedInvestmentAdvisor(InvestmentAdvisor):
         enhanced_recommendation['ai_advice'] = ai_advice.get('advice', '')
         enhanced_recommendation['market_data'] = market_data
         
+        report(1.0, "投资建议生成完成！")
         return enhanced_recommendation
     
-    def get_market_data(self) -> Dict[str, Any]:
+    def backtest_recommendations(self,
+                                 years: int = 10,
+                                 horizon_months: int = 36,
+                                 rebalance_every: int = 12,
+                                 monthly_contribution: float = 0.0) -> Dict[str, Any]:
         """
-        获取市场数据
+        使用代理ETF的历史价格回测高/中/低风险投资组合
+        
+        价格优先从本地缓存读取，缺失时通过金融数据API获取并缓存。
+        
+        参数:
+        - years: 使用的历史年数
+        - horizon_months: 每次回测的月数
+        - rebalance_every: 再平衡间隔（月）
+        - monthly_contribution: 每月投入金额
         
         返回:
-        - 市场数据
+        - 回测摘要（不含逐起始月份的原始数组）
         """
-        market_data = {}
+        import datetime
+        end_date = datetime.date.today()
+        start_date = end_date - datetime.timedelta(days=int(years * 365.25))
+        
+        names = [
+            product['name']
+            for recommendation in self.investment_recommendations.values()
+            for product in recommendation['products']
+        ]
+        prices = load_product_prices(
+            names, self.financial_data,
+            start_date=start_date.isoformat(), end_date=end_date.isoformat()
+        )
+        
+        result = self.backtest_portfolios(
+            prices,
+            horizon_months=horizon_months,
+            rebalance_every=rebalance_every,
+            monthly_contribution=monthly_contribution
+        )
+        if 'error' in result:
+            return result
         
+        return {
+            'horizon_months': result['horizon_months'],
+            'rebalance_every': result['rebalance_every'],
+            'first_start': result['start_dates'][0],
+            'last_start': result['start_dates'][-1],
+            'windows': len(result['start_dates']),
+            'summary': result['summary']
+        }
+    
+    def get_market_data(self, progress_callback=None) -> Dict[str, Any]:
+        """
+        获取市场数据
+
+        宏观、公司概况和收益数据并发获取，所有请求共享同一个截止时间；
+        超时或失败的端点会被跳过并记录在 unavailable 中。
+        组装好的快照在进程内按数据源和API密钥缓存，TTL内所有用户复用同一份数据；
+        缓存缺失时只有一个会话获取，其他会话等待其结果。返回的是快照的深拷贝，调用方可以随意修改。
+
+        参数:
+        - progress_callback: 进度回调 callback(进度0-1, 描述)，每个端点返回时调用
+
+        返回:
+        - 市场数据
+        """
+        key = _market_data_key(self.financial_data)
+        with _MARKET_DATA_LOCK:
+            entry = _MARKET_DATA_CACHE.get(key)
+            fresh = entry is not None and time.monotonic() - entry['timestamp'] < self.market_data_ttl
+            future = None if fresh else _MARKET_DATA_INFLIGHT.get(key)
+            owner = not fresh and future is None
+            if owner:
+                future = _MARKET_DATA_INFLIGHT[key] = Future()
+
+        if fresh:
+            CACHE_REQUESTS.inc(cache='market_data', result='hit')
+            if progress_callback is not None:
+                progress_callback(1.0, "已使用缓存的市场数据")
+            return copy.deepcopy(entry['data'])
+
+        if not owner:
+            # 其他会话正在获取同一份数据，等待其结果而不是重复请求
+            CACHE_REQUESTS.inc(cache='market_data', result='coalesced')
+            market_data = future.result()
+            if progress_callback is not None:
+                progress_callback(1.0, "已使用其他会话获取的市场数据")
+            return copy.deepcopy(market_data)
+
+        CACHE_REQUESTS.inc(cache='market_data', result='miss')
         try:
-            # 设置日期范围（过去30天）
-            import datetime
-            end_date = datetime.datetime.now().strftime('%Y-%m-%d')
-            start_date = (datetime.datetime.now() - datetime.timedelta(days=30)).strftime('%Y-%m-%d')
-            
-            # 使用免费的API端点获取宏观数据
-            # 获取主要指数数据
-            indices = {}
-            
-            # 尝试获取宏观经济数据（免费）
-            try:
-                # 获取利率数据（免费API）
-                interest_rates = self.financial_data.get_macro_data("interest_rates")
-                if 'error' not in interest_rates:
-                    indices['interest_rates'] = interest_rates
-            except Exception as e:
-                print(f"获取利率数据异常: {str(e)}")
-            
-            # 尝试获取GDP数据（免费API）
-            try:
-                gdp_data = self.financial_data.get_macro_data("gdp")
-                if 'error' not in gdp_data:
-                    indices['gdp'] = gdp_data
-            except Exception as e:
-                print(f"获取GDP数据异常: {str(e)}")
-            
-            # 尝试获取通胀数据（免费API）
+            market_data = self._fetch_market_data(progress_callback)
+        except BaseException as e:
+            with _MARKET_DATA_LOCK:
+                _MARKET_DATA_INFLIGHT.pop(key, None)
+            future.set_exception(e)
+            raise
+
+        with _MARKET_DATA_LOCK:
+            _MARKET_DATA_INFLIGHT.pop(key, None)
+            # 只要有任一端点成功就缓存快照，全部失败时下次重新获取
+            if market_data.get('macro') or market_data.get('company_profiles') or market_data.get('earnings'):
+                _MARKET_DATA_CACHE[key] = {'data': market_data, 'timestamp': time.monotonic()}
+        future.set_result(market_data)
+        return copy.deepcopy(market_data)
+
+    @timed('market_data.fetch')
+    def _fetch_market_data(self, progress_callback=None) -> Dict[str, Any]:
+        """并发获取市场数据的各个端点，并在截止时间后组装快照"""
+        popular_stocks = ['AAPL', 'MSFT', 'GOOGL', 'AMZN', 'TSLA']
+
+        # (分组, 键, 调用) —— 使用免费的API端点
+        requests_plan = [
+            ('macro', 'interest_rates', lambda: self.financial_data.get_macro_data("interest_rates")),
+            ('macro', 'gdp', lambda: self.financial_data.get_macro_data("gdp")),
+            ('macro', 'inflation', lambda: self.financial_data.get_macro_data("inflation")),
+        ]
+        for ticker in popular_stocks:
+            requests_plan.append(('company_profiles', ticker,
+                                  lambda t=ticker: self.financial_data.get_company_profile(t)))
+        for ticker in popular_stocks:
+            requests_plan.append(('earnings', ticker,
+                                  lambda t=ticker: self.financial_data.get_earnings(t)))
+
+        market_data = {'macro': {}, 'company_profiles': {}, 'earnings': {}}
+        unavailable = []
+
+        executor = ThreadPoolExecutor(max_workers=len(requests_plan), thread_name_prefix='market-data')
+        try:
+            futures = {executor.submit(call): (group, key) for group, key, call in requests_plan}
+            done = []
             try:
-                inflation_data = self.financial_data.get_macro_data("inflation")
-                if 'error' not in inflation_data:
-                    indices['inflation'] = inflation_data
-            except Exception as e:
-                print(f"获取通胀数据异常: {str(e)}")
-            
-            market_data['macro'] = indices
-            
-            # 获取公司概况数据（免费API）
-            company_profiles = {}
-            popular_stocks = ['AAPL', 'MSFT', 'GOOGL', 'AMZN', 'TSLA']
-            
-            for ticker in popular_stocks:
-                try:
-                    profile_data = self.financial_data.get_company_profile(ticker)
-                    if 'error' not in profile_data:
-                        company_profiles[ticker] = profile_data
-                except Exception as e:
-                    print(f"获取{ticker}公司概况异常: {str(e)}")
-            
-            market_data['company_profiles'] = company_profiles
-            
-            # 获取收益数据（免费API）
-            earnings_data = {}
-            for ticker in popular_stocks:
+                for future in as_completed(futures, timeout=self.market_data_timeout):
+                    done.append(future)
+                    if progress_callback is not None:
+                        group, key = futures[future]
+                        progress_callback(len(done) / len(futures), f"已获取市场数据: {group}/{key}")
+            except FuturesTimeoutError:
+                pass
+            not_done = [future for future in futures if future not in done]
+
+            for future in done:
+                group, key = futures[future]
                 try:
-                    earnings = self.financial_data.get_earnings(ticker)
-                    if 'error' not in earnings:
-                        earnings_data[ticker] = earnings
+                    result = future.result()
                 except Exception as e:
-                    print(f"获取{ticker}收益数据异常: {str(e)}")
-            
-            market_data['earnings'] = earnings_data
-            
-        except Exception as e:
-            print(f"获取市场数据异常: {str(e)}")
-        
+                    print(f"获取{group}/{key}数据异常: {str(e)}")
+                    unavailable.append(f"{group}/{key}")
+                    continue
+                if isinstance(result, dict) and 'error' not in result:
+                    market_data[group][key] = result
+                else:
+                    unavailable.append(f"{group}/{key}")
+
+            for future in not_done:
+                group, key = futures[future]
+                print(f"获取{group}/{key}数据超时，已跳过")
+                unavailable.append(f"{group}/{key}")
+        finally:
+            # 不等待超时的请求，让其在后台线程中自行结束
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        if unavailable:
+            market_data['unavailable'] = sorted(unavailable)
+
         return market_data
 
 
@@ -284,17 +537,23 @@ class AIFinancialChatAssistant:
             ai_api_key=ai_api_key
         )
     
-    def process_query(self, query: str, chat_history: List[Dict[str, str]] = None) -> Dict[str, Any]:
+    def process_query(self, query: str, chat_history: List[Dict[str, str]] = None,
+                      progress_callback=None) -> Dict[str, Any]:
         """
         处理用户查询
         
         参数:
         - query: 用户查询
         - chat_history: 聊天历史
+        - progress_callback: 进度回调 callback(进度0-1, 阶段描述)，在每个任务完成时调用
         
         返回:
         - 处理结果
         """
+        def report(progress, message):
+            if progress_callback is not None:
+                progress_callback(progress, message)
+        
         # 如果没有提供聊天历史，创建一个空列表
         if chat_history is None:
             chat_history = []
@@ -304,15 +563,17 @@ class AIFinancialChatAssistant:
         
         # 分解查询为子任务
         tasks = self.ai_assistant.decompose_query(query)
+        report(0.1, "已确定需要完成的任务")
         
-        # 执行任务
+        # 执行任务（进度占 10%-90%）
         task_results = []
-        for task in tasks:
+        for i, task in enumerate(tasks):
             result = self.execute_task(task, query)
             task_results.append({
                 "task": task,
                 "result": result
             })
+            report(0.1 + 0.8 * (i + 1) / len(tasks), f"已完成: {task}")
         
         # 使用AI生成最终回复
         system_message = "你是一位专业的投资顾问，擅长解释复杂的金融概念和提供投资建议。请基于任务结果生成一个全面、专业的回复。"
@@ -342,6 +603,7 @@ class AIFinancialChatAssistant:
         
         # 将助手回复添加到聊天历史
         chat_history.append({"role": "assistant", "content": final_response})
+        report(1.0, "处理完成!")
         
         return {
             "response": final_response,
@@ -399,6 +661,10 @@ class AIFinancialChatAssistant:
         elif "市场" in task_lower or "市场数据" in task_lower or "市场状况" in task_lower:
             return self.investment_advisor.get_market_data()
         
+        # 回测投资组合的历史表现
+        elif "回测" in task_lower or "历史表现" in task_lower:
+            return self.investment_advisor.backtest_recommendations()
+        
         # 获取投资建议
         elif "投资建议" in task_lower or "投资组合" in task_lower or "投资策略" in task_lower:
             # 提取可能的风险等级
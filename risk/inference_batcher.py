@@ -0,0 +1,108 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Dict, List, Any, Optional
+
+from metrics import INFERENCE_BATCHES, INFERENCE_BATCH_ITEMS
+
+
+class InferenceBatcher:
+    """
+    风险评估的微批处理队列
+
+    并发的单成员请求先进入队列，后台线程收集最多 max_batch_size 个请求，
+    或在第一个请求到达后最多等待 max_wait_ms 毫秒，然后用一次向量化预测完成整批评估，
+    再把结果分发给各个等待的调用方。
+
+    max_wait_ms 越大，并发高时每批越大、吞吐越高，但低负载时单个请求的延迟最多增加 max_wait_ms；
+    max_wait_ms 为 0 时只合并已经在排队的请求。
+    """
+
+    def __init__(self, classifier, max_batch_size: int = 64, max_wait_ms: float = 2.0):
+        """
+        参数:
+        - classifier: 提供 classify_risk_levels(members) 的风险分类器
+        - max_batch_size: 每批最多的成员数量
+        - max_wait_ms: 收集一批请求的最长等待时间（毫秒）
+        """
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size 必须大于0")
+        self.classifier = classifier
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+
+        self.batches = 0
+        self.items = 0
+        self._queue: "queue.Queue" = queue.Queue()
+        self._closed = False
+        self._worker = threading.Thread(target=self._run, name="inference-batcher", daemon=True)
+        self._worker.start()
+
+    def submit(self, member: Dict[str, Any]) -> Future:
+        """提交一个成员的评估请求，返回结果的Future"""
+        if self._closed:
+            raise RuntimeError("InferenceBatcher 已关闭")
+        future = Future()
+        self._queue.put((member, future))
+        return future
+
+    def classify(self, member: Dict[str, Any], timeout: Optional[float] = None) -> Dict[str, str]:
+        """提交请求并等待结果"""
+        return self.submit(member).result(timeout=timeout)
+
+    @property
+    def average_batch_size(self) -> float:
+        return self.items / self.batches if self.batches else 0.0
+
+    def close(self) -> None:
+        """停止后台线程，已提交的请求仍会完成"""
+        if not self._closed:
+            self._closed = True
+            self._queue.put(None)
+            self._worker.join()
+
+    def _collect(self) -> List:
+        """阻塞等待第一个请求，然后在等待时间内收集一批请求"""
+        first = self._queue.get()
+        if first is None:
+            return []
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait_ms / 1000
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                # 关闭信号：处理完当前这批后退出
+                self._queue.put(None)
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._collect()
+            if not batch:
+                return
+
+            # 调用方可能已经取消
+            batch = [(member, future) for member, future in batch if future.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+
+            try:
+                results = self.classifier.classify_risk_levels([member for member, _ in batch])
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+
+            self.batches += 1
+            self.items += len(batch)
+            INFERENCE_BATCHES.inc()
+            INFERENCE_BATCH_ITEMS.inc(len(batch))
+            for (_, future), result in zip(batch, results):
+                future.set_result(result)
@@ -0,0 +1,222 @@
+import os
+import math
+import time
+import threading
+import functools
+from typing import Dict, Any, Optional
+
+# 每个2倍区间划分的桶数，桶边界按 2^(1/4) 递增，相对误差约19%
+BUCKETS_PER_OCTAVE = 4
+
+
+class Histogram:
+    """
+    对数分桶直方图
+
+    只保存各桶计数、总和与极值，内存占用与观测次数无关；分位数返回所在桶的上界。
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self.buckets: Dict[int, int] = {}
+
+    @staticmethod
+    def bucket_index(value: float) -> int:
+        if value <= 0:
+            return -10 ** 6
+        return math.ceil(math.log2(value) * BUCKETS_PER_OCTAVE)
+
+    @staticmethod
+    def bucket_upper_bound(index: int) -> float:
+        return 0.0 if index == -10 ** 6 else 2 ** (index / BUCKETS_PER_OCTAVE)
+
+    def observe(self, value: float) -> None:
+        index = self.bucket_index(value)
+        self.buckets[index] = self.buckets.get(index, 0) + 1
+        self.count += 1
+        self.total += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def quantile(self, q: float) -> float:
+        """返回分位数q（0-1）所在桶的上界，不超过观测到的最大值"""
+        if self.count == 0:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen >= rank:
+                return min(self.bucket_upper_bound(index), self.max)
+        return self.max
+
+    def summary(self) -> Dict[str, float]:
+        return {
+            'count': self.count,
+            'total': self.total,
+            'mean': self.total / self.count if self.count else 0.0,
+            'min': self.min if self.count else 0.0,
+            'max': self.max if self.count else 0.0,
+            'p50': self.quantile(0.5),
+            'p95': self.quantile(0.95),
+            'p99': self.quantile(0.99)
+        }
+
+
+class _Registry:
+    """按名称汇总的直方图集合"""
+
+    def __init__(self):
+        self.enabled = os.environ.get('RISK_INSTRUMENTATION', '').lower() in ('1', 'true', 'yes', 'on')
+        self.histograms: Dict[str, Histogram] = {}
+        # 通过 record() 记录的数值型观测（不是耗时）
+        self.value_names = set()
+        self.lock = threading.Lock()
+
+    def observe(self, name: str, value: float) -> None:
+        with self.lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram()
+            histogram.observe(value)
+
+
+_REGISTRY = _Registry()
+
+
+class _NoopSpan:
+    """关闭时使用的空计时器，不做任何事情"""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def stop(self) -> float:
+        return 0.0
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class Span:
+    """计时区间，结束时把耗时（秒）记录到同名直方图"""
+
+    __slots__ = ('name', 'start', 'elapsed')
+
+    def __init__(self, name: str):
+        self.name = name
+        self.start = time.perf_counter()
+        self.elapsed: Optional[float] = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+        return False
+
+    def stop(self) -> float:
+        """结束计时并记录，重复调用只记录一次"""
+        if self.elapsed is None:
+            self.elapsed = time.perf_counter() - self.start
+            _REGISTRY.observe(self.name, self.elapsed)
+        return self.elapsed
+
+
+def is_enabled() -> bool:
+    return _REGISTRY.enabled
+
+
+def enable() -> None:
+    """开启计时（也可以设置环境变量 RISK_INSTRUMENTATION=1）"""
+    _REGISTRY.enabled = True
+
+
+def disable() -> None:
+    _REGISTRY.enabled = False
+
+
+def span(name: str):
+    """
+    计时区间，用法: with span('model.predict'): ...
+
+    关闭时返回共享的空对象，开销只有一次属性读取。
+    """
+    return Span(name) if _REGISTRY.enabled else _NOOP_SPAN
+
+
+def start(name: str):
+    """开始一个需要手动调用 stop() 结束的计时区间"""
+    return Span(name) if _REGISTRY.enabled else _NOOP_SPAN
+
+
+def timed(name: str):
+    """函数计时装饰器"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _REGISTRY.enabled:
+                return func(*args, **kwargs)
+            with Span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def record(name: str, value: float) -> None:
+    """记录一个数值观测（例如提示词长度）"""
+    if _REGISTRY.enabled:
+        _REGISTRY.value_names.add(name)
+        _REGISTRY.observe(name, value)
+
+
+def snapshot() -> Dict[str, Dict[str, Any]]:
+    """返回各名称直方图的汇总统计"""
+    with _REGISTRY.lock:
+        return {name: histogram.summary() for name, histogram in sorted(_REGISTRY.histograms.items())}
+
+
+def histograms() -> Dict[str, Dict[str, Any]]:
+    """返回各名称直方图的原始分桶（桶上界 -> 计数）"""
+    with _REGISTRY.lock:
+        return {
+            name: {
+                'count': h.count,
+                'sum': h.total,
+                'buckets': [(Histogram.bucket_upper_bound(i), h.buckets[i]) for i in sorted(h.buckets)]
+            }
+            for name, h in sorted(_REGISTRY.histograms.items())
+        }
+
+
+def value_names() -> set:
+    """返回通过 record() 记录的数值型观测名称"""
+    with _REGISTRY.lock:
+        return set(_REGISTRY.value_names)
+
+
+def reset() -> None:
+    """清空所有观测"""
+    with _REGISTRY.lock:
+        _REGISTRY.histograms.clear()
+        _REGISTRY.value_names.clear()
+
+
+def report(unit: float = 1000.0, suffix: str = 'ms') -> str:
+    """生成便于阅读的文本报告（计时默认换算为毫秒，数值型观测保持原值）"""
+    lines = [f"{'名称':<36}{'次数':>8}{'平均':>12}{'p50':>12}{'p95':>12}{'p99':>12}"]
+    for name, stats in snapshot().items():
+        scale = 1.0 if name in _REGISTRY.value_names else unit
+        unit_suffix = '' if scale == 1.0 else suffix
+        lines.append(
+            f"{name:<36}{stats['count']:>8}"
+            + ''.join(f"{stats[key] * scale:>10.2f}{unit_suffix:>2}" for key in ('mean', 'p50', 'p95', 'p99'))
+        )
+    return '\n'.join(lines)
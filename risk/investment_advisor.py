@@ -1,13 +1,20 @@
 import pandas as pd
 import numpy as np
 
+from wealth_simulator import WealthSimulator, horizon_to_months
+from allocation_optimizer import AllocationOptimizer
+from portfolio_backtester import PortfolioBacktester
+
 class InvestmentAdvisor:
     """
     投资建议模块，基于风险评估结果提供投资建议
     整合了Risk_Analysis_and_Investment_Recommendation_System的投资建议功能
     """
     
-    def __init__(self):
+    def __init__(self, optimization_method='mean_variance'):
+        # 个性化配置使用的优化器
+        self.optimizer = AllocationOptimizer(method=optimization_method)
+        
         # 初始化投资建议映射
         self.investment_recommendations = {
             'High': {
@@ -48,15 +55,15 @@ class InvestmentAdvisor:
             }
         }
     
-    def get_investment_recommendation(self, risk_level):
+    def normalize_risk_level(self, risk_level):
         """
-        根据风险等级获取投资建议
+        将中文或土耳其语风险等级转换为英文（High、Medium或Low）
         
         参数:
-        risk_level (str): 风险等级，可以是'High'、'Medium'或'Low'
+        risk_level (str): 风险等级
         
         返回:
-        dict: 包含投资建议的字典
+        str: 转换后的风险等级，无法识别时原样返回
         """
         # 将中文风险等级转换为英文
         risk_mapping = {
@@ -71,9 +78,19 @@ class InvestmentAdvisor:
             'Düşük Risk': 'Low'
         }
         
-        # 如果输入的是中文风险等级，转换为英文
-        if risk_level in risk_mapping:
-            risk_level = risk_mapping[risk_level]
+        return risk_mapping.get(risk_level, risk_level)
+    
+    def get_investment_recommendation(self, risk_level):
+        """
+        根据风险等级获取投资建议
+        
+        参数:
+        risk_level (str): 风险等级，可以是'High'、'Medium'或'Low'
+        
+        返回:
+        dict: 包含投资建议的字典
+        """
+        risk_level = self.normalize_risk_level(risk_level)
         
         # 确保风险等级有效
         if risk_level not in self.investment_recommendations:
@@ -103,6 +120,22 @@ class InvestmentAdvisor:
         base_recommendation = self.get_investment_recommendation(risk_level)
         personalized = base_recommendation.copy()
         
+        # 根据预期收益、协方差和个人约束计算配置比例
+        if base_recommendation['products']:
+            optimization = self.optimizer.optimize(
+                base_recommendation['products'], self.normalize_risk_level(risk_level),
+                age=age, balance=balance, has_loans=has_loans
+            )
+            personalized['products'] = [
+                dict(product, allocation=allocation)
+                for product, allocation in zip(base_recommendation['products'], optimization['allocations'])
+            ]
+            personalized['optimization'] = {
+                'method': optimization['method'],
+                'expected_return': optimization['expected_return'],
+                'volatility': optimization['volatility']
+            }
+        
         # 根据年龄调整
         if age is not None:
             if age > 60 and risk_level == 'High':
@@ -125,6 +158,62 @@ class InvestmentAdvisor:
         
         return personalized
 
+    def project_wealth(self, monthly_savings, investment_horizon=None, initial_wealth=0.0,
+                       risk_levels=('High', 'Medium', 'Low'), n_paths=100000, seed=42):
+        """
+        使用蒙特卡洛模拟预测各风险等级投资组合的财富分布
+        
+        参数:
+        monthly_savings (float): 每月投资金额
+        investment_horizon (str or float, optional): 投资期限选项或年数
+        initial_wealth (float, optional): 初始资金
+        risk_levels (tuple, optional): 需要预测的风险等级
+        n_paths (int, optional): 模拟路径数
+        seed (int, optional): 随机数种子
+        
+        返回:
+        dict: {风险等级: 预测结果}，包含各分位数的财富轨迹和期末统计
+        """
+        portfolios = {
+            level: self.get_investment_recommendation(level)['products']
+            for level in risk_levels
+        }
+        simulator = WealthSimulator(n_paths=n_paths, seed=seed)
+        return simulator.simulate(
+            portfolios,
+            monthly_contribution=monthly_savings,
+            months=horizon_to_months(investment_horizon),
+            initial_wealth=initial_wealth
+        )
+
+    def backtest_portfolios(self, prices, horizon_months=36, rebalance_every=12, monthly_contribution=0.0,
+                            initial_wealth=10000.0, risk_levels=('High', 'Medium', 'Low'), start_step=1):
+        """
+        在历史价格上回测各风险等级的投资组合
+        
+        参数:
+        prices (DataFrame): 日期 x 产品名称 的日价格表，可由 portfolio_backtester.load_product_prices 获取
+        horizon_months (int, optional): 每次回测的月数
+        rebalance_every (int, optional): 再平衡间隔（月），0表示不再平衡
+        monthly_contribution (float, optional): 每月投入金额
+        initial_wealth (float, optional): 初始资金
+        risk_levels (tuple, optional): 需要回测的风险等级
+        start_step (int, optional): 相邻起始月份的间隔
+        
+        返回:
+        dict: 回测结果，包含各组合在所有起始月份上的CAGR、波动率、夏普比率和最大回撤
+        """
+        backtester = PortfolioBacktester(
+            rebalance_every=rebalance_every,
+            monthly_contribution=monthly_contribution,
+            initial_wealth=initial_wealth
+        )
+        portfolios = {
+            level: self.get_investment_recommendation(level)['products']
+            for level in risk_levels
+        }
+        return backtester.run(portfolios, prices, horizon_months=horizon_months, start_step=start_step)
+
 # 测试代码
 if __name__ == "__main__":
     advisor = InvestmentAdvisor()
@@ -1,82 +1,154 @@
 import matplotlib.pyplot as plt
 import matplotlib.font_manager as fm
+import matplotlib
 import os
 import sys
+import json
+import hashlib
 import numpy as np
 
-def setup_chinese_fonts():
+# 中文字体索引缓存，按字体目录的修改时间失效
+FONT_INDEX_PATH = os.path.join(os.path.dirname(__file__), 'cache', 'fonts', 'font_index.json')
+
+
+def get_font_search_config():
     """
-    设置matplotlib中文字体支持
+    返回当前系统的字体目录和候选中文字体名称
     """
-    # 设置通用备用字体（适用于云环境）
-    plt.rcParams['font.sans-serif'] = ['Noto Sans CJK SC', 'Noto Sans CJK JP', 
-                                      'SimHei', 'Microsoft YaHei', 'SimSun', 
-                                      'DejaVu Sans', 'Arial Unicode MS', 
-                                      'sans-serif']
-    plt.rcParams['axes.unicode_minus'] = False  # 解决负号显示问题
-    
-    # 检查系统中文字体
     font_paths = []
-    
+    chinese_fonts = []
+
     # Windows系统字体路径
     if sys.platform.startswith('win'):
         font_paths.append(os.path.join(os.environ['WINDIR'], 'Fonts'))
-        chinese_fonts = ['SimHei', 'Microsoft YaHei', 'SimSun', 'FangSong', 'KaiTi', 'NSimSun', 
+        chinese_fonts = ['SimHei', 'Microsoft YaHei', 'SimSun', 'FangSong', 'KaiTi', 'NSimSun',
                          'Microsoft JhengHei', 'DengXian', 'DFKai-SB']
-    
+
     # Linux系统字体路径
     elif sys.platform.startswith('linux'):
         font_paths.extend(['/usr/share/fonts', '/usr/local/share/fonts', os.path.expanduser('~/.fonts')])
-        chinese_fonts = ['WenQuanYi Micro Hei', 'WenQuanYi Zen Hei', 'AR PL UMing CN', 
+        chinese_fonts = ['WenQuanYi Micro Hei', 'WenQuanYi Zen Hei', 'AR PL UMing CN',
                          'Noto Sans CJK SC', 'Noto Sans CJK TC', 'Noto Sans CJK JP']
-    
+
     # macOS系统字体路径
     elif sys.platform == 'darwin':
         font_paths.append('/Library/Fonts')
         font_paths.append('/System/Library/Fonts')
         font_paths.append(os.path.expanduser('~/Library/Fonts'))
-        chinese_fonts = ['PingFang SC', 'Heiti SC', 'STHeiti', 'STSong', 'Hiragino Sans GB', 
+        chinese_fonts = ['PingFang SC', 'Heiti SC', 'STHeiti', 'STSong', 'Hiragino Sans GB',
                          'Apple LiGothic', 'Apple LiSung']
-    
-    # 查找可用的中文字体
+
+    return font_paths, chinese_fonts
+
+
+def font_dirs_signature(font_paths):
+    """
+    计算字体目录的签名：各级目录的修改时间（增删字体文件会改变所在目录的修改时间）
+    """
+    digest = hashlib.sha256()
+    for font_path in font_paths:
+        if not os.path.exists(font_path):
+            continue
+        for root, dirs, _ in os.walk(font_path):
+            dirs.sort()
+            digest.update(f"{root}\0{os.stat(root).st_mtime_ns}\n".encode('utf-8', 'surrogateescape'))
+    return digest.hexdigest()
+
+
+def discover_chinese_fonts(font_paths, chinese_fonts, index_path=FONT_INDEX_PATH):
+    """
+    查找可用的中文字体，结果写入磁盘索引，字体目录未变化时直接读取索引
+
+    参数:
+    - font_paths: 字体目录列表
+    - chinese_fonts: 候选中文字体名称
+    - index_path: 索引文件路径
+
+    返回:
+    - [(字体文件路径, 字体名称), ...]
+    """
+    signature = font_dirs_signature(font_paths)
+    key = {
+        'signature': signature,
+        'font_paths': list(font_paths),
+        'chinese_fonts': list(chinese_fonts),
+        'matplotlib': matplotlib.__version__
+    }
+
+    try:
+        with open(index_path, 'r', encoding='utf-8') as f:
+            index = json.load(f)
+        if index.get('key') == key:
+            return [tuple(item) for item in index['fonts']]
+    except (OSError, ValueError, KeyError):
+        pass
+
+    # 每个字体文件只解析一次名称
     available_fonts = []
     for font_path in font_paths:
         if os.path.exists(font_path):
             for font in fm.findSystemFonts(font_path):
                 try:
                     font_name = fm.FontProperties(fname=font).get_name()
-                    if any(chinese_font in font_name for chinese_font in chinese_fonts):
-                        available_fonts.append(font)
-                except:
+                except Exception:
                     continue
-    
+                if any(chinese_font in font_name for chinese_font in chinese_fonts):
+                    available_fonts.append((font, font_name))
+    available_fonts.sort()
+
+    try:
+        os.makedirs(os.path.dirname(index_path), exist_ok=True)
+        tmp_path = f"{index_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'key': key, 'fonts': available_fonts}, f, ensure_ascii=False)
+        os.replace(tmp_path, index_path)
+    except OSError as e:
+        print(f"写入字体索引失败: {e}")
+
+    return available_fonts
+
+
+def setup_chinese_fonts():
+    """
+    设置matplotlib中文字体支持
+    """
+    # 设置通用备用字体（适用于云环境）
+    plt.rcParams['font.sans-serif'] = ['Noto Sans CJK SC', 'Noto Sans CJK JP',
+                                      'SimHei', 'Microsoft YaHei', 'SimSun',
+                                      'DejaVu Sans', 'Arial Unicode MS',
+                                      'sans-serif']
+    plt.rcParams['axes.unicode_minus'] = False  # 解决负号显示问题
+
+    # 查找可用的中文字体（使用磁盘索引）
+    font_paths, chinese_fonts = get_font_search_config()
+    available_fonts = discover_chinese_fonts(font_paths, chinese_fonts)
+
     # 设置找到的第一个中文字体
     if available_fonts:
         # 优先选择黑体或雅黑字体
-        preferred_fonts = [f for f in available_fonts if 'SimHei' in fm.FontProperties(fname=f).get_name() 
-                          or 'YaHei' in fm.FontProperties(fname=f).get_name()]
-        
+        preferred_fonts = [name for _, name in available_fonts if 'SimHei' in name or 'YaHei' in name]
+
         if preferred_fonts:
-            selected_font = preferred_fonts[0]
+            selected_name = preferred_fonts[0]
         else:
-            selected_font = available_fonts[0]
-            
+            selected_name = available_fonts[0][1]
+
         # 设置matplotlib字体
-        plt.rcParams['font.family'] = fm.FontProperties(fname=selected_font).get_name()
+        plt.rcParams['font.family'] = selected_name
         plt.rcParams['axes.unicode_minus'] = False  # 解决负号显示问题
-        
+
         # 设置seaborn字体
         try:
             import seaborn as sns
-            sns.set(font=fm.FontProperties(fname=selected_font).get_name())
+            sns.set(font=selected_name)
         except:
             pass
-            
-        print(f"已设置中文字体: {fm.FontProperties(fname=selected_font).get_name()}")
+
+        print(f"已设置中文字体: {selected_name}")
         return True
     else:
         print("未找到本地中文字体，使用备用字体")
         return True
 
 if __name__ == "__main__":
-    setup_chinese_fonts()
\ No newline at end of file
+    setup_chinese_fonts()
@@ -0,0 +1,216 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+import contextlib
+from typing import Dict, Any, List, Optional, Sequence
+
+from metrics import CACHE_REQUESTS
+
+# 成员特征库的默认路径
+MEMBER_STORE_PATH = os.path.join(os.path.dirname(__file__), 'cache', 'member_store.sqlite')
+
+# 参与风险评估的成员字段及缺省值，与 FamilyRiskClassifier.classify_risk_levels 一致
+FEATURE_DEFAULTS = {
+    'age': 35,
+    'balance': 0,
+    'loan': 'no',
+    'housing': 'no',
+    'job': 'unknown',
+    'marital': 'unknown',
+    'education': 'unknown'
+}
+
+# SQLite 单条语句的参数上限（旧版本为999）
+_MAX_VARIABLES = 900
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS member_features (
+    member_key TEXT PRIMARY KEY,
+    input_hash TEXT NOT NULL,
+    model_version TEXT NOT NULL,
+    features TEXT NOT NULL,
+    result TEXT NOT NULL,
+    updated_at REAL NOT NULL
+)
+"""
+
+
+def normalize_member(member: Dict[str, Any]) -> Dict[str, Any]:
+    """提取参与评估的字段，贷款字段统一为 'yes'/'no'"""
+    normalized = {}
+    for field, default in FEATURE_DEFAULTS.items():
+        value = member.get(field, default)
+        if field in ('loan', 'housing'):
+            value = 'yes' if (value.lower() == 'yes' if isinstance(value, str) else bool(value)) else 'no'
+        elif hasattr(value, 'item'):
+            value = value.item()
+        normalized[field] = value
+    return normalized
+
+
+def input_hash(member: Dict[str, Any]) -> str:
+    """成员评估输入的摘要，输入不变时摘要不变"""
+    payload = json.dumps(normalize_member(member), sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:16]
+
+
+class SQLiteStore:
+    """
+    SQLite存储的基类
+
+    每次操作使用独立的连接并在一个事务中执行，多个线程（Streamlit会话）和进程可以共享同一个文件；
+    ':memory:' 时所有操作共用一个加锁的连接。子类通过 SCHEMA 定义表结构。
+    """
+
+    SCHEMA = ""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._memory = None
+        if self.path == ':memory:':
+            # 内存数据库只能通过同一个连接访问
+            self._memory = sqlite3.connect(':memory:', check_same_thread=False)
+            self._memory.execute("PRAGMA foreign_keys=ON")
+        else:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with self._connect() as conn:
+            if self._memory is None:
+                conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(self.SCHEMA)
+
+    @contextlib.contextmanager
+    def _connect(self):
+        if self._memory is not None:
+            with self._lock, self._memory:
+                yield self._memory
+            return
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute("PRAGMA foreign_keys=ON")
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+
+class MemberStore(SQLiteStore):
+    """
+    家庭成员特征库
+
+    按成员保存编码后的特征、各模型的风险等级、类别概率和置信度，以及评估时的输入摘要和模型版本。
+    页面读取预先计算的结果，只有输入或模型版本发生变化的成员才重新评估（一次批量评估）。
+    数据保存在SQLite中，进程重启和会话结束后仍然有效，多个进程可以共享同一个文件。
+    """
+
+    SCHEMA = _SCHEMA
+
+    def __init__(self, path: Optional[str] = None):
+        """
+        参数:
+        - path: SQLite文件路径，默认为 MEMBER_STORE_PATH；':memory:' 表示只在内存中保存
+        """
+        super().__init__(path or MEMBER_STORE_PATH)
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM member_features").fetchone()[0]
+
+    def _rows(self, conn, keys: Sequence[str]) -> Dict[str, tuple]:
+        rows = {}
+        unique = list(dict.fromkeys(keys))
+        for start in range(0, len(unique), _MAX_VARIABLES):
+            chunk = unique[start:start + _MAX_VARIABLES]
+            query = ("SELECT member_key, input_hash, model_version, features, result FROM member_features "
+                     f"WHERE member_key IN ({','.join('?' * len(chunk))})")
+            for row in conn.execute(query, chunk):
+                rows[row[0]] = row[1:]
+        return rows
+
+    def get(self, member_key: str) -> Optional[Dict[str, Any]]:
+        """读取成员保存的记录，不存在时返回None"""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT input_hash, model_version, features, result, updated_at FROM member_features "
+                "WHERE member_key = ?", (member_key,)).fetchone()
+        if row is None:
+            return None
+        return {
+            'member_key': member_key,
+            'input_hash': row[0],
+            'model_version': row[1],
+            'features': json.loads(row[2]),
+            'result': json.loads(row[3]),  # 风险等级、置信度和各模型的类别概率
+            'updated_at': row[4]
+        }
+
+    def score(self, classifier, members: List[Dict[str, Any]],
+              keys: Optional[Sequence[str]] = None) -> List[Dict[str, Any]]:
+        """
+        读取成员的风险评估结果，缺失或过期的成员重新评估并写回
+
+        参数:
+        - classifier: FamilyRiskClassifier，使用其 model_version 判断结果是否过期
+        - members: 成员字典列表，可以包含评估字段以外的键（如姓名）
+        - keys: 成员键，默认使用成员的 'member_id' 或 'name'
+
+        返回:
+        - 与 members 顺序一致的评估结果，格式同 classify_risk_levels(details=True)
+        """
+        if len(members) == 0:
+            return []
+        if keys is None:
+            keys = [str(member.get('member_id', member.get('name'))) for member in members]
+        if len(keys) != len(members):
+            raise ValueError("keys 与 members 的数量不一致")
+
+        model_version = classifier.model_version
+        hashes = [input_hash(member) for member in members]
+        with self._connect() as conn:
+            rows = self._rows(conn, keys)
+
+        results: List[Optional[Dict[str, Any]]] = [None] * len(members)
+        stale = []
+        for i, (key, digest) in enumerate(zip(keys, hashes)):
+            row = rows.get(key)
+            if row is not None and row[0] == digest and row[1] == model_version:
+                results[i] = dict(json.loads(row[3]), features=json.loads(row[2]))
+            else:
+                stale.append(i)
+
+        self.hits += len(members) - len(stale)
+        self.misses += len(stale)
+        CACHE_REQUESTS.inc(len(members) - len(stale), cache='member_store', result='hit')
+        CACHE_REQUESTS.inc(len(stale), cache='member_store', result='miss')
+        if not stale:
+            return results
+
+        # 过期的成员一次批量评估
+        scored = classifier.classify_risk_levels([normalize_member(members[i]) for i in stale], details=True)
+        now = time.time()
+        records = {}
+        for i, result in zip(stale, scored):
+            results[i] = result
+            labels = {name: value for name, value in result.items() if name != 'features'}
+            records[keys[i]] = (keys[i], hashes[i], model_version,
+                                json.dumps(result['features'], ensure_ascii=False),
+                                json.dumps(labels, ensure_ascii=False), now)
+        with self._connect() as conn:
+            conn.executemany("INSERT OR REPLACE INTO member_features VALUES (?, ?, ?, ?, ?, ?)",
+                             list(records.values()))
+        return results
+
+    def delete(self, member_keys: Sequence[str]) -> None:
+        """删除成员记录"""
+        with self._connect() as conn:
+            conn.executemany("DELETE FROM member_features WHERE member_key = ?", [(key,) for key in member_keys])
+
+    def clear(self) -> None:
+        """删除所有记录"""
+        with self._connect() as conn:
+            conn.execute("DELETE FROM member_features")
@@ -0,0 +1,231 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Tuple, Optional
+
+import instrumentation
+
+# Prometheus 文本格式的Content-Type
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + '}'
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    """带标签的指标，每组标签值对应一个样本"""
+
+    type_name = 'untyped'
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, object]) -> Tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"指标 {self.name} 需要标签 {self.labelnames}，实际为 {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def value(self, **labels) -> float:
+        """返回某组标签的当前值（未记录时为0）"""
+        return self._values.get(self._key(labels), 0.0)
+
+    def samples(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            yield self.name, dict(zip(self.labelnames, key)), value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+
+class Counter(_Metric):
+    """只增不减的计数器"""
+
+    type_name = 'counter'
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        if amount < 0:
+            raise ValueError("计数器只能增加")
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+
+class Gauge(_Metric):
+    """可任意设置的仪表值"""
+
+    type_name = 'gauge'
+
+    def set(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+
+class MetricsRegistry:
+    """
+    指标注册表
+
+    汇总计数器、仪表值以及 instrumentation 模块的耗时直方图，按Prometheus文本格式输出。
+    """
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                if type(existing) is not type(metric) or existing.labelnames != metric.labelnames:
+                    raise ValueError(f"指标 {metric.name} 已以不同的类型或标签注册")
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def get(self, name: str) -> Optional[_Metric]:
+        return self._metrics.get(name)
+
+    def clear(self) -> None:
+        """清空所有样本（保留已注册的指标）"""
+        for metric in list(self._metrics.values()):
+            metric.clear()
+
+    def render(self) -> str:
+        """生成Prometheus文本格式的指标数据"""
+        lines = []
+        for name in sorted(self._metrics):
+            metric = self._metrics[name]
+            lines.append(f"# HELP {name} {metric.documentation}")
+            lines.append(f"# TYPE {name} {metric.type_name}")
+            for sample_name, labels, value in metric.samples():
+                lines.append(f"{sample_name}{_format_labels(labels)} {_format_value(value)}")
+        lines.extend(self._render_histograms())
+        return '\n'.join(lines) + '\n'
+
+    @staticmethod
+    def _render_histograms():
+        """把 instrumentation 的对数分桶直方图转换为累计分桶（仅在开启计时后有数据）"""
+        families = {
+            'risk_span_duration_seconds': ('span', "计时区间耗时（秒）", []),
+            'risk_observation': ('name', "数值型观测，例如提示词长度", [])
+        }
+        value_names = instrumentation.value_names()
+        for name, data in instrumentation.histograms().items():
+            family = 'risk_observation' if name in value_names else 'risk_span_duration_seconds'
+            families[family][2].append((name, data))
+
+        lines = []
+        for family, (label, documentation, series) in families.items():
+            if not series:
+                continue
+            lines.append(f"# HELP {family} {documentation}")
+            lines.append(f"# TYPE {family} histogram")
+            for name, data in series:
+                cumulative = 0
+                for upper_bound, count in data['buckets']:
+                    cumulative += count
+                    labels = _format_labels({label: name, 'le': _format_value(upper_bound)})
+                    lines.append(f"{family}_bucket{labels} {cumulative}")
+                lines.append(f"{family}_bucket{_format_labels({label: name, 'le': '+Inf'})} {data['count']}")
+                lines.append(f"{family}_sum{_format_labels({label: name})} {_format_value(data['sum'])}")
+                lines.append(f"{family}_count{_format_labels({label: name})} {data['count']}")
+        return lines
+
+
+# 进程内共享的注册表
+REGISTRY = MetricsRegistry()
+
+# 风险分类器
+CLASSIFIER_CALLS = REGISTRY.counter(
+    'risk_classifier_calls_total', "风险评估调用次数（一次批量评估计为一次）", ('model_version',))
+CLASSIFIER_MEMBERS = REGISTRY.counter(
+    'risk_classifier_members_total', "评估的家庭成员数量", ('model_version', 'method'))
+MODEL_LOADED = REGISTRY.gauge(
+    'risk_model_loaded_timestamp_seconds', "模型版本最近一次加载或保存的时间", ('model_version',))
+
+# 外部金融数据API
+FINANCIAL_API_REQUESTS = REGISTRY.counter(
+    'financial_api_requests_total', "金融数据API请求次数", ('endpoint', 'status'))
+
+# 大语言模型
+LLM_REQUESTS = REGISTRY.counter('llm_requests_total', "AI聊天请求次数", ('status',))
+LLM_TOKENS = REGISTRY.counter('llm_tokens_total', "消耗的AI令牌数量", ('type',))
+AI_RISK_ANALYSES = REGISTRY.counter(
+    'ai_risk_analyses_total', "深度风险分析次数（source=ai 调用大模型，template 使用模板解释）", ('source',))
+
+# 缓存
+CACHE_REQUESTS = REGISTRY.counter('cache_requests_total', "缓存查询次数", ('cache', 'result'))
+
+# 微批处理
+INFERENCE_BATCHES = REGISTRY.counter('inference_batches_total', "微批处理执行的批次数")
+INFERENCE_BATCH_ITEMS = REGISTRY.counter('inference_batch_items_total', "微批处理评估的请求数")
+
+
+def render() -> str:
+    """返回共享注册表的Prometheus文本"""
+    return REGISTRY.render()
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split('?')[0] not in ('/', '/metrics'):
+            self.send_error(404)
+            return
+        body = render().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', CONTENT_TYPE)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_http_server(port: int, addr: str = '127.0.0.1') -> ThreadingHTTPServer:
+    """
+    在后台线程中启动指标抓取端点（GET /metrics），供没有HTTP服务的进程（如Streamlit应用）使用
+
+    参数:
+    - port: 监听端口，0 表示随机端口
+    - addr: 监听地址，默认只监听本机
+
+    返回:
+    - HTTP服务器实例，可通过 server.server_address 获取实际端口，调用 shutdown() 停止
+    """
+    server = ThreadingHTTPServer((addr, port), _MetricsHandler)
+    thread = threading.Thread(target=server.serve_forever, name='metrics-server', daemon=True)
+    thread.start()
+    return server
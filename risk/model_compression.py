@@ -0,0 +1,413 @@
+import os
+import io
+import json
+import time
+import pickle
+import argparse
+from typing import Dict, Any, List, Optional, Sequence
+
+import numpy as np
+from sklearn.model_selection import train_test_split
+
+from dataset_loader import file_sha256
+
+# 压缩后的随机森林文件名（与其他模型放在同一目录）
+COMPACT_RF_FILE = 'rf_compact.npz'
+
+# 叶节点概率量化为 0-255 的整数
+PROBA_SCALE = 255
+
+# 节点数组，save_arrays 时各自保存为一个.npy文件
+NODE_ARRAYS = ('feature', 'threshold', 'children_left', 'children_right', 'leaf_proba', 'roots')
+
+
+# rf_model.pkl 的哈希缓存：{路径: (修改时间, 大小, 哈希)}
+_SHA256_CACHE: Dict[str, tuple] = {}
+
+
+def _file_sha256(path: str) -> str:
+    """计算文件的SHA-256哈希，修改时间和大小不变时直接使用缓存的结果"""
+    stat = os.stat(path)
+    key = os.path.abspath(path)
+    cached = _SHA256_CACHE.get(key)
+    if cached is not None and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+        return cached[2]
+    digest = file_sha256(path)
+    _SHA256_CACHE[key] = (stat.st_mtime_ns, stat.st_size, digest)
+    return digest
+
+
+def _smallest_int_dtype(max_value: int, signed: bool = True):
+    for dtype in ((np.int8, np.int16, np.int32) if signed else (np.uint8, np.uint16, np.uint32)):
+        if max_value <= np.iinfo(dtype).max:
+            return dtype
+    return np.int64
+
+
+class CompactForest:
+    """
+    压缩后的随机森林
+
+    所有树的节点保存在连续的numpy数组中：特征索引使用最小的整数类型，阈值使用float32，
+    叶节点的类别概率量化为uint8。预测时对所有样本和所有树同时向下遍历，
+    结果与 sklearn 的随机森林一样取各树概率的平均值。
+    """
+
+    def __init__(self, feature: np.ndarray, threshold: np.ndarray,
+                 children_left: np.ndarray, children_right: np.ndarray,
+                 leaf_proba: np.ndarray, roots: np.ndarray, classes: np.ndarray,
+                 n_features: int, max_depth: int, metadata: Optional[Dict[str, str]] = None):
+        self.feature = feature
+        self.threshold = threshold
+        self.children_left = children_left
+        self.children_right = children_right
+        self.leaf_proba = leaf_proba
+        self.roots = roots
+        self.classes_ = classes
+        self.n_features_in_ = int(n_features)
+        self.max_depth = int(max_depth)
+        self.metadata = dict(metadata or {})
+
+    @property
+    def n_estimators(self) -> int:
+        return len(self.roots)
+
+    @classmethod
+    def from_forest(cls, forest, tree_indices: Optional[Sequence[int]] = None) -> "CompactForest":
+        """
+        从训练好的 RandomForestClassifier 构建
+
+        参数:
+        - forest: sklearn 随机森林
+        - tree_indices: 保留的树，默认为全部
+        """
+        estimators = forest.estimators_
+        if tree_indices is None:
+            tree_indices = range(len(estimators))
+
+        features, thresholds, lefts, rights, probas, roots = [], [], [], [], [], []
+        offset = 0
+        max_depth = 0
+        for index in tree_indices:
+            tree = estimators[index].tree_
+            is_leaf = tree.children_left < 0
+            features.append(np.where(is_leaf, -1, tree.feature))
+            thresholds.append(tree.threshold)
+            # 子节点编号加上本树的偏移量；叶节点的子节点指向自身
+            node_ids = np.arange(tree.node_count) + offset
+            lefts.append(np.where(is_leaf, node_ids, tree.children_left + offset))
+            rights.append(np.where(is_leaf, node_ids, tree.children_right + offset))
+            value = tree.value[:, 0, :]
+            probas.append(value / value.sum(axis=1, keepdims=True))
+            roots.append(offset)
+            offset += tree.node_count
+            max_depth = max(max_depth, tree.max_depth)
+
+        index_dtype = _smallest_int_dtype(offset, signed=False)
+        return cls(
+            feature=np.concatenate(features).astype(_smallest_int_dtype(forest.n_features_in_)),
+            threshold=np.concatenate(thresholds).astype(np.float32),
+            children_left=np.concatenate(lefts).astype(index_dtype),
+            children_right=np.concatenate(rights).astype(index_dtype),
+            leaf_proba=np.rint(np.concatenate(probas) * PROBA_SCALE).astype(np.uint8),
+            roots=np.asarray(roots, dtype=index_dtype),
+            classes=np.asarray(forest.classes_),
+            n_features=forest.n_features_in_,
+            max_depth=max_depth
+        )
+
+    def apply(self, X) -> np.ndarray:
+        """返回每个样本在每棵树中到达的叶节点编号，形状为 (样本数, 树数)"""
+        X = np.asarray(X, dtype=np.float32)
+        rows = np.arange(len(X))[:, None]
+        nodes = np.broadcast_to(self.roots.astype(np.int64), (len(X), len(self.roots))).copy()
+        for _ in range(self.max_depth):
+            feature = self.feature[nodes]
+            internal = feature >= 0
+            if not internal.any():
+                break
+            go_left = X[rows, np.where(internal, feature, 0)] <= self.threshold[nodes]
+            nodes = np.where(go_left, self.children_left[nodes], self.children_right[nodes])
+        return nodes
+
+    def predict_proba(self, X) -> np.ndarray:
+        leaves = self.apply(X)
+        proba = self.leaf_proba[leaves].sum(axis=1, dtype=np.float64)
+        return proba / (PROBA_SCALE * self.n_estimators)
+
+    def predict(self, X) -> np.ndarray:
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+
+    def save(self, path: str) -> None:
+        """保存为压缩的npz文件（原子替换）"""
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            np.savez_compressed(
+                f,
+                feature=self.feature, threshold=self.threshold,
+                children_left=self.children_left, children_right=self.children_right,
+                leaf_proba=self.leaf_proba, roots=self.roots, classes=self.classes_,
+                shape=np.array([self.n_features_in_, self.max_depth]),
+                metadata_keys=np.array(list(self.metadata.keys()), dtype=str),
+                metadata_values=np.array(list(self.metadata.values()), dtype=str)
+            )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "CompactForest":
+        with np.load(path, allow_pickle=False) as data:
+            n_features, max_depth = data['shape'].tolist()
+            return cls(
+                feature=data['feature'], threshold=data['threshold'],
+                children_left=data['children_left'], children_right=data['children_right'],
+                leaf_proba=data['leaf_proba'], roots=data['roots'], classes=data['classes'],
+                n_features=n_features, max_depth=max_depth,
+                metadata=dict(zip(data['metadata_keys'].tolist(), data['metadata_values'].tolist()))
+            )
+
+
+    def save_arrays(self, directory: str) -> None:
+        """
+        把节点数组分别保存为未压缩的.npy文件
+
+        与 save 的压缩文件不同，这些文件可以由 load_arrays 以内存映射方式打开，
+        同一台机器上的多个进程共享操作系统页缓存中的同一份数据。
+        """
+        os.makedirs(directory, exist_ok=True)
+        for name in NODE_ARRAYS:
+            np.save(os.path.join(directory, f"{name}.npy"), getattr(self, name))
+        np.save(os.path.join(directory, 'classes.npy'), self.classes_, allow_pickle=False)
+        with open(os.path.join(directory, 'forest.json'), 'w', encoding='utf-8') as f:
+            json.dump({'n_features': self.n_features_in_, 'max_depth': self.max_depth,
+                       'metadata': self.metadata}, f, ensure_ascii=False)
+
+    @classmethod
+    def load_arrays(cls, directory: str, mmap_mode: Optional[str] = 'r') -> "CompactForest":
+        """读取 save_arrays 保存的压缩森林，mmap_mode 为None时完整读入内存"""
+        with open(os.path.join(directory, 'forest.json'), 'r', encoding='utf-8') as f:
+            info = json.load(f)
+        arrays = {name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode=mmap_mode)
+                  for name in NODE_ARRAYS}
+        return cls(**arrays, classes=np.load(os.path.join(directory, 'classes.npy')),
+                   n_features=info['n_features'], max_depth=info['max_depth'], metadata=info['metadata'])
+
+
+def load_compact_forest(model_path: str) -> Optional[CompactForest]:
+    """
+    加载模型目录中的压缩随机森林
+
+    只有当压缩文件由当前的 rf_model.pkl 生成时才返回（重新训练后旧的压缩文件自动失效），否则返回None。
+    """
+    compact_path = os.path.join(model_path, COMPACT_RF_FILE)
+    source_path = os.path.join(model_path, 'rf_model.pkl')
+    if not os.path.exists(compact_path) or not os.path.exists(source_path):
+        return None
+    try:
+        forest = CompactForest.load(compact_path)
+    except (OSError, ValueError, KeyError) as e:
+        print(f"加载压缩模型失败: {e}")
+        return None
+    if forest.metadata.get('source_sha256') != _file_sha256(source_path):
+        return None
+    return forest
+
+
+def validation_set(classifier, data):
+    """
+    按训练时相同的方式划分出测试集，再用 split_holdout 分层地对半分为选择集（即训练时的校准集）和评估集
+
+    选择集用于挑选保留的树，评估集只用于报告准确率，避免在挑选时用过的数据上评估而高估压缩后的准确率。
+
+    返回:
+    - (X_select, y_select, X_eval, y_eval)，特征已编码，风险等级已编码
+    """
+    data = data[classifier.feature_names].copy()
+    processed = classifier.assign_risk_levels(classifier.preprocess_data(data))
+    y = classifier.risk_encoder.transform(processed.pop('risk_level'))
+    _, X_test, _, y_test = train_test_split(processed, y, test_size=0.3, random_state=42)
+    X_select, X_eval, y_select, y_eval = classifier.split_holdout(X_test, y_test)
+    return X_select, y_select, X_eval, y_eval
+
+
+def select_trees(forest, X, y, tolerance: float = 0.005, min_trees: int = 1) -> List[int]:
+    """
+    贪心地选择树：每次加入使组合准确率最高的一棵树，
+    直到准确率不低于原森林准确率减去 tolerance
+
+    参数:
+    - forest: sklearn 随机森林
+    - X, y: 验证数据
+    - tolerance: 允许的准确率下降
+    - min_trees: 最少保留的树数量
+
+    返回:
+    - 选中的树的索引（按加入顺序）
+    """
+    X = np.asarray(X, dtype=np.float32)
+    y_index = np.searchsorted(forest.classes_, y)
+    per_tree = np.stack([tree.predict_proba(X) for tree in forest.estimators_])
+    target = (np.argmax(per_tree.mean(axis=0), axis=1) == y_index).mean() - tolerance
+
+    selected: List[int] = []
+    total = np.zeros(per_tree.shape[1:])
+    remaining = np.ones(len(per_tree), dtype=bool)
+    while remaining.any():
+        candidates = np.flatnonzero(remaining)
+        scores = (np.argmax(total[None] + per_tree[candidates], axis=2) == y_index[None]).mean(axis=1)
+        best = candidates[int(np.argmax(scores))]
+        selected.append(int(best))
+        remaining[best] = False
+        total += per_tree[best]
+        if len(selected) >= min_trees and scores.max() >= target:
+            break
+    return selected
+
+
+def _timed_load(path: str, loader, repeat: int = 3) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        loader(path)
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def _timed_predict(model, X, repeat: int = 5) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        model.predict(X)
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def compress_random_forest(classifier, data, tolerance: float = 0.005,
+                           min_trees: int = 1, save: bool = True) -> Dict[str, Any]:
+    """
+    压缩分类器的随机森林模型并生成对比报告
+
+    参数:
+    - classifier: 已加载模型的 FamilyRiskClassifier
+    - data: 训练用的数据集（用于重建选择集和评估集，见 validation_set）
+    - tolerance: 允许的准确率下降
+    - min_trees: 最少保留的树数量
+    - save: 是否把压缩模型写入模型目录
+
+    返回:
+    - 报告字典: original/compact 两部分，各含树数量、文件大小、加载时间、预测耗时和评估集上的准确率
+    """
+    forest = classifier.rf_model
+    if forest is None or not hasattr(forest, 'estimators_'):
+        raise ValueError("没有可压缩的随机森林模型")
+
+    source_path = os.path.join(classifier.model_path, 'rf_model.pkl')
+    X_select, y_select, X_eval, y_eval = validation_set(classifier, data)
+
+    trees = select_trees(forest, X_select, y_select, tolerance=tolerance, min_trees=min_trees)
+    compact = CompactForest.from_forest(forest, trees)
+    if os.path.exists(source_path):
+        compact.metadata['source_sha256'] = _file_sha256(source_path)
+
+    compact_path = os.path.join(classifier.model_path, COMPACT_RF_FILE)
+    if not save:
+        compact_path = os.path.join(classifier.model_path, f".{COMPACT_RF_FILE}.report.tmp")
+    compact.save(compact_path)
+
+    def load_pickle(path):
+        with open(path, 'rb') as f:
+            return pickle.load(f)
+
+    if os.path.exists(source_path):
+        original_size = os.path.getsize(source_path)
+        original_load = _timed_load(source_path, load_pickle)
+    else:
+        buffer = io.BytesIO()
+        pickle.dump(forest, buffer)
+        original_size = buffer.tell()
+        original_load = None
+
+    X_values = np.asarray(X_eval, dtype=np.float32)
+    original_pred = forest.predict(X_values)
+    compact_pred = compact.predict(X_values)
+    report = {
+        'tolerance': tolerance,
+        'selection_rows': len(y_select),
+        'validation_rows': len(y_eval),
+        'original': {
+            'n_trees': len(forest.estimators_),
+            'size_bytes': original_size,
+            'load_seconds': original_load,
+            'predict_seconds': _timed_predict(forest, X_values),
+            'accuracy': float((original_pred == y_eval).mean())
+        },
+        'compact': {
+            'n_trees': compact.n_estimators,
+            'size_bytes': os.path.getsize(compact_path),
+            'load_seconds': _timed_load(compact_path, CompactForest.load),
+            'predict_seconds': _timed_predict(compact, X_values),
+            'accuracy': float((compact_pred == y_eval).mean())
+        },
+        'agreement': float((original_pred == compact_pred).mean()),
+        'path': compact_path if save else None
+    }
+    if not save:
+        os.remove(compact_path)
+    return report
+
+
+def format_report(report: Dict[str, Any]) -> str:
+    """把压缩报告格式化为对比表"""
+    original, compact = report['original'], report['compact']
+
+    def seconds(value):
+        return '-' if value is None else f"{value * 1000:.1f}ms"
+
+    def ratio(a, b):
+        return '-' if not a or not b else f"{a / b:.1f}x"
+
+    rows = [
+        ('树数量', str(original['n_trees']), str(compact['n_trees']), ratio(original['n_trees'], compact['n_trees'])),
+        ('文件大小', f"{original['size_bytes'] / 1024:.0f}KB", f"{compact['size_bytes'] / 1024:.0f}KB",
+         ratio(original['size_bytes'], compact['size_bytes'])),
+        ('加载时间', seconds(original['load_seconds']), seconds(compact['load_seconds']),
+         ratio(original['load_seconds'], compact['load_seconds'])),
+        (f"预测耗时({report['validation_rows']}行)", seconds(original['predict_seconds']),
+         seconds(compact['predict_seconds']), ratio(original['predict_seconds'], compact['predict_seconds'])),
+        ('评估集准确率', f"{original['accuracy']:.4f}", f"{compact['accuracy']:.4f}",
+         f"{compact['accuracy'] - original['accuracy']:+.4f}")
+    ]
+    lines = [f"{'指标':<16}{'原模型':>12}{'压缩模型':>12}{'对比':>10}"]
+    lines.extend(f"{name:<16}{a:>12}{b:>12}{c:>10}" for name, a, b, c in rows)
+    lines.append(f"预测一致率: {report['agreement']:.4f}（选择集 {report['selection_rows']} 行，"
+                 f"评估集 {report['validation_rows']} 行）")
+    return '\n'.join(lines)
+
+
+def main():
+    """命令行压缩随机森林模型"""
+    from dataset_loader import DATASET_PATH, load_dataset
+    from risk_classifier import FamilyRiskClassifier
+
+    parser = argparse.ArgumentParser(description="压缩随机森林模型（剪枝并量化）")
+    parser.add_argument('--model-path', help="模型目录，默认为 risk/models")
+    parser.add_argument('--dataset', default=DATASET_PATH, help="训练数据集，用于选择保留的树并评估压缩后的准确率")
+    parser.add_argument('--tolerance', type=float, default=0.005, help="允许的准确率下降，默认0.005")
+    parser.add_argument('--min-trees', type=int, default=1, help="最少保留的树数量")
+    parser.add_argument('--dry-run', action='store_true', help="只生成报告，不写入压缩模型")
+    args = parser.parse_args()
+
+    classifier = FamilyRiskClassifier(auto_init=False)
+    if args.model_path:
+        classifier.model_path = args.model_path
+    if not classifier.load_models(use_compact=False):
+        raise SystemExit("没有找到训练好的模型")
+
+    report = compress_random_forest(classifier, load_dataset(args.dataset), tolerance=args.tolerance,
+                                    min_trees=args.min_trees, save=not args.dry_run)
+    print(format_report(report))
+    if report['path']:
+        print(f"压缩模型已保存到 {report['path']}")
+
+
+if __name__ == "__main__":
+    main()
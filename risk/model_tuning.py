@@ -0,0 +1,188 @@
+import time
+import argparse
+from typing import Dict, Any, List, Optional, Sequence
+
+import numpy as np
+from joblib import effective_n_jobs
+from sklearn.experimental import enable_halving_search_cv  # noqa: F401
+from sklearn.model_selection import HalvingGridSearchCV, StratifiedKFold
+
+# 默认的搜索空间，未列出的参数使用 FamilyRiskClassifier._build_model 中的默认值
+PARAM_GRIDS = {
+    'dt': {
+        'max_depth': [3, 4, 6, 8, 12, None],
+        'min_samples_leaf': [1, 5, 20],
+        'criterion': ['gini', 'entropy']
+    },
+    'rf': {
+        'n_estimators': [50, 100, 200],
+        'max_depth': [8, 16, None],
+        'max_features': ['sqrt', 0.5, None],
+        'min_samples_leaf': [1, 5]
+    },
+    'hgb': {
+        'learning_rate': [0.1, 0.3],
+        'max_leaf_nodes': [15, 31, 63],
+        'l2_regularization': [0.0, 1.0]
+    }
+}
+
+
+def halving_search(estimator, param_grid: Dict[str, List[Any]], X, y, cv: int = 3,
+                   factor: int = 3, n_jobs: Optional[int] = -1, random_state: int = 42) -> HalvingGridSearchCV:
+    """
+    对一个模型做逐次减半的交叉验证网格搜索
+
+    第一轮用少量样本评估所有参数组合，每轮只保留得分最高的 1/factor 组合并把样本量乘以 factor，
+    表现差的组合在小样本上就被淘汰。各组合和各折在 n_jobs 个进程中并行拟合。
+    搜索只用于选择参数（refit=False），最终模型由调用方用完整训练集拟合。
+    """
+    search = HalvingGridSearchCV(
+        estimator,
+        param_grid,
+        factor=factor,
+        resource='n_samples',
+        cv=StratifiedKFold(n_splits=cv, shuffle=True, random_state=random_state),
+        scoring='accuracy',
+        refit=False,
+        n_jobs=n_jobs,
+        random_state=random_state
+    )
+    return search.fit(X, y)
+
+
+def tune_models(classifier, data, features: Optional[List[str]] = None,
+                model_types: Optional[Sequence[str]] = None,
+                param_grids: Optional[Dict[str, Dict[str, List[Any]]]] = None,
+                cv: int = 3, factor: int = 3, n_jobs: Optional[int] = -1,
+                progress_callback=None, save: bool = True) -> Dict[str, Any]:
+    """
+    超参数搜索并发布最优模型
+
+    数据只编码和划分一次（与 train 相同的 70/30 划分），训练集转换为连续的 float32 矩阵后
+    在所有参数组合和交叉验证折之间共享，重复拟合时不会重新编码或转换数据。
+    每种模型用最优参数在完整训练集上重新拟合，在测试集上评估，然后通过 save_models 保存。
+
+    参数:
+    - classifier: FamilyRiskClassifier
+    - data: 训练数据
+    - features: 使用的特征列表，默认与 train 相同
+    - model_types: 搜索的模型类型，默认为全部；与 train 一样，未搜索的模型不会被保存
+    - param_grids: 各模型类型的搜索空间，默认为 PARAM_GRIDS
+    - cv: 交叉验证折数
+    - factor: 每轮保留 1/factor 的参数组合
+    - n_jobs: 并行进程数，-1 表示使用全部CPU核
+    - progress_callback: 进度回调 callback(进度0-1, 阶段描述, 指标字典或None)
+    - save: 是否保存模型
+
+    返回:
+    - 与 train 相同的准确率和分类报告，另有每种模型的 '{类型}_best_params'、'{类型}_cv_score'、
+      '{类型}_candidates'（参数组合数）、'{类型}_iterations'（减半轮数）和 '{类型}_seconds'，
+      以及实际使用的并行进程数 'search_workers'（在守护进程中 joblib 只能使用1个）
+    """
+    from risk_classifier import MODEL_TYPES
+
+    def report(progress, message, metrics=None):
+        if progress_callback is not None:
+            progress_callback(progress, message, metrics)
+
+    if features is None:
+        features = ['age', 'job', 'marital', 'education', 'balance', 'housing', 'loan']
+    model_types = list(model_types or MODEL_TYPES)
+    param_grids = {**PARAM_GRIDS, **(param_grids or {})}
+    for model_type in model_types:
+        if model_type not in MODEL_TYPES:
+            raise ValueError(f"不支持的模型类型: {model_type}")
+
+    report(0.05, "正在预处理数据...")
+    X_train, X_test, y_train, y_test = classifier.prepare_training_data(data, features)
+    X_calibration, X_eval, y_calibration, y_eval = classifier.split_holdout(X_test, y_test)
+    X_search = np.ascontiguousarray(X_train.to_numpy(dtype=np.float32))
+    y_search = np.asarray(y_train)
+
+    # 搜索各个模型（进度占 10%-80%）
+    results = {'search_workers': effective_n_jobs(n_jobs)}
+    for model_type, (attr, name) in MODEL_TYPES.items():
+        if model_type not in model_types:
+            setattr(classifier, attr, None)
+            continue
+        position = model_types.index(model_type)
+        report(0.1 + 0.7 * position / len(model_types), f"正在搜索{name}模型参数...")
+
+        start = time.perf_counter()
+        search = halving_search(classifier._build_model(model_type, X_train), param_grids[model_type],
+                                X_search, y_search, cv=cv, factor=factor, n_jobs=n_jobs)
+        model = classifier._build_model(model_type, X_train).set_params(**search.best_params_)
+        model.fit(X_train, y_train)
+        setattr(classifier, attr, model)
+
+        results[f'{model_type}_best_params'] = search.best_params_
+        results[f'{model_type}_cv_score'] = float(search.best_score_)
+        results[f'{model_type}_candidates'] = int(search.n_candidates_[0])
+        results[f'{model_type}_iterations'] = int(search.n_iterations_)
+        results[f'{model_type}_seconds'] = time.perf_counter() - start
+        print(f"{name}最优参数: {search.best_params_}（交叉验证准确率 {search.best_score_:.4f}）")
+        report(0.1 + 0.7 * (position + 1) / len(model_types), f"{name}模型参数搜索完成",
+               {f'{model_type}_cv_score': results[f'{model_type}_cv_score']})
+
+    # 评估模型
+    report(0.8, "正在评估模型...")
+    accuracies, reports = classifier.evaluate(model_types, X_eval, y_eval)
+    classifier.fit_confidence_calibrator(X_calibration, y_calibration)
+    results.update(accuracies)
+    report(0.85, "模型评估完成", dict(accuracies))
+
+    # 保存模型
+    if save:
+        report(0.9, "正在保存模型...")
+        classifier.save_models()
+    report(1.0, "模型参数搜索完成")
+
+    results.update(reports)
+    return results
+
+
+def format_report(results: Dict[str, Any]) -> str:
+    """把搜索结果格式化为文本表格"""
+    from risk_classifier import MODEL_TYPES
+
+    lines = [f"{'模型':<8}{'参数组合':>8}{'轮数':>6}{'交叉验证':>10}{'测试集':>10}{'耗时(秒)':>10}  最优参数"]
+    for model_type, (_, name) in MODEL_TYPES.items():
+        if f'{model_type}_best_params' not in results:
+            continue
+        lines.append(
+            f"{name:<8}{results[f'{model_type}_candidates']:>10}{results[f'{model_type}_iterations']:>8}"
+            f"{results[f'{model_type}_cv_score']:>12.4f}{results[f'{model_type}_accuracy']:>12.4f}"
+            f"{results[f'{model_type}_seconds']:>12.1f}  {results[f'{model_type}_best_params']}"
+        )
+    return '\n'.join(lines)
+
+
+def main():
+    """命令行搜索模型超参数"""
+    from dataset_loader import DATASET_PATH, load_dataset
+    from risk_classifier import FamilyRiskClassifier, MODEL_TYPES
+
+    parser = argparse.ArgumentParser(description="并行搜索风险分类模型的超参数（交叉验证 + 逐次减半）")
+    parser.add_argument('--model-path', help="模型目录，默认为 risk/models")
+    parser.add_argument('--dataset', default=DATASET_PATH, help="训练数据集")
+    parser.add_argument('--models', nargs='+', choices=list(MODEL_TYPES), help="搜索的模型类型，默认为全部")
+    parser.add_argument('--cv', type=int, default=3, help="交叉验证折数，默认3")
+    parser.add_argument('--factor', type=int, default=3, help="每轮保留 1/factor 的参数组合，默认3")
+    parser.add_argument('--n-jobs', type=int, default=-1, help="并行进程数，默认使用全部CPU核")
+    parser.add_argument('--dry-run', action='store_true', help="只输出搜索结果，不保存模型")
+    args = parser.parse_args()
+
+    classifier = FamilyRiskClassifier(auto_init=False)
+    if args.model_path:
+        classifier.model_path = args.model_path
+
+    results = tune_models(classifier, load_dataset(args.dataset), model_types=args.models, cv=args.cv,
+                          factor=args.factor, n_jobs=args.n_jobs, save=not args.dry_run)
+    print(format_report(results))
+    if not args.dry_run:
+        print(f"模型已保存到 {classifier.model_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,288 @@
+import numpy as np
+import pandas as pd
+from statistics import NormalDist
+from typing import Dict, List, Any, Optional, Sequence, Tuple
+
+
+def extract_close_series(data: Dict[str, Any]) -> pd.Series:
+    """
+    从价格接口返回的数据中提取收盘价序列
+
+    参数:
+    - data: FinancialDataProvider.get_stock_prices 的返回值
+
+    返回:
+    - 以日期为索引的收盘价序列（按日期升序）
+    """
+    records = None
+    if isinstance(data, dict):
+        if isinstance(data.get('prices'), list):
+            records = data['prices']
+        elif isinstance(data.get('results'), list):
+            records = data['results']
+        elif isinstance(data.get('historical'), dict):
+            records = data['historical'].get('results')
+    elif isinstance(data, list):
+        records = data
+
+    if not records:
+        return pd.Series(dtype='float64')
+
+    frame = pd.DataFrame(records)
+    date_col = 'date' if 'date' in frame.columns else 'time'
+    if date_col not in frame.columns or 'close' not in frame.columns:
+        return pd.Series(dtype='float64')
+
+    dates = pd.to_datetime(frame[date_col], utc=True, errors='coerce').dt.tz_localize(None).dt.normalize()
+    series = pd.Series(pd.to_numeric(frame['close'], errors='coerce').to_numpy(), index=dates)
+    series = series[series.index.notna()].dropna()
+    series = series[~series.index.duplicated(keep='last')]
+    return series.sort_index()
+
+
+def build_price_matrix(stocks_data: List[Dict[str, Any]]) -> Tuple[pd.DatetimeIndex, List[str], np.ndarray]:
+    """
+    将多只股票的价格数据对齐为价格矩阵
+
+    参数:
+    - stocks_data: [{'ticker': 'AAPL', 'data': {...}}, ...]
+
+    返回:
+    - (日期索引, 股票代码列表, 价格矩阵[日期 x 股票])
+    """
+    series = {}
+    for item in stocks_data:
+        close = extract_close_series(item.get('data'))
+        if len(close) > 1:
+            series[item['ticker']] = close
+
+    if not series:
+        return pd.DatetimeIndex([]), [], np.empty((0, 0))
+
+    # 外连接后前向填充停牌日，再去掉仍有缺失的起始日期
+    frame = pd.concat(series, axis=1, join='outer').sort_index().ffill().dropna()
+    return frame.index, list(frame.columns), frame.to_numpy(dtype=np.float64)
+
+
+def portfolio_weights(portfolio: List[Dict[str, Any]], tickers: Sequence[str],
+                      last_prices: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    根据投资组合条目计算各股票的权重
+
+    依次使用 weight、allocation（百分比）、value/amount、shares/quantity × 最新价格，
+    都没有时使用等权重。
+
+    参数:
+    - portfolio: 投资组合条目列表
+    - tickers: 价格矩阵中的股票代码顺序
+    - last_prices: 各股票的最新价格
+
+    返回:
+    - 归一化后的权重向量
+    """
+    position = {ticker: i for i, ticker in enumerate(tickers)}
+    raw = np.zeros(len(tickers))
+    for item in portfolio:
+        i = position.get(item.get('ticker'))
+        if i is None:
+            continue
+        if 'weight' in item:
+            raw[i] += float(item['weight'])
+        elif 'allocation' in item:
+            raw[i] += float(item['allocation']) / 100
+        elif 'value' in item or 'amount' in item:
+            raw[i] += float(item.get('value', item.get('amount')))
+        elif ('shares' in item or 'quantity' in item) and last_prices is not None:
+            raw[i] += float(item.get('shares', item.get('quantity'))) * last_prices[i]
+
+    total = raw.sum()
+    if total <= 0:
+        return np.full(len(tickers), 1 / len(tickers)) if len(tickers) else raw
+    return raw / total
+
+
+def max_drawdown(returns: np.ndarray) -> np.ndarray:
+    """
+    计算最大回撤，returns 的每一列是一条收益率序列
+
+    返回:
+    - 每列的最大回撤（负数或0）
+    """
+    wealth = np.cumprod(1 + returns, axis=0)
+    peaks = np.maximum.accumulate(np.maximum(wealth, 1.0), axis=0)
+    return (wealth / peaks - 1).min(axis=0)
+
+
+def value_at_risk(returns: np.ndarray, confidence: float = 0.95) -> Dict[str, np.ndarray]:
+    """
+    计算历史法和参数法（正态）的VaR与CVaR，结果为正数表示损失
+
+    参数:
+    - returns: 收益率矩阵，每一列一条序列
+    - confidence: 置信水平
+
+    返回:
+    - 包含 historical_var、historical_cvar、parametric_var、parametric_cvar 的字典
+    """
+    alpha = 1 - confidence
+    cutoff = np.quantile(returns, alpha, axis=0)
+    tail = returns <= cutoff
+    tail_mean = np.where(tail, returns, 0).sum(axis=0) / np.maximum(tail.sum(axis=0), 1)
+
+    mu = returns.mean(axis=0)
+    sigma = returns.std(axis=0, ddof=1)
+    z = NormalDist().inv_cdf(alpha)
+    pdf = NormalDist().pdf(z)
+
+    return {
+        'historical_var': -cutoff,
+        'historical_cvar': -tail_mean,
+        'parametric_var': -(mu + z * sigma),
+        'parametric_cvar': -(mu - sigma * pdf / alpha)
+    }
+
+
+def compute_portfolio_metrics(prices: np.ndarray,
+                              weights: np.ndarray,
+                              tickers: Optional[Sequence[str]] = None,
+                              benchmark_prices: Optional[np.ndarray] = None,
+                              confidence: float = 0.95,
+                              periods_per_year: int = 252) -> Dict[str, Any]:
+    """
+    基于对齐的价格矩阵计算投资组合量化指标
+
+    参数:
+    - prices: 价格矩阵 [日期 x 资产]
+    - weights: 资产权重
+    - tickers: 资产代码
+    - benchmark_prices: 基准价格序列（可选），缺省时以组合本身作为基准计算beta
+    - confidence: VaR置信水平
+    - periods_per_year: 年化周期数
+
+    返回:
+    - 包含组合与各资产指标的字典
+    """
+    prices = np.asarray(prices, dtype=np.float64)
+    weights = np.asarray(weights, dtype=np.float64)
+    if tickers is None:
+        tickers = [f"asset_{i}" for i in range(prices.shape[1])]
+
+    returns = prices[1:] / prices[:-1] - 1
+    portfolio_returns = returns @ weights
+
+    cov = np.cov(returns, rowvar=False, ddof=1).reshape(len(weights), len(weights))
+    std = np.sqrt(np.diag(cov))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        corr = cov / np.outer(std, std)
+    corr = np.nan_to_num(corr)
+
+    if benchmark_prices is not None:
+        benchmark = np.asarray(benchmark_prices, dtype=np.float64)
+        benchmark_returns = benchmark[1:] / benchmark[:-1] - 1
+    else:
+        benchmark_returns = portfolio_returns
+    centered = benchmark_returns - benchmark_returns.mean()
+    benchmark_var = centered @ centered
+    if benchmark_var > 0:
+        betas = centered @ (returns - returns.mean(axis=0)) / benchmark_var
+    else:
+        betas = np.zeros(len(weights))
+
+    asset_drawdowns = max_drawdown(returns)
+    asset_var = value_at_risk(returns, confidence)
+    portfolio_var = value_at_risk(portfolio_returns[:, None], confidence)
+
+    annual_cov = cov * periods_per_year
+    portfolio_volatility = float(np.sqrt(weights @ annual_cov @ weights))
+    annual_return = float(portfolio_returns.mean() * periods_per_year)
+
+    return {
+        'tickers': list(tickers),
+        'weights': weights,
+        'observations': int(returns.shape[0]),
+        'confidence': confidence,
+        'asset_annual_return': returns.mean(axis=0) * periods_per_year,
+        'asset_volatility': std * np.sqrt(periods_per_year),
+        'asset_beta': betas,
+        'asset_max_drawdown': asset_drawdowns,
+        'asset_var': asset_var,
+        'covariance': annual_cov,
+        'correlation': corr,
+        'portfolio': {
+            'annual_return': annual_return,
+            'volatility': portfolio_volatility,
+            'sharpe': annual_return / portfolio_volatility if portfolio_volatility > 0 else 0.0,
+            'beta': float(weights @ betas),
+            'max_drawdown': float(max_drawdown(portfolio_returns[:, None])[0]),
+            'historical_var': float(portfolio_var['historical_var'][0]),
+            'historical_cvar': float(portfolio_var['historical_cvar'][0]),
+            'parametric_var': float(portfolio_var['parametric_var'][0]),
+            'parametric_cvar': float(portfolio_var['parametric_cvar'][0]),
+            'diversification_ratio': float(weights @ (std * np.sqrt(periods_per_year)) / portfolio_volatility)
+            if portfolio_volatility > 0 else 1.0
+        }
+    }
+
+
+def summarize_metrics(metrics: Dict[str, Any], top_holdings: int = 10, top_pairs: int = 5) -> Dict[str, Any]:
+    """
+    将量化指标压缩为适合发送给AI的摘要
+
+    参数:
+    - metrics: compute_portfolio_metrics 的返回值
+    - top_holdings: 列出权重最高的持仓数量
+    - top_pairs: 列出相关性最高的资产对数量
+
+    返回:
+    - 精简后的指标字典
+    """
+    tickers = metrics['tickers']
+    weights = metrics['weights']
+    order = np.argsort(-weights)[:top_holdings]
+
+    holdings = [
+        {
+            'ticker': tickers[i],
+            'weight': round(float(weights[i]), 4),
+            'volatility': round(float(metrics['asset_volatility'][i]), 4),
+            'beta': round(float(metrics['asset_beta'][i]), 3),
+            'max_drawdown': round(float(metrics['asset_max_drawdown'][i]), 4)
+        }
+        for i in order
+    ]
+
+    corr = metrics['correlation']
+    upper_i, upper_j = np.triu_indices(len(tickers), k=1)
+    pair_corr = corr[upper_i, upper_j]
+    pairs = [
+        {'pair': f"{tickers[upper_i[k]]}/{tickers[upper_j[k]]}", 'correlation': round(float(pair_corr[k]), 3)}
+        for k in np.argsort(-pair_corr)[:top_pairs]
+    ]
+
+    return {
+        'holdings_count': len(tickers),
+        'observations': metrics['observations'],
+        'confidence': metrics['confidence'],
+        'portfolio': {key: round(value, 4) for key, value in metrics['portfolio'].items()},
+        'average_correlation': round(float(pair_corr.mean()), 3) if len(pair_corr) else None,
+        'top_holdings': holdings,
+        'most_correlated_pairs': pairs
+    }
+
+
+def analyze_stocks_data(portfolio: List[Dict[str, Any]], stocks_data: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """
+    由持仓和各股票的价格数据计算组合指标摘要
+
+    参数:
+    - portfolio: 持仓列表（用于计算权重）
+    - stocks_data: [{'ticker': 代码, 'data': 价格接口返回值}, ...]
+
+    返回:
+    - summarize_metrics 的摘要；有效价格数据不足时返回None
+    """
+    _, tickers, prices = build_price_matrix(stocks_data)
+    if len(tickers) == 0 or prices.shape[0] <= 2:
+        return None
+    weights = portfolio_weights(portfolio, tickers, last_prices=prices[-1])
+    return summarize_metrics(compute_portfolio_metrics(prices, weights, tickers=tickers))
@@ -0,0 +1,251 @@
+import os
+import json
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Any, Optional
+
+from product_assumptions import get_product_assumption
+from portfolio_analytics import extract_close_series
+
+# 代理ETF价格的本地缓存目录
+PRICE_CACHE_DIR = os.path.join(os.path.dirname(__file__), 'cache', 'prices')
+
+
+def _covers(meta: Optional[Dict[str, Any]], start_date: Optional[str], end_date: str) -> bool:
+    """缓存记录的日期范围是否覆盖请求的范围（start为None表示从最早的数据开始）"""
+    if meta is None:
+        return False
+    if start_date is None:
+        start_covered = meta.get('start') is None
+    else:
+        start_covered = meta.get('start') is None or meta['start'] <= start_date
+    return start_covered and meta.get('end', '') >= end_date
+
+
+def load_proxy_prices(ticker: str,
+                      financial_data=None,
+                      start_date: Optional[str] = None,
+                      end_date: Optional[str] = None,
+                      cache_dir: str = PRICE_CACHE_DIR) -> pd.Series:
+    """
+    加载代理ETF的日收盘价，优先读取本地缓存，缺失时通过金融数据API获取并写入缓存
+
+    缓存旁边的JSON文件记录了已获取的日期范围；请求超出该范围时（包括未指定结束日期而缓存不是今天获取的）
+    按两者的并集重新获取并合并，结果不取决于之前请求的范围。获取失败时退回到已缓存的数据。
+
+    参数:
+    - ticker: 代理代码
+    - financial_data: FinancialDataProvider 实例（可选）
+    - start_date / end_date: 日期范围 (YYYY-MM-DD)，end_date 默认为今天
+    - cache_dir: 缓存目录
+
+    返回:
+    - 以日期为索引的收盘价序列，无数据时为空序列
+    """
+    cache_file = os.path.join(cache_dir, f"{ticker}.csv")
+    meta_file = os.path.join(cache_dir, f"{ticker}.json")
+    requested_end = end_date or pd.Timestamp.today().strftime('%Y-%m-%d')
+
+    cached, meta = None, None
+    if os.path.exists(cache_file):
+        cached = pd.read_csv(cache_file, parse_dates=['date'], index_col='date')['close']
+        if os.path.exists(meta_file):
+            try:
+                with open(meta_file, 'r', encoding='utf-8') as f:
+                    meta = json.load(f)
+            except (OSError, ValueError):
+                meta = None
+
+    if cached is not None and (financial_data is None or _covers(meta, start_date, requested_end)):
+        return cached.loc[start_date:end_date]
+    if financial_data is None:
+        return pd.Series(dtype='float64')
+
+    # 按请求范围和已缓存范围的并集获取
+    fetch_start = start_date
+    fetch_end = requested_end
+    if meta is not None:
+        fetch_start = None if start_date is None or meta.get('start') is None else min(start_date, meta['start'])
+        fetch_end = max(requested_end, meta.get('end', ''))
+
+    data = financial_data.get_stock_prices(ticker, start_date=fetch_start, end_date=fetch_end,
+                                           interval="day", interval_multiplier=1)
+    close = pd.Series(dtype='float64') if 'error' in data else extract_close_series(data)
+    if len(close) == 0:
+        return cached.loc[start_date:end_date] if cached is not None else close
+
+    if cached is not None:
+        close = close.combine_first(cached)
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp_file = f"{cache_file}.{os.getpid()}.tmp"
+    close.rename('close').rename_axis('date').to_csv(tmp_file)
+    os.replace(tmp_file, cache_file)
+    with open(f"{meta_file}.{os.getpid()}.tmp", 'w', encoding='utf-8') as f:
+        json.dump({'start': fetch_start, 'end': fetch_end}, f)
+    os.replace(f"{meta_file}.{os.getpid()}.tmp", meta_file)
+    return close.loc[start_date:end_date]
+
+
+def load_product_prices(product_names: List[str],
+                        financial_data=None,
+                        start_date: Optional[str] = None,
+                        end_date: Optional[str] = None,
+                        cache_dir: str = PRICE_CACHE_DIR) -> pd.DataFrame:
+    """
+    加载各投资产品的历史价格（使用代理ETF）
+
+    没有代理的产品（如定期存款）按预期收益生成固定增长的价格序列。
+
+    返回:
+    - 日期 x 产品 的价格表，只保留所有产品都有数据的日期
+    """
+    series = {}
+    for name in product_names:
+        proxy = get_product_assumption(name)['proxy']
+        if proxy:
+            close = load_proxy_prices(proxy, financial_data, start_date, end_date, cache_dir)
+            if len(close) > 1:
+                series[name] = close
+
+    if not series:
+        return pd.DataFrame(columns=product_names, index=pd.DatetimeIndex([]), dtype='float64')
+
+    frame = pd.concat(series, axis=1, join='outer').sort_index().ffill().dropna()
+    years = (frame.index - frame.index[0]).days.to_numpy() / 365.25
+    for name in product_names:
+        if name not in frame.columns and not get_product_assumption(name)['proxy']:
+            frame[name] = (1 + get_product_assumption(name)['expected_return']) ** years
+    return frame[[name for name in product_names if name in frame.columns]]
+
+
+class PortfolioBacktester:
+    """
+    历史回测引擎，在历史价格上回放投资组合配置
+
+    所有风险等级的组合和所有起始日期在 [组合 x 起始日期 x 产品] 的数组上同时计算，
+    只在时间维度上逐月推进。收益率指标基于时间加权收益，不受每月定投影响。
+    """
+
+    def __init__(self,
+                 rebalance_every: int = 12,
+                 monthly_contribution: float = 0.0,
+                 initial_wealth: float = 10000.0,
+                 risk_free_rate: float = 0.02):
+        """
+        参数:
+        - rebalance_every: 再平衡间隔（月），0表示从不再平衡
+        - monthly_contribution: 每月投入金额（按目标配置比例买入）
+        - initial_wealth: 初始资金
+        - risk_free_rate: 计算夏普比率使用的年化无风险利率
+        """
+        self.rebalance_every = rebalance_every
+        self.monthly_contribution = monthly_contribution
+        self.initial_wealth = initial_wealth
+        self.risk_free_rate = risk_free_rate
+
+    @staticmethod
+    def monthly_returns(prices: pd.DataFrame) -> pd.DataFrame:
+        """将日价格转换为月度收益率"""
+        month_end = prices.groupby(prices.index.to_period('M')).last()
+        return month_end.pct_change().iloc[1:]
+
+    def run_returns(self, returns: np.ndarray, weights: np.ndarray,
+                    start_indices: np.ndarray, horizon: int) -> Dict[str, np.ndarray]:
+        """
+        在月度收益率矩阵上回测多组配置和多个起始月份
+
+        参数:
+        - returns: 月度收益率 [月份 x 产品]
+        - weights: 目标配置 [组合 x 产品]，每行之和为1
+        - start_indices: 起始月份索引 [起始日期]
+        - horizon: 回测月数
+
+        返回:
+        - 各项指标，形状均为 [组合 x 起始日期]
+        """
+        windows = returns[start_indices[:, None] + np.arange(horizon)[None, :]]  # [S, H, A]
+        target = weights[:, None, :]  # [T, 1, A]
+
+        holdings = self.initial_wealth * np.broadcast_to(target, (weights.shape[0], len(start_indices), weights.shape[1])).copy()
+        period_returns = np.empty((weights.shape[0], len(start_indices), horizon))
+        for month in range(horizon):
+            holdings += self.monthly_contribution * target
+            invested = holdings.sum(axis=-1)
+            holdings *= 1 + windows[None, :, month, :]
+            value = holdings.sum(axis=-1)
+            period_returns[:, :, month] = value / invested - 1
+            if self.rebalance_every and (month + 1) % self.rebalance_every == 0:
+                holdings = value[..., None] * target
+
+        growth = np.cumprod(1 + period_returns, axis=-1)
+        peaks = np.maximum.accumulate(np.maximum(growth, 1.0), axis=-1)
+        volatility = period_returns.std(axis=-1, ddof=1) * np.sqrt(12) if horizon > 1 else np.zeros(growth.shape[:2])
+        annual_return = period_returns.mean(axis=-1) * 12
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            sharpe = np.where(volatility > 0, (annual_return - self.risk_free_rate) / volatility, 0.0)
+
+        return {
+            'cagr': growth[..., -1] ** (12 / horizon) - 1,
+            'volatility': volatility,
+            'sharpe': sharpe,
+            'max_drawdown': (growth / peaks - 1).min(axis=-1),
+            'final_wealth': holdings.sum(axis=-1),
+            'total_contributed': np.full(growth.shape[:2], self.initial_wealth + self.monthly_contribution * horizon)
+        }
+
+    def run(self, portfolios: Dict[str, List[Dict[str, Any]]], prices: pd.DataFrame,
+            horizon_months: int = 36, start_step: int = 1) -> Dict[str, Any]:
+        """
+        回测各风险等级的投资组合
+
+        参数:
+        - portfolios: {风险等级: 产品配置列表}，产品配置格式同 InvestmentAdvisor
+        - prices: 日期 x 产品 的日价格表
+        - horizon_months: 每次回测的月数
+        - start_step: 相邻起始月份的间隔
+
+        返回:
+        - 包含各组合指标分布与摘要的字典；历史数据不足时返回 error
+        """
+        if prices.empty:
+            return {'error': "历史数据不足：没有可用的历史价格"}
+        returns = self.monthly_returns(prices)
+        products = list(returns.columns)
+        missing = sorted({p['name'] for items in portfolios.values() for p in items} - set(products))
+        if missing:
+            return {'error': f"缺少以下产品的历史价格: {', '.join(missing)}"}
+        if len(returns) < horizon_months:
+            return {'error': f"历史数据只有{len(returns)}个月，不足{horizon_months}个月"}
+
+        levels = list(portfolios)
+        weights = np.zeros((len(levels), len(products)))
+        for i, level in enumerate(levels):
+            for p in portfolios[level]:
+                weights[i, products.index(p['name'])] += p['allocation']
+        weights /= weights.sum(axis=1, keepdims=True)
+
+        start_indices = np.arange(0, len(returns) - horizon_months + 1, start_step)
+        metrics = self.run_returns(returns.to_numpy(), weights, start_indices, horizon_months)
+        start_dates = [str(period) for period in returns.index[start_indices]]
+
+        summary = {}
+        for i, level in enumerate(levels):
+            summary[level] = {
+                name: {
+                    'median': float(np.median(values[i])),
+                    'worst': float(values[i].min()),
+                    'best': float(values[i].max())
+                }
+                for name, values in metrics.items() if name != 'total_contributed'
+            }
+            summary[level]['total_contributed'] = float(metrics['total_contributed'][i, 0])
+
+        return {
+            'levels': levels,
+            'start_dates': start_dates,
+            'horizon_months': horizon_months,
+            'rebalance_every': self.rebalance_every,
+            'metrics': metrics,
+            'summary': summary
+        }
@@ -0,0 +1,81 @@
+import numpy as np
+from typing import Dict, List, Tuple
+
+# 投资产品的长期资本市场假设（年化预期收益、年化波动率、资产类别、代理ETF）
+# 数值为教育用途的粗略估计，代理代码用于回测时从金融数据API获取历史价格；
+# 代理为None的产品（如定期存款）按预期收益的固定增长处理
+PRODUCT_ASSUMPTIONS = {
+    # 高风险投资组合
+    '加密货币': {'expected_return': 0.15, 'volatility': 0.70, 'asset_class': 'crypto', 'proxy': 'BITO'},
+    '高波动性股票': {'expected_return': 0.11, 'volatility': 0.28, 'asset_class': 'equity', 'proxy': 'ARKK'},
+    '杠杆ETF': {'expected_return': 0.13, 'volatility': 0.40, 'asset_class': 'equity', 'proxy': 'SSO'},
+    '期权/期货': {'expected_return': 0.09, 'volatility': 0.50, 'asset_class': 'equity', 'proxy': 'UPRO'},
+    '高收益债券': {'expected_return': 0.06, 'volatility': 0.09, 'asset_class': 'credit', 'proxy': 'HYG'},
+    # 中等风险投资组合
+    'BIST30指数股票': {'expected_return': 0.09, 'volatility': 0.30, 'asset_class': 'equity', 'proxy': 'TUR'},
+    '混合型基金': {'expected_return': 0.065, 'volatility': 0.10, 'asset_class': 'balanced', 'proxy': 'AOR'},
+    '优质公司债': {'expected_return': 0.045, 'volatility': 0.07, 'asset_class': 'credit', 'proxy': 'LQD'},
+    '房地产投资信托': {'expected_return': 0.07, 'volatility': 0.19, 'asset_class': 'real_estate', 'proxy': 'VNQ'},
+    '黄金ETF': {'expected_return': 0.05, 'volatility': 0.15, 'asset_class': 'gold', 'proxy': 'GLD'},
+    # 低风险投资组合
+    '定期存款': {'expected_return': 0.025, 'volatility': 0.002, 'asset_class': 'cash', 'proxy': None},
+    '货币市场基金': {'expected_return': 0.03, 'volatility': 0.005, 'asset_class': 'cash', 'proxy': 'BIL'},
+    '国债': {'expected_return': 0.035, 'volatility': 0.06, 'asset_class': 'government_bond', 'proxy': 'IEF'},
+    '短期债券基金': {'expected_return': 0.03, 'volatility': 0.02, 'asset_class': 'government_bond', 'proxy': 'SHY'},
+    '高评级公司债': {'expected_return': 0.04, 'volatility': 0.05, 'asset_class': 'credit', 'proxy': 'VCSH'}
+}
+
+# 资产类别之间的相关系数
+ASSET_CLASSES = ['cash', 'government_bond', 'credit', 'equity', 'real_estate', 'gold', 'crypto', 'balanced']
+_CLASS_CORRELATION = np.array([
+    # cash  govt  credit equity  reit  gold  crypto balanced
+    [1.00, 0.30, 0.10, 0.00, 0.00, 0.00, 0.00, 0.05],
+    [0.30, 1.00, 0.60, -0.20, 0.10, 0.30, -0.05, 0.20],
+    [0.10, 0.60, 1.00, 0.50, 0.50, 0.10, 0.20, 0.60],
+    [0.00, -0.20, 0.50, 1.00, 0.65, 0.05, 0.40, 0.90],
+    [0.00, 0.10, 0.50, 0.65, 1.00, 0.10, 0.25, 0.65],
+    [0.00, 0.30, 0.10, 0.05, 0.10, 1.00, 0.15, 0.15],
+    [0.00, -0.05, 0.20, 0.40, 0.25, 0.15, 1.00, 0.35],
+    [0.05, 0.20, 0.60, 0.90, 0.65, 0.15, 0.35, 1.00]
+])
+
+# 同一资产类别内不同产品之间的相关系数
+_WITHIN_CLASS_CORRELATION = 0.85
+
+# 未知产品的默认假设
+_DEFAULT_ASSUMPTION = {'expected_return': 0.05, 'volatility': 0.15, 'asset_class': 'balanced', 'proxy': None}
+
+
+def get_product_assumption(name: str) -> Dict:
+    """获取单个产品的资本市场假设，未知产品返回默认假设"""
+    return PRODUCT_ASSUMPTIONS.get(name, _DEFAULT_ASSUMPTION)
+
+
+def product_moments(names: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    计算一组产品的年化预期收益向量和协方差矩阵
+
+    参数:
+    - names: 产品名称列表
+
+    返回:
+    - (预期收益向量, 协方差矩阵)
+    """
+    assumptions = [get_product_assumption(name) for name in names]
+    mu = np.array([a['expected_return'] for a in assumptions])
+    sigma = np.array([a['volatility'] for a in assumptions])
+    classes = np.array([ASSET_CLASSES.index(a['asset_class']) for a in assumptions])
+
+    corr = _CLASS_CORRELATION[np.ix_(classes, classes)].copy()
+    same_class = classes[:, None] == classes[None, :]
+    corr[same_class] = _WITHIN_CLASS_CORRELATION
+    np.fill_diagonal(corr, 1.0)
+
+    # 拼接后的相关矩阵可能不是半正定的，裁剪负特征值后重新归一化
+    eigenvalues, eigenvectors = np.linalg.eigh(corr)
+    if eigenvalues.min() < 1e-8:
+        corr = eigenvectors @ np.diag(np.clip(eigenvalues, 1e-8, None)) @ eigenvectors.T
+        scale = np.sqrt(np.diag(corr))
+        corr = corr / np.outer(scale, scale)
+
+    return mu, corr * np.outer(sigma, sigma)
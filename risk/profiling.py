@@ -0,0 +1,174 @@
+import os
+import re
+import sys
+import time
+import threading
+import contextlib
+from collections import Counter
+from typing import Optional, Mapping
+
+# 性能剖析结果的保存目录
+PROFILE_DIR = os.path.join(os.path.dirname(__file__), 'cache', 'profiles')
+
+# 默认采样间隔（秒）
+DEFAULT_INTERVAL = 0.005
+
+
+def _env_enabled() -> bool:
+    return os.environ.get('RISK_PROFILE', '').lower() in ('1', 'true', 'yes', 'on')
+
+
+def is_requested(query_params: Optional[Mapping] = None) -> bool:
+    """
+    是否需要对本次请求或页面运行做性能剖析
+
+    设置环境变量 RISK_PROFILE=1（命令行参数 --profile 会设置它）时对所有请求生效；
+    否则查询参数中带 profile=1 时只对该次请求生效。
+    """
+    if _env_enabled():
+        return True
+    if query_params is None:
+        return False
+    value = query_params.get('profile')
+    if isinstance(value, (list, tuple)):
+        value = value[0] if value else None
+    return str(value).lower() in ('1', 'true', 'yes', 'on')
+
+
+def pyinstrument_available() -> bool:
+    try:
+        import pyinstrument  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def _frame_label(code) -> str:
+    name = getattr(code, 'co_qualname', code.co_name)
+    label = f"{name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+    # 折叠栈格式以分号分隔各层，空格分隔计数
+    return label.replace(';', ':')
+
+
+class StackSampler:
+    """
+    内置的采样剖析器
+
+    后台线程按固定间隔读取目标线程的调用栈，按调用栈计数，
+    输出 flamegraph.pl / speedscope 可直接读取的折叠栈（folded stacks）格式。
+    """
+
+    def __init__(self, interval: float = DEFAULT_INTERVAL, thread_id: Optional[int] = None):
+        """
+        参数:
+        - interval: 采样间隔（秒）
+        - thread_id: 被采样的线程，默认为调用 start() 的线程
+        """
+        self.interval = interval
+        self.thread_id = thread_id
+        self.samples: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> "StackSampler":
+        if self.thread_id is None:
+            self.thread_id = threading.get_ident()
+        self._thread = threading.Thread(target=self._run, name='stack-sampler', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                return
+            stack = []
+            while frame is not None:
+                stack.append(_frame_label(frame.f_code))
+                frame = frame.f_back
+            self.samples[';'.join(reversed(stack))] += 1
+
+    def folded(self) -> str:
+        """折叠栈文本，每行为 “调用栈 计数”"""
+        return ''.join(f"{stack} {count}\n" for stack, count in self.samples.most_common())
+
+
+class Profile:
+    """
+    一次请求或页面运行的性能剖析
+
+    安装了 pyinstrument 时使用它并保存为 speedscope JSON，否则使用内置的 StackSampler 保存折叠栈。
+    两种文件都可以在 https://www.speedscope.app 打开，折叠栈也可以交给 flamegraph.pl 生成火焰图。
+    """
+
+    def __init__(self, name: str, output_dir: Optional[str] = None,
+                 interval: float = DEFAULT_INTERVAL, backend: str = 'auto'):
+        """
+        参数:
+        - name: 剖析名称，用于文件名
+        - output_dir: 保存目录，默认为 PROFILE_DIR
+        - interval: 采样间隔（秒）
+        - backend: 'pyinstrument'、'sampler' 或 'auto'
+        """
+        if backend == 'auto':
+            backend = 'pyinstrument' if pyinstrument_available() else 'sampler'
+        if backend not in ('pyinstrument', 'sampler'):
+            raise ValueError(f"不支持的剖析后端: {backend}")
+        self.name = name
+        self.output_dir = output_dir or PROFILE_DIR
+        self.interval = interval
+        self.backend = backend
+        self.path: Optional[str] = None
+        self._profiler = None
+
+    def start(self) -> "Profile":
+        if self.backend == 'pyinstrument':
+            from pyinstrument import Profiler
+            self._profiler = Profiler(interval=self.interval, async_mode='disabled')
+            self._profiler.start()
+        else:
+            self._profiler = StackSampler(self.interval).start()
+        return self
+
+    def stop(self) -> Optional[str]:
+        """停止剖析并保存结果，返回文件路径（重复调用只保存一次）"""
+        if self._profiler is None or self.path is not None:
+            return self.path
+
+        self._profiler.stop()
+        if self.backend == 'pyinstrument':
+            from pyinstrument.renderers import SpeedscopeRenderer
+            content = self._profiler.output(renderer=SpeedscopeRenderer())
+            extension = 'speedscope.json'
+        else:
+            content = self._profiler.folded()
+            extension = 'folded'
+
+        os.makedirs(self.output_dir, exist_ok=True)
+        safe_name = re.sub(r'[^\w.-]+', '_', self.name).strip('_') or 'profile'
+        self.path = os.path.join(self.output_dir, f"{safe_name}-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{id(self):x}.{extension}")
+        with open(self.path, 'w', encoding='utf-8') as f:
+            f.write(content)
+        return self.path
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+        return False
+
+
+def start(name: str, **kwargs) -> Profile:
+    """开始剖析，之后调用返回对象的 stop() 保存结果"""
+    return Profile(name, **kwargs).start()
+
+
+def maybe_profile(name: str, enabled: bool, **kwargs):
+    """enabled 为真时返回剖析上下文，否则返回空上下文（不做任何事情）"""
+    return Profile(name, **kwargs) if enabled else contextlib.nullcontext()
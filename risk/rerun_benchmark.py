@@ -0,0 +1,144 @@
+import os
+import sys
+import time
+import argparse
+import statistics
+import subprocess
+import tempfile
+from typing import Dict, Any, List, Callable
+
+# 本文件所在目录（应用和各模块所在目录）
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+PAGE = "家庭投资组合"
+
+
+def sample_members(count: int) -> List[Dict[str, Any]]:
+    """生成带风险等级和投资信息的家庭成员"""
+    levels = ['High', 'Medium', 'Low']
+    portfolios = {'High': '进取型', 'Medium': '平衡型', 'Low': '保守型'}
+    return [{
+        'name': f"成员{i}",
+        'age': 25 + (i * 7) % 45,
+        'balance': (i * 731) % 5000 - 500,
+        'loan': i % 3 == 0,
+        'housing': i % 2 == 0,
+        'job': 'technician',
+        'marital': 'married',
+        'education': 'secondary',
+        'risk_rule': levels[i % 3],
+        'risk_dt': levels[i % 3],
+        'risk_rf': levels[i % 3],
+        'investment_portfolio': portfolios[levels[i % 3]],
+        'monthly_savings': 1000 + i * 100,
+        'investment_horizon': '5-10年',
+        'investment_goal': '退休规划'
+    } for i in range(count)]
+
+
+def _time_runs(action: Callable[[], Any], repeat: int) -> List[float]:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        action()
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def _check(at) -> None:
+    if len(at.exception):
+        raise RuntimeError(at.exception[0].value)
+
+
+def measure_baseline(members: List[Dict[str, Any]], repeat: int, revision: str) -> Dict[str, Any]:
+    """
+    测量拆分前的应用：家庭成员保存在会话状态中，页面上任何组件交互都会重新运行整个脚本
+
+    拆分前的页面没有成员筛选，因此只测量整页重新运行的耗时。
+
+    参数:
+    - revision: 拆分为片段之前的git版本（提交、标签或分支）
+    """
+    from streamlit.testing.v1 import AppTest
+
+    source = subprocess.run(['git', 'show', f'{revision}:risk/app.py'], cwd=APP_DIR,
+                            capture_output=True, text=True, check=True).stdout
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        app_path = os.path.join(tmp_dir, 'app_baseline.py')
+        with open(app_path, 'w', encoding='utf-8') as f:
+            f.write(source)
+        at = AppTest.from_file(app_path, default_timeout=300)
+        at.session_state['family_members'] = members
+        at.run()
+        at.sidebar.radio[0].set_value(PAGE).run()
+        _check(at)
+        full = _time_runs(at.run, repeat)
+    return {'full': full}
+
+
+def measure_current(members: List[Dict[str, Any]], repeat: int) -> Dict[str, Any]:
+    """
+    测量当前的应用：成员筛选在“家庭成员投资详情”片段中，浏览器中的交互只重新运行该片段
+
+    AppTest 的组件交互总是重新运行整个脚本，因此交互耗时取片段函数的计时
+    （instrumentation 中的 app.family_member_details_panel）；整页耗时为脚本的完整运行。
+    """
+    import instrumentation
+    import family_store
+    import member_store
+    from streamlit.testing.v1 import AppTest
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        family_store.FAMILY_STORE_PATH = os.path.join(tmp_dir, 'family_store.sqlite')
+        member_store.MEMBER_STORE_PATH = os.path.join(tmp_dir, 'member_store.sqlite')
+        family_store.FamilyStore().import_members(members, default_household="我的家庭")
+
+        instrumentation.enable()
+        at = AppTest.from_file(os.path.join(APP_DIR, 'app.py'), default_timeout=300)
+        at.run()
+        at.sidebar.radio[0].set_value(PAGE).run()
+        at.run()
+        _check(at)
+
+        fragment_span = 'app.family_member_details_panel'
+        selections = [['High', 'Medium'], ['High', 'Medium', 'Low']]
+        interaction = []
+        for i in range(repeat):
+            before = instrumentation.histograms()[fragment_span]['sum']
+            at.multiselect[0].set_value(selections[i % 2]).run()
+            interaction.append(instrumentation.histograms()[fragment_span]['sum'] - before)
+        _check(at)
+
+        full = _time_runs(at.run, repeat)
+    return {'interaction': interaction, 'full': full}
+
+
+def format_results(before: Dict[str, Any], after: Dict[str, Any], members: int) -> str:
+    """把前后两次测量格式化为对比表（各取中位数）"""
+    a, b = statistics.median(before['full']), statistics.median(after['full'])
+    interaction = statistics.median(after['interaction'])
+    lines = [f"{PAGE}页面，{members}个成员（中位数）",
+             f"{'场景':<14}{'拆分前':>12}{'拆分后':>12}{'对比':>10}",
+             f"{'整页重新运行':<14}{a * 1000:>10.0f}ms{b * 1000:>10.0f}ms{a / b:>9.1f}x",
+             f"拆分后的成员筛选交互只重新运行“家庭成员投资详情”片段: {interaction * 1000:.0f}ms"
+             f"（拆分前没有筛选，任何交互都重新运行整页）"]
+    return '\n'.join(lines)
+
+
+def main():
+    """命令行对比片段拆分前后的页面重新运行耗时"""
+    parser = argparse.ArgumentParser(description="对比片段拆分前后家庭投资组合页面的重新运行耗时（Streamlit AppTest）")
+    parser.add_argument('--members', type=int, default=12, help="家庭成员数量，默认12")
+    parser.add_argument('--repeat', type=int, default=5, help="每个场景的运行次数，默认5")
+    parser.add_argument('--baseline', required=True, help="拆分为片段之前的git版本（提交、标签或分支）")
+    args = parser.parse_args()
+
+    sys.path.insert(0, APP_DIR)
+    members = sample_members(args.members)
+    before = measure_baseline(members, args.repeat, args.baseline)
+    after = measure_current(members, args.repeat)
+    print(format_results(before, after, args.members))
+
+
+if __name__ == "__main__":
+    main()
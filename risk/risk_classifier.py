@@ -3,19 +3,89 @@ import numpy as np
 from sklearn.preprocessing import LabelEncoder
 from sklearn.model_selection import train_test_split
 from sklearn.tree import DecisionTreeClassifier
-from sklearn.ensemble import RandomForestClassifier
+from sklearn.ensemble import RandomForestClassifier, HistGradientBoostingClassifier
 from sklearn.metrics import accuracy_score, classification_report
 import pickle
 import os
+import time
+import hashlib
+
+from instrumentation import span, timed
+from metrics import CLASSIFIER_CALLS, CLASSIFIER_MEMBERS, MODEL_LOADED
+from model_compression import COMPACT_RF_FILE, load_compact_forest
+
+# 模型文件，顺序决定模型版本摘要
+MODEL_FILE_NAMES = ['dt_model.pkl', 'rf_model.pkl', 'label_encoders.pkl', 'risk_encoder.pkl', 'feature_names.pkl']
+
+# 可选的模型文件（旧版本训练的模型目录中没有）
+OPTIONAL_MODEL_FILE_NAMES = ['hgb_model.pkl', 'confidence_calibrator.pkl', COMPACT_RF_FILE]
+
+# 各模型类型的模型文件；未训练的模型不保存文件，加载时为None
+MODEL_TYPE_FILES = {'dt': 'dt_model.pkl', 'rf': 'rf_model.pkl', 'hgb': 'hgb_model.pkl'}
+
+# 风险等级，顺序与 LabelEncoder 编码后的类别一致
+RISK_LEVELS = ['High', 'Low', 'Medium']
+
+# 模型类型 -> (属性名, 名称)
+MODEL_TYPES = {
+    'dt': ('dt_model', '决策树'),
+    'rf': ('rf_model', '随机森林'),
+    'hgb': ('hgb_model', '梯度提升')
+}
+
+class ConfidenceCalibrator:
+    """
+    置信度校准（直方图分箱）
+
+    把原始置信度分箱，每个分箱的校准值为该分箱内预测正确的频率；样本少的分箱向原始置信度收缩，
+    避免测试集中几乎没有错误样本时把所有置信度都校准为1。校准值保证随原始置信度单调不减。
+    """
+
+    def __init__(self, n_bins=10, prior_strength=20.0):
+        """
+        参数:
+        - n_bins: 分箱数量（0-1等宽）
+        - prior_strength: 原始置信度作为先验时相当的样本数
+        """
+        self.n_bins = n_bins
+        self.prior_strength = prior_strength
+        self.values_ = None
+
+    def _bins(self, raw):
+        return np.clip((np.asarray(raw, dtype=float) * self.n_bins).astype(int), 0, self.n_bins - 1)
+
+    def fit(self, raw, correct):
+        """
+        参数:
+        - raw: 原始置信度
+        - correct: 对应的预测是否正确（0/1）
+        """
+        bins = self._bins(raw)
+        counts = np.bincount(bins, minlength=self.n_bins)
+        hits = np.bincount(bins, weights=np.asarray(correct, dtype=float), minlength=self.n_bins)
+        raw_sums = np.bincount(bins, weights=np.asarray(raw, dtype=float), minlength=self.n_bins)
+        # 没有样本的分箱以分箱中点作为原始置信度
+        centers = (np.arange(self.n_bins) + 0.5) / self.n_bins
+        prior = np.where(counts > 0, raw_sums / np.maximum(counts, 1), centers)
+        values = (hits + self.prior_strength * prior) / (counts + self.prior_strength)
+        self.values_ = np.maximum.accumulate(values)
+        return self
+
+    def predict(self, raw):
+        return self.values_[self._bins(raw)]
+
 
 class FamilyRiskClassifier:
     def __init__(self, auto_init=True):
         self.dt_model = None
         self.rf_model = None
+        self.hgb_model = None
+        self.confidence_calibrator = None
         self.label_encoders = {}
         self.risk_encoder = None
         self.model_path = os.path.join(os.path.dirname(__file__), 'models')
         self.feature_names = None
+        self._model_version = None
         
         # 确保模型目录存在
         if not os.path.exists(self.model_path):
@@ -36,22 +106,47 @@ class FamilyRiskClassifier:
             # 设置默认特征名称
             self.feature_names = ['age', 'job', 'marital', 'education', 'balance', 'housing', 'loan']
     
+    @property
+    def model_version(self):
+        """当前使用的模型版本（模型文件内容的摘要），未加载模型时为 'rules'"""
+        if all(getattr(self, attr) is None for attr, _ in MODEL_TYPES.values()):
+            return 'rules'
+        return self._model_version or 'unsaved'
+    
+    def compute_model_version(self):
+        """根据模型目录中的模型文件内容计算版本摘要，文件不全时返回None"""
+        digest = hashlib.sha256()
+        for name in MODEL_FILE_NAMES + OPTIONAL_MODEL_FILE_NAMES:
+            path = os.path.join(self.model_path, name)
+            if not os.path.exists(path):
+                if name in OPTIONAL_MODEL_FILE_NAMES or name in MODEL_TYPE_FILES.values():
+                    continue
+                return None
+            with open(path, 'rb') as f:
+                digest.update(name.encode('utf-8'))
+                digest.update(f.read())
+        return digest.hexdigest()[:12]
+    
+    def _set_model_version(self, version):
+        self._model_version = version
+        MODEL_LOADED.set(time.time(), model_version=self.model_version)
+    
+    @timed('model.preprocess')
     def preprocess_data(self, data):
         """预处理数据，包括标签编码"""
         # 复制数据，避免修改原始数据
         processed_data = data.copy()
         
-        # 对分类特征进行编码
-        for col in processed_data.select_dtypes(include='object').columns:
+        # 对分类特征进行编码（包括字符串列和category列）
+        for col in processed_data.select_dtypes(include=['object', 'string', 'category']).columns:
             if col not in self.label_encoders:
                 self.label_encoders[col] = LabelEncoder()
                 processed_data[col] = self.label_encoders[col].fit_transform(processed_data[col])
             else:
-                # 处理新数据中可能出现的未知类别
+                # 处理新数据中可能出现的未知类别（向量化替换）
                 known_classes = set(self.label_encoders[col].classes_)
-                processed_data[col] = processed_data[col].apply(
-                    lambda x: x if x in known_classes else list(known_classes)[0]
-                )
+                values = processed_data[col].astype(object)
+                processed_data[col] = values.where(values.isin(known_classes), list(known_classes)[0])
                 processed_data[col] = self.label_encoders[col].transform(processed_data[col])
         
         return processed_data
@@ -67,19 +162,37 @@ class FamilyRiskClassifier:
         data['risk_level'] = np.select(conditions, risk_labels, default='Medium')
         return data
     
-    def train(self, data, features=None):
-        """训练风险分类模型"""
-        if features is None:
-            features = ['age', 'job', 'marital', 'education', 'balance', 'housing', 'loan']
-        
+    def _build_model(self, model_type, X):
+        """创建指定类型的未训练模型"""
+        if model_type == 'dt':
+            return DecisionTreeClassifier(max_depth=4, random_state=42)
+        if model_type == 'rf':
+            return RandomForestClassifier(n_estimators=100, random_state=42)
+        if model_type == 'hgb':
+            # 标签编码后的分类列直接作为原生类别特征，不需要独热编码；
+            # 较大的学习率配合早停（样本超过1万时自动开启）减少迭代次数，预测也更快
+            categorical = np.array([col in self.label_encoders for col in X.columns])
+            return HistGradientBoostingClassifier(
+                categorical_features=categorical if categorical.any() else None,
+                learning_rate=0.3,
+                random_state=42
+            )
+        raise ValueError(f"不支持的模型类型: {model_type}")
+    
+    def prepare_training_data(self, data, features):
+        """
+        编码特征、分配风险等级并按 70/30 划分训练集和测试集
+
+        编码器在这里拟合，返回的特征已经是数值矩阵，之后的多次拟合不需要重复编码。
+
+        返回:
+        - (X_train, X_test, y_train, y_test)
+        """
         # 保存特征名称顺序
         self.feature_names = features
         
-        # 选择特征
-        data = data[features].copy()
-        
-        # 预处理数据
-        processed_data = self.preprocess_data(data)
+        # 选择特征并预处理
+        processed_data = self.preprocess_data(data[features].copy())
         
         # 分配风险等级
         processed_data = self.assign_risk_levels(processed_data)
@@ -93,46 +206,107 @@ class FamilyRiskClassifier:
         y = processed_data['risk_level_encoded']
         
         # 分割训练集和测试集
-        X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.3, random_state=42)
-        
-        # 训练决策树模型
-        self.dt_model = DecisionTreeClassifier(max_depth=4, random_state=42)
-        self.dt_model.fit(X_train, y_train)
+        return train_test_split(X, y, test_size=0.3, random_state=42)
+    
+    def split_holdout(self, X_test, y_test):
+        """
+        把 prepare_training_data 划分出的测试集分层地对半分为校准集和评估集
+
+        校准集用于拟合置信度校准（模型压缩也用它选择保留的树），评估集只用于报告准确率，
+        报告的指标不会在拟合校准时用过的数据上计算。
+
+        返回:
+        - (X_calibration, X_eval, y_calibration, y_eval)
+        """
+        return train_test_split(X_test, y_test, test_size=0.5, random_state=42, stratify=y_test)
+    
+    def evaluate(self, model_types, X_test, y_test):
+        """
+        在测试集上评估已训练的模型
+
+        返回:
+        - (准确率字典, 分类报告字典)，键分别为 '{类型}_accuracy' 和 '{类型}_report'
+        """
+        results = {}
+        reports = {}
+        for model_type in model_types:
+            attr, name = MODEL_TYPES[model_type]
+            pred = getattr(self, attr).predict(X_test)
+            results[f'{model_type}_accuracy'] = accuracy_score(y_test, pred)
+            reports[f'{model_type}_report'] = classification_report(
+                y_test, pred, target_names=self.risk_encoder.classes_, output_dict=True)
+            print(f"{name}模型准确率: {results[f'{model_type}_accuracy']:.4f}")
+            print(f"\n{name}分类报告:")
+            print(classification_report(y_test, pred, target_names=self.risk_encoder.classes_))
+        return results, reports
+    
+    def train(self, data, features=None, progress_callback=None, model_types=None):
+        """
+        训练风险分类模型
         
-        # 训练随机森林模型
-        self.rf_model = RandomForestClassifier(n_estimators=100, random_state=42)
-        self.rf_model.fit(X_train, y_train)
+        参数:
+        - data: 训练数据
+        - features: 使用的特征列表
+        - progress_callback: 进度回调 callback(进度0-1, 阶段描述, 指标字典或None)
+        - model_types: 训练的模型类型，默认为全部（'dt'、'rf'、'hgb'）；
+          数据量很大时可以只训练 ['hgb']，未训练的模型不会被保存
+        """
+        def report(progress, message, metrics=None):
+            if progress_callback is not None:
+                progress_callback(progress, message, metrics)
         
-        # 评估模型
-        dt_pred = self.dt_model.predict(X_test)
-        rf_pred = self.rf_model.predict(X_test)
-        
-        dt_accuracy = accuracy_score(y_test, dt_pred)
-        rf_accuracy = accuracy_score(y_test, rf_pred)
+        if features is None:
+            features = ['age', 'job', 'marital', 'education', 'balance', 'housing', 'loan']
+        if model_types is None:
+            model_types = list(MODEL_TYPES)
+        for model_type in model_types:
+            if model_type not in MODEL_TYPES:
+                raise ValueError(f"不支持的模型类型: {model_type}")
         
-        print(f"决策树模型准确率: {dt_accuracy:.4f}")
-        print(f"随机森林模型准确率: {rf_accuracy:.4f}")
+        report(0.05, "正在预处理数据...")
+        X_train, X_test, y_train, y_test = self.prepare_training_data(data, features)
+        X_calibration, X_eval, y_calibration, y_eval = self.split_holdout(X_test, y_test)
         
-        print("\n决策树分类报告:")
-        print(classification_report(y_test, dt_pred, target_names=self.risk_encoder.classes_))
+        # 训练各个模型（进度占 15%-80%）
+        for model_type in MODEL_TYPES:
+            attr, name = MODEL_TYPES[model_type]
+            if model_type not in model_types:
+                setattr(self, attr, None)
+                continue
+            report(0.15 + 0.65 * model_types.index(model_type) / len(model_types), f"正在训练{name}模型...")
+            model = self._build_model(model_type, X_train)
+            model.fit(X_train, y_train)
+            setattr(self, attr, model)
         
-        print("\n随机森林分类报告:")
-        print(classification_report(y_test, rf_pred, target_names=self.risk_encoder.classes_))
+        # 评估模型
+        report(0.8, "正在评估模型...")
+        results, reports = self.evaluate(model_types, X_eval, y_eval)
+        self.fit_confidence_calibrator(X_calibration, y_calibration)
+        report(0.85, "模型评估完成", dict(results))
         
         # 保存模型
+        report(0.9, "正在保存模型...")
         self.save_models()
+        report(1.0, "模型训练完成")
         
-        return {
-            'dt_accuracy': dt_accuracy,
-            'rf_accuracy': rf_accuracy,
-            'dt_report': classification_report(y_test, dt_pred, target_names=self.risk_encoder.classes_, output_dict=True),
-            'rf_report': classification_report(y_test, rf_pred, target_names=self.risk_encoder.classes_, output_dict=True)
-        }
+        results.update(reports)
+        return results
     
     def predict(self, data, model_type='dt'):
-        """使用训练好的模型预测风险等级"""
+        """
+        使用训练好的模型预测风险等级
+        
+        参数:
+        - data: 特征数据
+        - model_type: 'dt'（决策树）、'rf'（随机森林）或 'hgb'（梯度提升）
+        """
+        model_type = model_type.lower()
+        if model_type not in MODEL_TYPES:
+            raise ValueError(f"不支持的模型类型: {model_type}")
+        model = getattr(self, MODEL_TYPES[model_type][0])
+        
         # 如果模型未加载，则使用规则型分类
-        if self.dt_model is None or self.rf_model is None:
+        if model is None:
             # 使用规则型分类
             result = []
             for _, row in data.iterrows():
@@ -144,6 +318,16 @@ class FamilyRiskClassifier:
                     result.append('Low')
             return np.array(result)
         
+        # 预测
+        processed_data = self._model_input(data)
+        with span(f"model.predict.{model_type}"):
+            risk_encoded = model.predict(processed_data)
+        risk_labels = self.risk_encoder.inverse_transform(risk_encoded)
+        
+        return risk_labels
+    
+    def _model_input(self, data):
+        """按训练时的特征顺序整理数据并编码"""
         # 确保数据包含所有必要的特征，并按正确顺序排列
         if self.feature_names:
             # 创建一个包含所有必要特征的新数据框
@@ -155,69 +339,219 @@ class FamilyRiskClassifier:
             data = data[self.feature_names]
         
         # 预处理数据
-        processed_data = self.preprocess_data(data)
+        return self.preprocess_data(data)
+    
+    def _risk_levels(self):
+        return list(self.risk_encoder.classes_) if self.risk_encoder is not None else RISK_LEVELS
+    
+    def _rule_based(self, data):
+        """规则型分类（向量化），loan/housing 为0/1编码"""
+        balance = data['balance'].to_numpy()
+        return np.select(
+            [(balance < 0) | ((data['loan'] == 1) & (data['housing'] == 1)).to_numpy(), balance < 1000],
+            ['High', 'Medium'],
+            default='Low'
+        )
+    
+    def _one_hot(self, labels):
+        levels = self._risk_levels()
+        proba = np.zeros((len(labels), len(levels)))
+        proba[np.arange(len(labels)), [levels.index(str(label)) for label in labels]] = 1.0
+        return proba
+    
+    def _model_proba(self, model_type, processed_data):
+        """已编码数据上单个模型的类别概率，列顺序与 risk_encoder.classes_ 一致"""
+        model = getattr(self, MODEL_TYPES[model_type][0])
+        with span(f"model.predict.{model_type}"):
+            proba = model.predict_proba(processed_data)
+        # 训练数据中缺少某个风险等级时，模型输出的列比风险等级少
+        full = np.zeros((len(proba), len(self.risk_encoder.classes_)))
+        full[:, np.asarray(model.classes_, dtype=int)] = proba
+        return full
+    
+    def _loaded_model_types(self):
+        return [model_type for model_type, (attr, _) in MODEL_TYPES.items() if getattr(self, attr) is not None]
+    
+    def predict_proba(self, data, model_type='dt'):
+        """
+        使用训练好的模型预测各风险等级的概率
         
-        # 选择模型
-        model = self.dt_model if model_type.lower() == 'dt' else self.rf_model
+        参数:
+        - data: 特征数据
+        - model_type: 'dt'、'rf' 或 'hgb'；模型未加载时返回规则型分类的独热概率
         
-        # 预测
-        risk_encoded = model.predict(processed_data)
-        risk_labels = self.risk_encoder.inverse_transform(risk_encoded)
+        返回:
+        - 形状为 (样本数, 风险等级数) 的数组，列顺序与 risk_encoder.classes_ 一致
+        """
+        model_type = model_type.lower()
+        if model_type not in MODEL_TYPES:
+            raise ValueError(f"不支持的模型类型: {model_type}")
+        if getattr(self, MODEL_TYPES[model_type][0]) is None:
+            return self._one_hot(self.predict(data, model_type))
+        return self._model_proba(model_type, self._model_input(data))
+    
+    def fit_confidence_calibrator(self, X_calibration, y_calibration):
+        """
+        在校准集上拟合置信度校准
         
-        return risk_labels
+        原始置信度为各模型平均概率的最大值（树模型的叶节点概率通常过于自信），
+        用 ConfidenceCalibrator 把它映射为校准集上预测正确的频率。校准集不应与报告准确率的评估集重叠（见 split_holdout）。
+        
+        参数:
+        - X_calibration: 已编码的校准集特征
+        - y_calibration: 编码后的风险等级
+        """
+        model_types = self._loaded_model_types()
+        if not model_types:
+            self.confidence_calibrator = None
+            return
+        ensemble = np.mean([self._model_proba(model_type, X_calibration) for model_type in model_types], axis=0)
+        correct = (np.argmax(ensemble, axis=1) == np.asarray(y_calibration)).astype(float)
+        self.confidence_calibrator = ConfidenceCalibrator().fit(ensemble.max(axis=1), correct)
+    
+    @timed('model.score')
+    def score(self, data):
+        """
+        一次预处理后计算所有已加载模型的类别概率和校准后的置信度
+        
+        参数:
+        - data: 特征数据，loan/housing 为0/1编码
+        
+        返回:
+        - 字典，包含:
+          - 'levels': 风险等级列表（概率的列顺序）
+          - 'rule_based': 规则型分类的风险等级数组
+          - 'probabilities': 模型类型 -> 概率数组，只包含已加载的模型
+          - 'ensemble': 各模型的平均概率，没有模型时为规则型分类的独热概率
+          - 'confidence': 校准后的置信度数组（0-1），没有校准器时为平均概率的最大值
+          - 'features': 编码后的模型输入，没有模型时为None
+        """
+        rule_based = self._rule_based(data)
+        model_types = self._loaded_model_types()
+        probabilities = {}
+        processed_data = None
+        if model_types:
+            processed_data = self._model_input(data.copy())
+            for model_type in model_types:
+                probabilities[model_type] = self._model_proba(model_type, processed_data)
+            ensemble = np.mean(list(probabilities.values()), axis=0)
+        else:
+            ensemble = self._one_hot(rule_based)
+        
+        confidence = ensemble.max(axis=1)
+        if probabilities and self.confidence_calibrator is not None:
+            confidence = self.confidence_calibrator.predict(confidence)
+        return {
+            'levels': self._risk_levels(),
+            'rule_based': rule_based,
+            'probabilities': probabilities,
+            'ensemble': ensemble,
+            'confidence': confidence,
+            'features': processed_data
+        }
     
     def classify_risk_level(self, age, balance, loan, housing, job='unknown', marital='unknown', education='unknown'):
         """根据单个家庭成员的特征预测风险等级"""
-        # 创建数据帧
-        data = pd.DataFrame([{
+        return self.classify_risk_levels([{
             'age': age,
             'balance': balance,
-            'loan': 1 if loan.lower() == 'yes' else 0,
-            'housing': 1 if housing.lower() == 'yes' else 0,
+            'loan': loan,
+            'housing': housing,
             'job': job,
             'marital': marital,
             'education': education
-        }])
+        }])[0]
+    
+    def classify_risk_levels(self, members, details=False):
+        """
+        批量预测多个家庭成员的风险等级，所有成员在一次向量化预测中完成
         
-        # 使用规则分配风险等级
-        if balance < 0 or (data['loan'][0] == 1 and data['housing'][0] == 1):
-            rule_based_risk = 'High'
-        elif 0 <= balance < 1000:
-            rule_based_risk = 'Medium'
-        else:
-            rule_based_risk = 'Low'
+        参数:
+        - members: 成员特征字典列表，键同 classify_risk_level 的参数；loan/housing 可以是 'yes'/'no' 或布尔值
+        - details: 是否附带各模型的类别概率（'probabilities'）和编码后的模型输入（'features'）
+        
+        返回:
+        - 与 members 顺序一致的风险等级字典列表，'confidence' 为模型结果的校准置信度（见 score）
+        """
+        if len(members) == 0:
+            return []
+        
+        def is_yes(value):
+            return value.lower() == 'yes' if isinstance(value, str) else bool(value)
         
-        # 使用模型预测风险等级
+        # 创建数据帧
+        data = pd.DataFrame([{
+            'age': member.get('age', 35),
+            'balance': member.get('balance', 0),
+            'loan': 1 if is_yes(member.get('loan', 'no')) else 0,
+            'housing': 1 if is_yes(member.get('housing', 'no')) else 0,
+            'job': member.get('job', 'unknown'),
+            'marital': member.get('marital', 'unknown'),
+            'education': member.get('education', 'unknown')
+        } for member in members])
+        
+        # 一次预处理完成所有模型的概率预测，未训练的模型使用规则型分类
         try:
-            # 如果模型已训练，使用模型预测
-            if self.dt_model is not None and self.rf_model is not None:
-                dt_risk = self.predict(data, 'dt')[0]
-                rf_risk = self.predict(data, 'rf')[0]
-            else:
-                # 如果模型未训练，使用规则型分类
-                dt_risk = rule_based_risk
-                rf_risk = rule_based_risk
+            scores = self.score(data)
         except Exception as e:
             print(f"预测错误: {e}")
             # 发生错误时使用规则型分类
-            dt_risk = rule_based_risk
-            rf_risk = rule_based_risk
+            scores = {'levels': self._risk_levels(), 'rule_based': self._rule_based(data),
+                      'probabilities': {}, 'confidence': np.ones(len(data)), 'features': None}
         
-        return {
-            'rule_based': rule_based_risk,
-            'decision_tree': dt_risk,
-            'random_forest': rf_risk
-        }
+        rule_based = scores['rule_based']
+        probabilities = scores['probabilities']
+        labels = {model_type: np.asarray(scores['levels'])[np.argmax(proba, axis=1)]
+                  for model_type, proba in probabilities.items()}
+        dt_risk = labels.get('dt', rule_based)
+        rf_risk = labels.get('rf', rule_based)
+        hgb_risk = labels.get('hgb')
+        
+        model_version = self.model_version
+        CLASSIFIER_CALLS.inc(model_version=model_version)
+        CLASSIFIER_MEMBERS.inc(len(members), model_version=model_version,
+                               method='rules' if dt_risk is rule_based and rf_risk is rule_based else 'model')
+        
+        results = []
+        for i in range(len(members)):
+            result = {
+                'rule_based': str(rule_based[i]),
+                'decision_tree': str(dt_risk[i]),
+                'random_forest': str(rf_risk[i])
+            }
+            # 只有训练了梯度提升模型时才返回它的结果
+            if hgb_risk is not None:
+                result['gradient_boosting'] = str(hgb_risk[i])
+            result['confidence'] = float(scores['confidence'][i])
+            if details:
+                result['probabilities'] = {
+                    model_type: dict(zip(scores['levels'], proba[i].tolist()))
+                    for model_type, proba in probabilities.items()
+                }
+                features = scores['features'] if scores['features'] is not None else data
+                result['features'] = {col: value.item() if hasattr(value, 'item') else value
+                                      for col, value in features.iloc[i].items()}
+            results.append(result)
+        return results
+    
+    def _save_or_remove(self, name, obj):
+        """保存对象；对象为None（模型未训练）时删除旧文件，不保存None"""
+        path = os.path.join(self.model_path, name)
+        if obj is None:
+            if os.path.exists(path):
+                os.remove(path)
+            return
+        with open(path, 'wb') as f:
+            pickle.dump(obj, f)
     
     def save_models(self):
-        """保存训练好的模型和编码器"""
-        # 保存决策树模型
-        with open(os.path.join(self.model_path, 'dt_model.pkl'), 'wb') as f:
-            pickle.dump(self.dt_model, f)
+        """保存训练好的模型和编码器，未训练的模型不保存（并删除上次训练留下的文件）"""
+        # 保存决策树、随机森林和梯度提升模型
+        for model_type, (attr, _) in MODEL_TYPES.items():
+            self._save_or_remove(MODEL_TYPE_FILES[model_type], getattr(self, attr))
         
-        # 保存随机森林模型
-        with open(os.path.join(self.model_path, 'rf_model.pkl'), 'wb') as f:
-            pickle.dump(self.rf_model, f)
+        # 保存置信度校准器
+        self._save_or_remove('confidence_calibrator.pkl', self.confidence_calibrator)
         
         # 保存标签编码器
         with open(os.path.join(self.model_path, 'label_encoders.pkl'), 'wb') as f:
@@ -230,17 +564,42 @@ class FamilyRiskClassifier:
         # 保存特征名称
         with open(os.path.join(self.model_path, 'feature_names.pkl'), 'wb') as f:
             pickle.dump(self.feature_names, f)
+        
+        self._set_model_version(self.compute_model_version())
     
-    def load_models(self):
-        """加载保存的模型和编码器"""
+    @timed('model.load')
+    def load_models(self, use_compact=True):
+        """
+        加载保存的模型和编码器
+        
+        参数:
+        - use_compact: 存在由当前随机森林生成的压缩模型（见 model_compression.py）时使用压缩模型
+        """
         try:
-            # 加载决策树模型
-            with open(os.path.join(self.model_path, 'dt_model.pkl'), 'rb') as f:
-                self.dt_model = pickle.load(f)
+            # 随机森林优先使用压缩模型（加载更快）
+            compact = load_compact_forest(self.model_path) if use_compact else None
+            
+            # 加载决策树、随机森林和梯度提升模型（未训练的模型没有文件，为None；旧版本训练的模型目录中没有梯度提升模型）
+            for model_type, (attr, _) in MODEL_TYPES.items():
+                path = os.path.join(self.model_path, MODEL_TYPE_FILES[model_type])
+                if model_type == 'rf' and compact is not None:
+                    self.rf_model = compact
+                elif os.path.exists(path):
+                    with open(path, 'rb') as f:
+                        setattr(self, attr, pickle.load(f))
+                else:
+                    setattr(self, attr, None)
             
-            # 加载随机森林模型
-            with open(os.path.join(self.model_path, 'rf_model.pkl'), 'rb') as f:
-                self.rf_model = pickle.load(f)
+            if all(getattr(self, attr) is None for attr, _ in MODEL_TYPES.values()):
+                raise FileNotFoundError(f"{self.model_path} 中没有训练好的模型")
+            
+            # 加载置信度校准器（旧版本训练的模型目录中没有）
+            calibrator_path = os.path.join(self.model_path, 'confidence_calibrator.pkl')
+            if os.path.exists(calibrator_path):
+                with open(calibrator_path, 'rb') as f:
+                    self.confidence_calibrator = pickle.load(f)
+            else:
+                self.confidence_calibrator = None
             
             # 加载标签编码器
             with open(os.path.join(self.model_path, 'label_encoders.pkl'), 'rb') as f:
@@ -258,6 +617,7 @@ class FamilyRiskClassifier:
                 # 如果特征名称文件不存在，使用默认特征名称
                 self.feature_names = ['age', 'job', 'marital', 'education', 'balance', 'housing', 'loan']
             
+            self._set_model_version(self.compute_model_version())
             return True
         except Exception as e:
             print(f"加载模型失败: {e}")
@@ -265,8 +625,9 @@ class FamilyRiskClassifier:
 
 # 示例用法
 if __name__ == "__main__":
-    # 加载数据
-    data = pd.read_csv("Dataset/bank.csv", sep=',')
+    # 加载数据（使用带类型的列式缓存）
+    from dataset_loader import load_dataset
+    data = load_dataset()
     
     # 选择特征
     features = ['age', 'job', 'marital', 'education', 'balance', 'housing', 'loan']
@@ -293,4 +654,5 @@ if __name__ == "__main__":
     print("\n家庭成员风险评估:")
     print(f"规则型风险: {risk['rule_based']}")
     print(f"决策树模型风险: {risk['decision_tree']}")
-    print(f"随机森林模型风险: {risk['random_forest']}")
\ No newline at end of file
+    print(f"随机森林模型风险: {risk['random_forest']}")
+    print(f"置信度: {risk['confidence']:.2%}")
\ No newline at end of file
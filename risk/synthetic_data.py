@@ -0,0 +1,233 @@
+import os
+import argparse
+import time
+from typing import Dict, Iterator, List, Optional, Any
+
+import numpy as np
+import pandas as pd
+
+from dataset_loader import DATASET_PATH, BANK_DTYPES, load_dataset
+
+# 拟合数值分布时使用的分位点数量
+QUANTILE_KNOTS = 1001
+
+# 余额按住房贷款和个人贷款的组合分别拟合（风险规则依赖这三列的联合分布）
+JOINT_COLUMNS = ('housing', 'loan')
+CONDITIONAL_COLUMN = 'balance'
+
+
+def _fit_quantiles(values: np.ndarray, knots: int = QUANTILE_KNOTS) -> List[float]:
+    """经验分位数，用于逆变换采样"""
+    return np.quantile(values.astype('float64'), np.linspace(0, 1, knots)).tolist()
+
+
+def _sample_quantiles(rng: np.random.Generator, quantiles: np.ndarray, size: int) -> np.ndarray:
+    """在分位点之间线性插值的逆变换采样"""
+    probs = np.linspace(0, 1, len(quantiles))
+    return np.interp(rng.random(size), probs, quantiles)
+
+
+class SyntheticHouseholdGenerator:
+    """
+    合成家庭数据生成器
+
+    从 bank.csv 拟合各列的分布：分类列使用类别频率，数值列使用经验分位数；
+    住房贷款和个人贷款按联合频率采样，余额按这两列的每种组合分别拟合，
+    因此生成数据的风险等级比例与原数据一致。数据按块生成，可以流式写出任意行数。
+    """
+
+    def __init__(self, columns: List[str], categorical: Dict[str, Dict[str, Any]],
+                 numeric: Dict[str, List[float]], joint: Dict[str, Any]):
+        """
+        参数:
+        - columns: 输出列顺序
+        - categorical: 分类列 -> {'categories': [...], 'probs': [...]}
+        - numeric: 数值列 -> 分位点列表
+        - joint: 联合分布 {'cells': [[housing, loan], ...], 'probs': [...], 'balance': [分位点列表, ...]}
+        """
+        self.columns = list(columns)
+        self.categorical = categorical
+        self.numeric = numeric
+        self.joint = joint
+
+        # 采样时使用的数组形式
+        self._category_probs = {col: np.asarray(spec['probs']) for col, spec in categorical.items()}
+        self._numeric_quantiles = {col: np.asarray(q) for col, q in numeric.items()}
+        self._joint_probs = np.asarray(joint['probs'])
+        self._joint_balance = [np.asarray(q) for q in joint['balance']]
+
+    @classmethod
+    def fit(cls, data: pd.DataFrame, knots: int = QUANTILE_KNOTS) -> "SyntheticHouseholdGenerator":
+        """
+        从数据集拟合生成器
+
+        参数:
+        - data: 与 bank.csv 结构相同的数据
+        - knots: 数值列的分位点数量
+        """
+        categorical = {}
+        numeric = {}
+        for col in data.columns:
+            if col in JOINT_COLUMNS or col == CONDITIONAL_COLUMN:
+                continue
+            if pd.api.types.is_numeric_dtype(data[col]):
+                numeric[col] = _fit_quantiles(data[col].to_numpy(), knots)
+            else:
+                freq = data[col].astype(str).value_counts(normalize=True).sort_index()
+                categorical[col] = {'categories': freq.index.tolist(), 'probs': freq.to_numpy().tolist()}
+
+        cells = []
+        probs = []
+        balance = []
+        for key, group in data.groupby(list(JOINT_COLUMNS), observed=True):
+            cells.append([str(k) for k in key])
+            probs.append(len(group) / len(data))
+            balance.append(_fit_quantiles(group[CONDITIONAL_COLUMN].to_numpy(), knots))
+
+        return cls(
+            columns=list(data.columns),
+            categorical=categorical,
+            numeric=numeric,
+            joint={'cells': cells, 'probs': probs, 'balance': balance}
+        )
+
+    @classmethod
+    def from_dataset(cls, path: str = DATASET_PATH) -> "SyntheticHouseholdGenerator":
+        """从数据集文件拟合（使用 load_dataset 的列式缓存）"""
+        return cls.fit(load_dataset(path))
+
+    def to_dict(self) -> Dict[str, Any]:
+        """拟合结果，可保存为JSON后用 from_dict 恢复"""
+        return {
+            'columns': self.columns,
+            'categorical': self.categorical,
+            'numeric': self.numeric,
+            'joint': self.joint
+        }
+
+    @classmethod
+    def from_dict(cls, params: Dict[str, Any]) -> "SyntheticHouseholdGenerator":
+        return cls(**params)
+
+    def sample(self, n_rows: int, rng: np.random.Generator) -> pd.DataFrame:
+        """生成 n_rows 行数据"""
+        columns = {}
+
+        for col, spec in self.categorical.items():
+            codes = rng.choice(len(spec['categories']), size=n_rows, p=self._category_probs[col])
+            columns[col] = pd.Categorical.from_codes(codes, categories=spec['categories'])
+
+        for col, quantiles in self._numeric_quantiles.items():
+            values = np.rint(_sample_quantiles(rng, quantiles, n_rows))
+            columns[col] = values.astype(BANK_DTYPES.get(col, 'int64'))
+
+        # 先按联合频率抽取贷款组合，再在每个组合内采样余额
+        cell_codes = rng.choice(len(self._joint_probs), size=n_rows, p=self._joint_probs)
+        balance = np.empty(n_rows, dtype='float64')
+        for index, quantiles in enumerate(self._joint_balance):
+            mask = cell_codes == index
+            balance[mask] = _sample_quantiles(rng, quantiles, int(mask.sum()))
+        columns[CONDITIONAL_COLUMN] = np.rint(balance).astype(BANK_DTYPES.get(CONDITIONAL_COLUMN, 'int64'))
+
+        cells = self.joint['cells']
+        for position, col in enumerate(JOINT_COLUMNS):
+            categories = sorted({cell[position] for cell in cells})
+            lookup = np.array([categories.index(cell[position]) for cell in cells])
+            columns[col] = pd.Categorical.from_codes(lookup[cell_codes], categories=categories)
+
+        return pd.DataFrame(columns)[self.columns]
+
+    def generate(self, n_rows: int, chunk_size: int = 1_000_000, seed: int = 0) -> Iterator[pd.DataFrame]:
+        """
+        按块生成数据
+
+        每块使用由 (seed, 块序号) 派生的随机数生成器，相同的 seed 和 chunk_size 生成相同的数据。
+
+        参数:
+        - n_rows: 总行数
+        - chunk_size: 每块行数
+        - seed: 随机种子
+        """
+        if chunk_size < 1:
+            raise ValueError("chunk_size 必须大于0")
+        for chunk_index, start in enumerate(range(0, n_rows, chunk_size)):
+            rng = np.random.default_rng([seed, chunk_index])
+            yield self.sample(min(chunk_size, n_rows - start), rng)
+
+    def write(self, path: str, n_rows: int, chunk_size: int = 1_000_000, seed: int = 0,
+              fmt: Optional[str] = None, progress_callback=None) -> int:
+        """
+        流式写出合成数据，内存占用只与 chunk_size 有关
+
+        参数:
+        - path: 输出文件路径
+        - n_rows: 总行数
+        - chunk_size: 每块行数（Parquet中每块为一个行组）
+        - seed: 随机种子
+        - fmt: 'csv' 或 'parquet'，默认按文件扩展名判断
+        - progress_callback: 进度回调 callback(进度0-1, 描述)
+
+        返回:
+        - 写出的行数
+        """
+        fmt = fmt or ('parquet' if path.endswith('.parquet') else 'csv')
+        if fmt not in ('csv', 'parquet'):
+            raise ValueError(f"不支持的输出格式: {fmt}")
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        written = 0
+        writer = None
+        tmp_path = f"{path}.tmp"
+        try:
+            for chunk in self.generate(n_rows, chunk_size, seed):
+                if fmt == 'csv':
+                    chunk.to_csv(tmp_path, mode='w' if written == 0 else 'a', header=written == 0, index=False)
+                else:
+                    import pyarrow as pa
+                    import pyarrow.parquet as pq
+                    table = pa.Table.from_pandas(chunk, preserve_index=False)
+                    if writer is None:
+                        writer = pq.ParquetWriter(tmp_path, table.schema)
+                    writer.write_table(table)
+                written += len(chunk)
+                if progress_callback is not None:
+                    progress_callback(written / n_rows, f"已生成 {written:,} / {n_rows:,} 行")
+            if writer is not None:
+                writer.close()
+                writer = None
+            if written == 0:
+                pd.DataFrame(columns=self.columns).to_csv(tmp_path, index=False)
+            os.replace(tmp_path, path)
+        finally:
+            if writer is not None:
+                writer.close()
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        return written
+
+
+def main():
+    """命令行生成合成数据"""
+    parser = argparse.ArgumentParser(description="根据 bank.csv 的分布生成合成家庭数据")
+    parser.add_argument('--rows', type=int, required=True, help="生成的行数")
+    parser.add_argument('--output', required=True, help="输出文件（.csv 或 .parquet）")
+    parser.add_argument('--source', default=DATASET_PATH, help="用于拟合分布的数据集")
+    parser.add_argument('--chunk-size', type=int, default=1_000_000, help="每块行数")
+    parser.add_argument('--seed', type=int, default=0, help="随机种子")
+    parser.add_argument('--format', choices=['csv', 'parquet'], help="输出格式，默认按扩展名判断")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    generator = SyntheticHouseholdGenerator.from_dataset(args.source)
+    written = generator.write(
+        args.output, args.rows, chunk_size=args.chunk_size, seed=args.seed, fmt=args.format,
+        progress_callback=lambda progress, message: print(f"{progress:6.1%} {message}")
+    )
+    print(f"已写出 {written:,} 行到 {args.output}，用时 {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+"""
+测试REST评分服务（不访问外部API）
+"""
+import os
+import json
+import socket
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+import numpy as np
+import uvicorn
+
+from api_server import RiskAdviceService, load_shared_classifier, MODEL_ATTRIBUTES
+
+
+class FakeChatAssistant:
+    """模拟聊天助手，模拟较慢的外部调用"""
+
+    def process_query(self, query, chat_history=None):
+        time.sleep(0.2)
+        return {'response': f"收到: {query}", 'tasks': [], 'task_results': [], 'chat_history': []}
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def _post(base_url, path, payload):
+    request = urllib.request.Request(
+        base_url + path, data=json.dumps(payload).encode('utf-8'),
+        headers={'Content-Type': 'application/json'}, method='POST'
+    )
+    try:
+        with urllib.request.urlopen(request, timeout=10) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+
+def test_shared_classifier(tmp_path):
+    """测试共享模型以内存映射方式加载，预测结果与原模型一致"""
+    shared = load_shared_classifier(shared_dir=str(tmp_path))
+    if shared.rf_model is None:
+        return
+
+    versions = list(tmp_path.iterdir())
+    assert len(versions) == 1
+    assert sorted(p.name for p in versions[0].iterdir()) == sorted(f"{a}.joblib" for a in MODEL_ATTRIBUTES)
+
+    from risk_classifier import FamilyRiskClassifier
+    original = FamilyRiskClassifier()
+    for member in [(25, -100, 'yes', 'yes'), (45, 500, 'no', 'yes'), (60, 20000, 'no', 'no')]:
+        assert shared.classify_risk_level(*member) == original.classify_risk_level(*member)
+
+    # 再次加载复用已转存的版本
+    load_shared_classifier(shared_dir=str(tmp_path))
+    assert list(tmp_path.iterdir()) == versions
+
+
+def test_shared_compact_forest_is_memory_mapped(tmp_path):
+    """测试压缩的随机森林以内存映射方式共享，预测结果与压缩模型一致"""
+    from dataset_loader import load_dataset
+    from model_compression import CompactForest, compress_random_forest
+    from risk_classifier import FamilyRiskClassifier
+
+    model_path = str(tmp_path / "models")
+    os.makedirs(model_path)
+    data = load_dataset()
+    trained = FamilyRiskClassifier(auto_init=False)
+    trained.model_path = model_path
+    trained.train(data, model_types=['dt', 'rf'])
+    compress_random_forest(trained, data)
+
+    shared = load_shared_classifier(model_path=model_path, shared_dir=str(tmp_path / "shared"))
+    assert isinstance(shared.rf_model, CompactForest)
+    assert all(isinstance(getattr(shared.rf_model, name), np.memmap)
+               for name in ('feature', 'threshold', 'children_left', 'children_right', 'leaf_proba'))
+
+    compact = FamilyRiskClassifier(auto_init=False)
+    compact.model_path = model_path
+    assert compact.load_models() and isinstance(compact.rf_model, CompactForest)
+    for member in [(25, -100, 'yes', 'yes'), (45, 500, 'no', 'yes'), (60, 20000, 'no', 'no')]:
+        assert shared.classify_risk_level(*member) == compact.classify_risk_level(*member)
+
+
+def test_api_endpoints(tmp_path):
+    """测试各端点的响应，以及慢请求并发处理"""
+    print("\n===== 测试REST服务 =====")
+    service = RiskAdviceService(
+        classifier=load_shared_classifier(shared_dir=str(tmp_path)),
+        chat_assistant=FakeChatAssistant(),
+        max_workers=8
+    )
+    port = _free_port()
+    server = uvicorn.Server(uvicorn.Config(service.create_app(), host='127.0.0.1', port=port, log_level='warning'))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        deadline = time.time() + 10
+        while not server.started and time.time() < deadline:
+            time.sleep(0.05)
+
+        with urllib.request.urlopen(base_url + "/health", timeout=5) as response:
+            assert json.loads(response.read())['status'] == 'ok'
+
+        status, risk = _post(base_url, "/risk/classify", {'age': 30, 'balance': -200, 'loan': True, 'housing': True})
+        assert status == 200 and risk['rule_based'] == 'High'
+
+        with urllib.request.urlopen(base_url + "/metrics", timeout=5) as response:
+            assert 'risk_classifier_calls_total{model_version=' in response.read().decode('utf-8')
+
+        status, rec = _post(base_url, "/recommendations", {'risk_level': 'Medium', 'age': 40, 'balance': 20000})
+        assert status == 200 and sum(p['allocation'] for p in rec['products']) == 100
+
+        status, error = _post(base_url, "/recommendations", {'age': 40})
+        assert status == 400 and 'risk_level' in error['error']
+
+        rng = np.random.default_rng(1)
+        stocks_data = [
+            {'ticker': t, 'data': {'prices': [
+                {'time': f"2024-01-{d + 1:02d}", 'close': float(p)}
+                for d, p in enumerate(100 * np.cumprod(1 + rng.normal(0, 0.01, 20)))
+            ]}}
+            for t in ['AAPL', 'MSFT']
+        ]
+        status, analytics = _post(base_url, "/portfolio/analytics",
+                                  {'portfolio': [{'ticker': 'AAPL'}, {'ticker': 'MSFT'}], 'stocks_data': stocks_data})
+        assert status == 200 and analytics['metrics']['holdings_count'] == 2
+
+        # 8个各需0.2秒的聊天请求并发执行
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            results = list(pool.map(lambda i: _post(base_url, "/chat", {'query': f"问题{i}"}), range(8)))
+        elapsed = time.perf_counter() - start
+        print(f"8个并发聊天请求耗时: {elapsed:.3f}s")
+        assert all(status == 200 for status, _ in results)
+        assert results[3][1]['response'] == "收到: 问题3"
+        assert elapsed < 1.0
+
+        # 带 ?profile=1 的请求保存性能剖析结果
+        with mock.patch('profiling.PROFILE_DIR', str(tmp_path / 'profiles')):
+            request = urllib.request.Request(
+                base_url + "/chat?profile=1", data=json.dumps({'query': "剖析"}).encode('utf-8'), method='POST'
+            )
+            with urllib.request.urlopen(request, timeout=10) as response:
+                profile_path = response.headers['X-Profile-Path']
+        assert profile_path and profile_path.startswith(str(tmp_path / 'profiles' / 'api.chat-'))
+    finally:
+        server.should_exit = True
+        thread.join(timeout=10)
+
+
+def main():
+    """运行所有测试"""
+    import tempfile
+    from pathlib import Path
+
+    for test in [test_shared_classifier, test_shared_compact_forest_is_memory_mapped, test_api_endpoints]:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            try:
+                test(Path(tmp_dir))
+                print(f"✅ {test.__name__} 测试通过")
+            except Exception as e:
+                print(f"❌ {test.__name__} 测试失败: {e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+"""
+热点路径基准测试（需要安装 pytest-benchmark）
+
+直接运行 pytest 时只测量耗时；通过本文件的 main() 运行时保存或比较基线：
+    python test_benchmarks.py --save-baseline        # 保存当前机器的基线
+    python test_benchmarks.py --max-regression 15    # 与最近保存的基线比较，最短耗时退化超过15%时失败
+还没有基线时会先保存一次。比较使用每个基准的最短耗时，受机器负载的影响比平均值小。
+"""
+import os
+import sys
+import glob
+import json
+import random
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+pytest.importorskip('pytest_benchmark')
+
+import pandas as pd
+
+from risk_classifier import FamilyRiskClassifier
+from investment_advisor import InvestmentAdvisor
+from financial_data_provider import FinancialDataProvider
+from financial_integration import AIFinancialChatAssistant
+
+# 基线保存目录（按机器和Python版本分子目录）
+BENCHMARK_STORAGE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmarks')
+
+# 默认允许的耗时退化百分比
+DEFAULT_MAX_REGRESSION = int(os.environ.get('BENCHMARK_MAX_REGRESSION', 20))
+
+# 每个基准最多测量0.5秒，保持完整测试的运行时间
+pytestmark = pytest.mark.benchmark(max_time=0.5)
+
+
+def _members(n, seed=0):
+    rng = random.Random(seed)
+    return [
+        {
+            'age': rng.randint(20, 80),
+            'balance': rng.randint(-2000, 20000),
+            'loan': rng.choice(['yes', 'no']),
+            'housing': rng.choice(['yes', 'no']),
+            'job': rng.choice(['admin.', 'technician', 'management', 'blue-collar']),
+            'marital': rng.choice(['married', 'single', 'divorced']),
+            'education': rng.choice(['primary', 'secondary', 'tertiary'])
+        }
+        for _ in range(n)
+    ]
+
+
+def _member_frame(members):
+    return pd.DataFrame([
+        {**m, 'loan': int(m['loan'] == 'yes'), 'housing': int(m['housing'] == 'yes')}
+        for m in members
+    ])
+
+
+class FakeAPIHandler(BaseHTTPRequestHandler):
+    """同时模拟金融数据API和AI聊天API，返回固定数据"""
+
+    def _send(self, payload):
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        path = self.path.split('?')[0]
+        if path.startswith('/prices'):
+            self._send({'prices': [{'time': f"2024-01-{d:02d}", 'close': 180 + d} for d in range(1, 31)]})
+        elif path.startswith('/financial-metrics'):
+            self._send({'financial_metrics': [{'pe_ratio': 28.5, 'pb_ratio': 45.1, 'roe': 1.56}]})
+        else:
+            self._send({'results': []})
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        request = json.loads(self.rfile.read(length) or b'{}')
+        prompt = request.get('messages', [{}])[-1].get('content', '')
+        content = "获取AAPL股价\n获取AAPL财务指标" if '子任务' in prompt else "AAPL近期走势平稳，估值偏高。"
+        self._send({
+            'choices': [{'message': {'role': 'assistant', 'content': content}}],
+            'usage': {'prompt_tokens': len(prompt), 'completion_tokens': len(content)}
+        })
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture(scope='module')
+def classifier():
+    return FamilyRiskClassifier()
+
+
+@pytest.fixture(scope='module')
+def fake_api():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), FakeAPIHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def test_classify_single(benchmark, classifier):
+    """单个成员的风险评估"""
+    member = _members(1)[0]
+    result = benchmark(lambda: classifier.classify_risk_level(**member))
+    assert result['rule_based'] in ('High', 'Medium', 'Low')
+
+
+def test_classify_batch(benchmark, classifier):
+    """200个成员的批量风险评估"""
+    members = _members(200)
+    results = benchmark(classifier.classify_risk_levels, members)
+    assert len(results) == 200
+
+
+def test_preprocess_data(benchmark, classifier):
+    data = _member_frame(_members(200))[classifier.feature_names]
+    processed = benchmark(classifier.preprocess_data, data)
+    assert len(processed) == 200
+
+
+@pytest.mark.parametrize('model_type', ['dt', 'rf', 'hgb'])
+def test_predict(benchmark, classifier, model_type):
+    if getattr(classifier, f"{model_type}_model") is None:
+        pytest.skip("没有训练好的模型")
+    data = _member_frame(_members(200))
+    labels = benchmark(classifier.predict, data, model_type)
+    assert len(labels) == 200
+
+
+def test_personalized_recommendation(benchmark):
+    advisor = InvestmentAdvisor()
+    recommendation = benchmark(
+        advisor.get_personalized_recommendation,
+        risk_level='Medium', age=40, balance=20000, has_loans=False
+    )
+    assert recommendation['products']
+
+
+def test_to_dataframe(benchmark):
+    provider = FinancialDataProvider(api_key='benchmark')
+    data = {'results': [{'ticker': 'AAPL', 'time': f"2024-01-{d % 28 + 1:02d}", 'close': 180.0 + d} for d in range(500)]}
+    frame = benchmark(provider.to_dataframe, data)
+    assert len(frame) == 500
+
+
+def test_chat_pipeline(benchmark, fake_api):
+    """聊天流程：分解查询、两次金融数据请求和生成回复，全部由本地模拟服务器响应"""
+    assistant = AIFinancialChatAssistant(financial_api_key='benchmark', ai_api_key='benchmark')
+    assistant.financial_data.base_url = fake_api
+    assistant.ai_assistant.base_url = fake_api
+
+    result = benchmark(assistant.process_query, "AAPL的股价和财务指标怎么样？")
+    assert result['tasks'] == ["获取AAPL股价", "获取AAPL财务指标"]
+    assert result['response'] == "AAPL近期走势平稳，估值偏高。"
+
+
+def main():
+    """运行基准测试，保存基线或与最近保存的基线比较"""
+    parser = argparse.ArgumentParser(description="热点路径基准测试")
+    parser.add_argument('--save-baseline', action='store_true', help="保存本次结果作为新的基线")
+    parser.add_argument('--max-regression', type=int, default=DEFAULT_MAX_REGRESSION,
+                        help="允许的耗时退化百分比，默认读取环境变量 BENCHMARK_MAX_REGRESSION（20）")
+    args = parser.parse_args()
+
+    pytest_args = [
+        os.path.abspath(__file__), '-q', '--benchmark-only',
+        f"--benchmark-storage={BENCHMARK_STORAGE}",
+        '--benchmark-columns=min,mean,median,ops,rounds'
+    ]
+    has_baseline = bool(glob.glob(os.path.join(BENCHMARK_STORAGE, '*', '*.json')))
+    if args.save_baseline or not has_baseline:
+        if not has_baseline:
+            print("还没有保存的基线，本次结果将作为基线")
+        pytest_args.append('--benchmark-save=baseline')
+    else:
+        pytest_args.extend(['--benchmark-compare', f"--benchmark-compare-fail=min:{args.max_regression}%"])
+    return pytest.main(pytest_args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,67 @@
+"""
+测试图表渲染缓存
+"""
+import time
+
+import numpy as np
+
+from chart_cache import ChartCache
+
+
+def test_pie_chart_cache():
+    """测试相同图表命中缓存、不同数据重新渲染"""
+    print("\n===== 测试图表渲染缓存 =====")
+    cache = ChartCache(max_entries=2)
+    labels = ['高风险', '中风险', '低风险']
+
+    start = time.perf_counter()
+    image = cache.pie([2, 1, 1], labels)
+    cold = time.perf_counter() - start
+
+    start = time.perf_counter()
+    cached = cache.pie(np.array([2, 1, 1]), labels)
+    warm = time.perf_counter() - start
+    print(f"首次渲染: {cold * 1000:.1f}ms, 命中缓存: {warm * 1000:.3f}ms")
+
+    assert image.startswith(b'\x89PNG')
+    assert cached is image
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    svg = cache.pie([2, 1, 1], labels, fmt='svg')
+    assert b'<svg' in svg
+    assert cache.pie([1, 1, 1], labels) != image
+    assert cache.misses == 3
+
+
+def test_lru_eviction():
+    """测试超过容量时淘汰最久未使用的图表"""
+    cache = ChartCache(max_entries=2, dpi=20)
+    cache.pie([1, 2], ['A', 'B'])
+    cache.pie([2, 1], ['A', 'B'])
+    cache.pie([1, 2], ['A', 'B'])  # 访问后变为最近使用
+    cache.pie([3, 1], ['A', 'B'])
+
+    assert len(cache) == 2
+    cache.pie([1, 2], ['A', 'B'])
+    assert cache.hits == 2
+    cache.pie([2, 1], ['A', 'B'])
+    assert cache.misses == 4
+
+
+def main():
+    """运行所有测试"""
+    tests = [
+        test_pie_chart_cache,
+        test_lru_eviction
+    ]
+
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__} 测试通过")
+        except Exception as e:
+            print(f"❌ {test.__name__} 测试失败: {e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+测试数据集加载与列式缓存
+"""
+import os
+import shutil
+import time
+
+import pandas as pd
+
+from dataset_loader import DATASET_PATH, load_dataset
+
+
+def test_typed_dataset_cache(tmp_path):
+    """测试数据集按类型解析，并在文件未变化时从缓存读取"""
+    print("\n===== 测试数据集列式缓存 =====")
+    csv_path = tmp_path / "bank.csv"
+    shutil.copy(DATASET_PATH, csv_path)
+    cache_dir = str(tmp_path / "cache")
+
+    start = time.perf_counter()
+    data = load_dataset(str(csv_path), cache_dir=cache_dir)
+    cold = time.perf_counter() - start
+
+    start = time.perf_counter()
+    cached = load_dataset(str(csv_path), cache_dir=cache_dir)
+    warm = time.perf_counter() - start
+    print(f"首次解析: {cold * 1000:.1f}ms, 读取缓存: {warm * 1000:.1f}ms")
+
+    assert isinstance(data['job'].dtype, pd.CategoricalDtype)
+    assert str(data['balance'].dtype) == 'int32'
+    assert cached.equals(data)
+    assert len(data) == len(pd.read_csv(DATASET_PATH))
+
+    # 只修改时间变化时复用缓存
+    os.utime(csv_path, None)
+    cache_files = sorted(os.listdir(cache_dir))
+    assert load_dataset(str(csv_path), cache_dir=cache_dir).equals(data)
+    assert sorted(os.listdir(cache_dir)) == cache_files
+
+    # 内容变化时重新解析并替换旧缓存
+    with open(csv_path, 'a', encoding='utf-8') as f:
+        f.write("30,admin.,single,secondary,no,-50,yes,yes,unknown,5,may,100,1,-1,0,unknown,no\n")
+    updated = load_dataset(str(csv_path), cache_dir=cache_dir)
+    assert len(updated) == len(data) + 1
+    assert len([f for f in os.listdir(cache_dir) if f.endswith('.feather')]) == 1
+
+
+def main():
+    """运行所有测试"""
+    import tempfile
+    from pathlib import Path
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        try:
+            test_typed_dataset_cache(Path(tmp_dir))
+            print("✅ test_typed_dataset_cache 测试通过")
+        except Exception as e:
+            print(f"❌ test_typed_dataset_cache 测试失败: {e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+"""
+测试家庭档案库
+"""
+import os
+import time
+import tempfile
+
+import pandas as pd
+
+from family_store import FamilyStore, MEMBER_FIELDS, member_key
+from member_store import MemberStore
+from risk_classifier import FamilyRiskClassifier
+
+
+def _book(households, members_per_household=3):
+    """生成顾问名册：每个家庭若干成员"""
+    levels = ['High', 'Medium', 'Low']
+    return pd.DataFrame([{
+        'household': f"家庭{h:05d}",
+        'name': f"成员{m}",
+        'age': 25 + (h + m) % 50,
+        'balance': (h * 37 + m * 101) % 5000 - 500,
+        'loan': (h + m) % 4 == 0,
+        'housing': (h + m) % 3 == 0,
+        'job': 'technician',
+        'risk_rf': levels[(h + m) % 3],
+        'monthly_savings': 1000 + m * 500
+    } for h in range(households) for m in range(members_per_household)])
+
+
+def test_households_and_members():
+    """测试家庭和成员的增删改查，更新只修改给出的字段"""
+    store = FamilyStore(':memory:')
+    household_id = store.create_household("张家")
+    assert store.create_household("张家") == household_id
+    assert store.find_household("张家")['household_id'] == household_id
+    other_id = store.create_household("李家")
+
+    member_id = store.upsert_member(household_id, {'name': '张三', 'age': 30, 'balance': 500, 'loan': True,
+                                                   'housing': 'no', 'risk_rf': 'Medium'})
+    store.upsert_member(household_id, {'name': '张三', 'investment_portfolio': 'Balanced', 'monthly_savings': 2000})
+    store.upsert_member(other_id, {'name': '张三', 'age': 50, 'risk_rf': 'Low'})
+    member = store.get_member(household_id, '张三')
+    assert member['member_id'] == member_id and member['age'] == 30 and member['balance'] == 500
+    assert member['loan'] is True and member['housing'] is False
+    assert member['investment_portfolio'] == 'Balanced' and member['monthly_savings'] == 2000
+    assert set(member) == set(MEMBER_FIELDS) | {'member_id', 'household_id'}
+
+    store.upsert_member(household_id, {'name': '张四', 'age': 5, 'risk_rf': 'High'})
+    assert [m['name'] for m in store.members(household_id)] == ['张三', '张四']
+    assert [m['name'] for m in store.members(household_id, risk_levels=['High'])] == ['张四']
+    assert [m['household'] for m in store.find_members(name='张三')] == ['张家', '李家']
+    assert [m['name'] for m in store.find_members(risk_level='Low')] == ['张三']
+
+    store.update_members({member_id: {'risk_rf': 'High', 'confidence': 0.9}})
+    assert store.get_member(household_id, '张三')['risk_rf'] == 'High'
+
+    assert store.list_households(prefix='张') == [{'household_id': household_id, 'name': '张家', 'member_count': 2}]
+    store.delete_members(household_id, ['张四'])
+    assert len(store.members(household_id)) == 1
+    store.delete_household(household_id)
+    assert store.get_member(household_id, '张三') is None and store.count_households() == 1
+
+    try:
+        store.upsert_member(other_id, {'age': 10})
+        assert False, "没有姓名的成员应当抛出异常"
+    except ValueError:
+        pass
+
+
+def test_delete_cascades_to_member_store():
+    """测试删除成员或家庭时同时删除成员特征库中的评估结果"""
+    member_store = MemberStore(':memory:')
+    store = FamilyStore(':memory:', member_store=member_store)
+    classifier = FamilyRiskClassifier(auto_init=False)
+    zhang, li = store.create_household("张家"), store.create_household("李家")
+    for household_id in (zhang, li):
+        for name, balance in (('甲', -100), ('乙', 500), ('丙', 5000)):
+            store.upsert_member(household_id, {'name': name, 'age': 40, 'balance': balance})
+    for household_id in (zhang, li):
+        members = store.members(household_id)
+        member_store.score(classifier, members, [member_key(household_id, m['name']) for m in members])
+    assert len(member_store) == 6
+
+    store.delete_members(zhang, ['甲'])
+    assert member_store.get(member_key(zhang, '甲')) is None and len(member_store) == 5
+    store.delete_members(zhang)
+    assert len(member_store) == 3 and member_store.get(member_key(li, '甲')) is not None
+    store.delete_household(li)
+    assert len(member_store) == 0
+
+
+def test_bulk_import_export_large_book():
+    """测试数千个家庭的批量导入导出，以及按家庭、名称前缀和风险等级的查询"""
+    print("\n===== 测试家庭档案批量导入 =====")
+    book = _book(3000)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        store = FamilyStore(os.path.join(tmp_dir, 'families.sqlite'))
+
+        start = time.perf_counter()
+        assert store.import_members(book) == {'imported': 9000, 'skipped': []}
+        print(f"导入 9000 个成员: {time.perf_counter() - start:.3f}s")
+        assert store.count_households() == 3000 and store.count_households('家庭012') == 100
+
+        # 重复导入覆盖同名成员，不产生重复
+        store.import_members(book.head(3).assign(balance=99999))
+        assert store.count_households() == 3000
+        household = store.find_household('家庭00000')
+        assert [m['balance'] for m in store.members(household['household_id'])] == [99999] * 3
+
+        start = time.perf_counter()
+        households = store.list_households(prefix='家庭02', limit=20)
+        members = store.members(store.find_household('家庭02999')['household_id'])
+        high = store.find_members(risk_level='High', limit=5000)
+        elapsed = time.perf_counter() - start
+        print(f"查询耗时: {elapsed * 1000:.1f}ms")
+        assert [h['name'] for h in households][:2] == ['家庭02000', '家庭02001']
+        assert all(h['member_count'] == 3 for h in households)
+        assert len(members) == 3 and len(high) == 3000
+        assert elapsed < 0.5
+
+        # 导出后导入到新库，数据一致
+        path = os.path.join(tmp_dir, 'book.csv')
+        assert store.export_csv(path) == 9000
+        copy = FamilyStore(os.path.join(tmp_dir, 'copy.sqlite'))
+        assert copy.import_csv(path)['imported'] == 9000
+        exported = store.export_members()
+        pd.testing.assert_frame_equal(copy.export_members(), exported)
+        assert exported.columns.tolist() == ['household'] + MEMBER_FIELDS
+        assert exported['loan'].dtype == bool
+
+        only = store.export_members([household['household_id']])
+        assert only['household'].unique().tolist() == ['家庭00000']
+
+        with store._connect() as conn:
+            plan = ' '.join(row[-1] for row in conn.execute(
+                "EXPLAIN QUERY PLAN SELECT * FROM members WHERE household_id = ? AND name = ?", (1, '成员0')))
+        assert 'USING INDEX' in plan
+
+
+def test_import_validates_rows():
+    """测试导入时跳过没有姓名的行，家庭为空的行导入到默认家庭，不会创建名为 'None'/'nan' 的家庭"""
+    store = FamilyStore(':memory:')
+    rows = pd.DataFrame([
+        {'household': '张家', 'name': '张三', 'age': 30},
+        {'household': '张家', 'name': None, 'age': 40},
+        {'household': None, 'name': '李四', 'age': 50},
+        {'household': '  ', 'name': '王五', 'age': 60},
+        {'household': float('nan'), 'name': ' ', 'age': 70}
+    ])
+    result = store.import_members(rows, default_household='我的家庭')
+    assert result == {'imported': 3, 'skipped': [{'row': 2, 'reason': "缺少姓名"}, {'row': 5, 'reason': "缺少姓名"}]}
+    assert [h['name'] for h in store.list_households()] == ['张家', '我的家庭']
+    assert [m['name'] for m in store.members(store.find_household('我的家庭')['household_id'])] == ['李四', '王五']
+
+    # 没有默认家庭时，家庭为空的行同样被跳过
+    result = store.import_members([{'name': '赵六'}, {'household': '李家', 'name': '李七'}])
+    assert result == {'imported': 1, 'skipped': [{'row': 1, 'reason': "缺少家庭"}]}
+    assert store.find_household('None') is None and store.find_household('nan') is None
+
+
+def test_boolean_fields_round_trip():
+    """测试导出的CSV（True/False）可以原样导入，yes/True/1 混在同一列时都识别为“是”"""
+    store = FamilyStore(':memory:')
+    store.import_members([
+        {'household': 'A', 'name': 'a', 'loan': True, 'housing': False},
+        {'household': 'A', 'name': 'b', 'loan': False, 'housing': True}
+    ])
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, 'members.csv')
+        store.export_csv(path)
+        copy = FamilyStore(':memory:')
+        copy.import_csv(path)
+    assert ([(m['name'], m['loan'], m['housing']) for m in copy.members(copy.find_household('A')['household_id'])]
+            == [('a', True, False), ('b', False, True)])
+
+    mixed = FamilyStore(':memory:')
+    csv = "household,name,loan\nA,c,yes\nA,d,True\nA,e,1\nA,f,no\nA,g,False\n"
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, 'mixed.csv')
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(csv)
+        mixed.import_csv(path)
+    loans = {m['name']: m['loan'] for m in mixed.members(mixed.find_household('A')['household_id'])}
+    assert loans == {'c': True, 'd': True, 'e': True, 'f': False, 'g': False}
+
+
+def main():
+    """运行所有测试"""
+    tests = [
+        test_households_and_members,
+        test_import_validates_rows,
+        test_boolean_fields_round_trip,
+        test_delete_cascades_to_member_store,
+        test_bulk_import_export_large_book
+    ]
+
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__} 测试通过")
+        except Exception as e:
+            print(f"❌ {test.__name__} 测试失败: {e}")
+
+
+if __name__ == "__main__":
+    main()
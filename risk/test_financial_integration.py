@@ -0,0 +1,224 @@
+"""
+测试金融整合模块（不访问外部API）
+"""
+import time
+import threading
+
+import financial_integration
+from financial_integration import AIAnalysisGate, EnhancedInvestmentAdvisor, EnhancedRiskClassifier
+from metrics import AI_RISK_ANALYSES
+
+
+class FakeFinancialData:
+    """模拟金融数据提供者，记录调用次数并可模拟慢速端点"""
+
+    def __init__(self, delay=0.05, slow_tickers=(), slow_delay=1.0):
+        self.delay = delay
+        self.slow_tickers = set(slow_tickers)
+        self.slow_delay = slow_delay
+        self.calls = 0
+
+    def _respond(self, key):
+        self.calls += 1
+        time.sleep(self.slow_delay if key in self.slow_tickers else self.delay)
+        return {"results": [{"key": key}]}
+
+    def get_macro_data(self, data_type, limit=10):
+        return self._respond(data_type)
+
+    def get_company_profile(self, ticker):
+        return self._respond(ticker)
+
+    def get_earnings(self, ticker, limit=5):
+        if ticker == "TSLA":
+            return {"error": "not found", "status_code": 404}
+        return self._respond(ticker)
+
+
+def _make_advisor(fake, ttl=300, timeout=0.5):
+    financial_integration._MARKET_DATA_CACHE.clear()
+    advisor = EnhancedInvestmentAdvisor(
+        financial_api_key="test", ai_api_key="test",
+        market_data_ttl=ttl, market_data_timeout=timeout
+    )
+    advisor.financial_data = fake
+    return advisor
+
+
+def test_market_data_fan_out():
+    """测试市场数据并发获取：总耗时接近单次请求而不是13次之和"""
+    print("\n===== 测试市场数据并发获取 =====")
+    fake = FakeFinancialData(delay=0.1)
+    advisor = _make_advisor(fake)
+
+    start = time.perf_counter()
+    market_data = advisor.get_market_data()
+    elapsed = time.perf_counter() - start
+    print(f"获取耗时: {elapsed:.3f}s")
+
+    assert elapsed < 0.6
+    assert set(market_data['macro']) == {'interest_rates', 'gdp', 'inflation'}
+    assert len(market_data['company_profiles']) == 5
+    assert 'TSLA' not in market_data['earnings']
+    assert market_data['unavailable'] == ['earnings/TSLA']
+
+
+def test_market_data_deadline_and_cache():
+    """测试超过截止时间的端点被跳过，快照在TTL内被复用"""
+    print("\n===== 测试截止时间与缓存 =====")
+    fake = FakeFinancialData(delay=0.01, slow_tickers={'AAPL'}, slow_delay=1.0)
+    advisor = _make_advisor(fake, timeout=0.3)
+
+    start = time.perf_counter()
+    market_data = advisor.get_market_data()
+    assert time.perf_counter() - start < 0.8
+    assert 'AAPL' not in market_data['company_profiles']
+    assert 'company_profiles/AAPL' in market_data['unavailable']
+
+    # 其他实例（其他用户）在TTL内直接复用快照
+    calls = fake.calls
+    other = EnhancedInvestmentAdvisor(financial_api_key="test", ai_api_key="test")
+    other.financial_data = fake
+    assert other.get_market_data()['macro'] == market_data['macro']
+    assert fake.calls == calls
+
+    # TTL过期后重新获取
+    advisor.market_data_ttl = 0
+    advisor.get_market_data()
+    assert fake.calls > calls
+
+
+def test_market_data_concurrent_sessions():
+    """测试并发会话只获取一次，慢数据源不阻塞其他凭据的缓存读取，返回值修改不影响缓存"""
+    print("\n===== 测试市场数据并发会话 =====")
+    fake = FakeFinancialData(delay=0.2)
+    fake.api_key = "key-a"
+    advisor = _make_advisor(fake)
+
+    # 另一个凭据的快照已经缓存
+    other_fake = FakeFinancialData(delay=0.01)
+    other_fake.api_key = "key-b"
+    other = EnhancedInvestmentAdvisor(financial_api_key="test", ai_api_key="test")
+    other.financial_data = other_fake
+    other.get_market_data()
+
+    results, hit_times = [], []
+
+    def session():
+        results.append(advisor.get_market_data())
+
+    def other_session():
+        start = time.perf_counter()
+        other.get_market_data()
+        hit_times.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=session) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.05)
+    other_session()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    print(f"8个会话并发获取耗时: {elapsed:.3f}s，其他凭据读取缓存耗时: {hit_times[0] * 1000:.1f}ms")
+
+    # 8个会话只触发一次获取（12个成功端点 + 1个返回错误的端点）
+    assert fake.calls == 12 and len(results) == 8
+    assert elapsed < 0.6 and hit_times[0] < 0.05
+    assert all(result == results[0] for result in results)
+    # 不同凭据的快照互不共享
+    assert other_fake.calls == 12 and len(financial_integration._MARKET_DATA_CACHE) == 2
+
+    # 修改返回值不影响缓存的快照
+    results[0]['macro']['gdp']['results'].append({'key': 'mutated'})
+    results[0]['company_profiles'].clear()
+    cached = advisor.get_market_data()
+    assert cached['macro']['gdp'] == {'results': [{'key': 'gdp'}]} and len(cached['company_profiles']) == 5
+
+
+def test_recommendation_progress():
+    """测试投资建议的进度在各阶段（含每个市场数据端点）完成时推进"""
+    print("\n===== 测试投资建议进度回调 =====")
+    fake = FakeFinancialData(delay=0.02)
+    advisor = _make_advisor(fake)
+    advisor.ai_assistant.get_investment_advice = lambda **kwargs: {'advice': '测试建议'}
+
+    events = []
+    start = time.perf_counter()
+    recommendation = advisor.get_enhanced_recommendation(
+        'Medium', age=40, balance=20000,
+        progress_callback=lambda progress, message: events.append((progress, message))
+    )
+    elapsed = time.perf_counter() - start
+    print(f"进度事件: {len(events)} 个, 耗时: {elapsed:.3f}s")
+
+    progress = [p for p, _ in events]
+    assert progress == sorted(progress) and progress[-1] == 1.0
+    assert sum('已获取市场数据' in message for _, message in events) == 13
+    assert recommendation['ai_advice'] == '测试建议'
+    assert elapsed < 0.5
+
+
+def test_ai_analysis_gate():
+    """测试门控策略：结果一致且远离分界时跳过，边界、分歧或低置信度时调用大模型"""
+    gate = AIAnalysisGate()
+    agreed = {'rule_based': 'Low', 'decision_tree': 'Low', 'random_forest': 'Low', 'confidence': 0.99}
+    assert gate.reasons({'balance': 20000}, agreed) == []
+    assert not gate.should_call_ai({'balance': 20000}, agreed)
+    assert gate.reasons({'balance': 1050}, agreed) == ["账户余额接近风险等级分界（1000）"]
+    assert gate.should_call_ai({'balance': -30}, dict(agreed, rule_based='High', random_forest='High'))
+    assert gate.reasons({'balance': 5000}, dict(agreed, gradient_boosting='Medium')) == ["各模型的评估结果不一致"]
+    assert gate.reasons({'balance': 5000}, dict(agreed, confidence=0.6)) == ["模型置信度较低（60%）"]
+
+
+def test_enhanced_risk_analysis_skips_llm():
+    """测试增强版风险分析只为边界成员调用大模型，其余成员使用模板解释"""
+    print("\n===== 测试AI分析门控 =====")
+    classifier = EnhancedRiskClassifier(financial_api_key="test", ai_api_key="test")
+    calls = []
+    classifier.ai_assistant.analyze_investment_risk = lambda member: calls.append(member) or {
+        'risk_level': 'Medium', 'analysis': 'AI分析'}
+    members = [
+        {'age': 45, 'balance': 20000, 'loan': False, 'housing': False, 'job': 'management'},
+        {'age': 30, 'balance': 5000, 'loan': True, 'housing': True, 'job': 'technician'},
+        {'age': 52, 'balance': 500, 'loan': False, 'housing': True, 'job': 'retired'},
+        {'age': 38, 'balance': 980, 'loan': False, 'housing': False, 'job': 'admin.'},
+        {'age': 27, 'balance': 20, 'loan': False, 'housing': True, 'job': 'student'}
+    ]
+    before = {source: AI_RISK_ANALYSES.value(source=source) for source in ('ai', 'template')}
+    results = [classifier.enhanced_risk_analysis(member) for member in members]
+
+    assert [r['analysis_source'] for r in results] == ['template', 'template', 'template', 'ai', 'ai']
+    assert len(calls) == 2 and calls[0]['balance'] == 980
+    assert results[1]['ai_analysis'] == 'High' and '高风险' in results[1]['detailed_analysis']
+    assert results[3]['ai_analysis'] == 'Medium' and results[3]['detailed_analysis'] == 'AI分析'
+    assert results[3]['gating_reasons'] == ["账户余额接近风险等级分界（1000）"]
+    assert AI_RISK_ANALYSES.value(source='template') == before['template'] + 3
+    assert AI_RISK_ANALYSES.value(source='ai') == before['ai'] + 2
+
+    forced = classifier.enhanced_risk_analysis(members[0], force_ai=True)
+    assert forced['analysis_source'] == 'ai' and len(calls) == 3
+
+
+def main():
+    """运行所有测试"""
+    tests = [
+        test_market_data_fan_out,
+        test_market_data_deadline_and_cache,
+        test_market_data_concurrent_sessions,
+        test_recommendation_progress,
+        test_ai_analysis_gate,
+        test_enhanced_risk_analysis_skips_llm
+    ]
+
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__} 测试通过")
+        except Exception as e:
+            print(f"❌ {test.__name__} 测试失败: {e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+测试风险评估微批处理队列
+"""
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from inference_batcher import InferenceBatcher
+from risk_classifier import FamilyRiskClassifier
+
+
+class RecordingClassifier:
+    """记录每批大小的模拟分类器"""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.batch_sizes = []
+
+    def classify_risk_levels(self, members):
+        self.batch_sizes.append(len(members))
+        time.sleep(self.delay)
+        if any(m.get('fail') for m in members):
+            raise ValueError("模拟预测失败")
+        return [{'random_forest': 'High' if m['balance'] < 0 else 'Low'} for m in members]
+
+
+def _members(n, seed=0):
+    rng = random.Random(seed)
+    return [
+        {
+            'age': rng.randint(20, 80),
+            'balance': rng.randint(-2000, 20000),
+            'loan': rng.choice(['yes', 'no']),
+            'housing': rng.choice(['yes', 'no']),
+            'job': rng.choice(['admin.', 'technician', 'management']),
+            'marital': rng.choice(['married', 'single']),
+            'education': rng.choice(['secondary', 'tertiary'])
+        }
+        for _ in range(n)
+    ]
+
+
+def test_batches_concurrent_requests():
+    """测试并发请求被合并为批次，结果按顺序返回给各调用方"""
+    classifier = RecordingClassifier(delay=0.01)
+    batcher = InferenceBatcher(classifier, max_batch_size=16, max_wait_ms=5)
+    members = _members(100)
+    try:
+        with ThreadPoolExecutor(max_workers=50) as pool:
+            results = list(pool.map(batcher.classify, members))
+    finally:
+        batcher.close()
+
+    assert [r['random_forest'] for r in results] == ['High' if m['balance'] < 0 else 'Low' for m in members]
+    assert sum(classifier.batch_sizes) == 100
+    assert max(classifier.batch_sizes) <= 16
+    assert len(classifier.batch_sizes) < 100
+
+
+def test_batch_failure_and_wait():
+    """测试预测失败时整批请求收到异常，低负载时单个请求只等待设定的时间"""
+    batcher = InferenceBatcher(RecordingClassifier(), max_batch_size=8, max_wait_ms=20)
+    try:
+        future = batcher.submit({'balance': 1, 'fail': True})
+        try:
+            future.result(timeout=5)
+            assert False, "应当抛出异常"
+        except ValueError:
+            pass
+
+        start = time.perf_counter()
+        assert batcher.classify({'balance': -1}, timeout=5)['random_forest'] == 'High'
+        elapsed = time.perf_counter() - start
+        assert 0.015 < elapsed < 0.5
+    finally:
+        batcher.close()
+
+
+def test_batched_model_predictions():
+    """测试批量预测与逐个预测结果一致，并比较吞吐"""
+    print("\n===== 测试微批处理吞吐 =====")
+    classifier = FamilyRiskClassifier()
+    members = _members(80, seed=3)
+
+    start = time.perf_counter()
+    single = [classifier.classify_risk_level(**m) for m in members]
+    sequential = time.perf_counter() - start
+
+    batcher = InferenceBatcher(classifier, max_batch_size=64, max_wait_ms=2)
+    try:
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=64) as pool:
+            batched = list(pool.map(batcher.classify, members))
+        concurrent = time.perf_counter() - start
+    finally:
+        batcher.close()
+
+    print(f"逐个预测: {sequential:.3f}s, 微批处理: {concurrent:.3f}s, 平均批大小: {batcher.average_batch_size:.1f}")
+    assert batched == single
+    assert batcher.average_batch_size > 1
+
+
+def main():
+    """运行所有测试"""
+    tests = [
+        test_batches_concurrent_requests,
+        test_batch_failure_and_wait,
+        test_batched_model_predictions
+    ]
+
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__} 测试通过")
+        except Exception as e:
+            print(f"❌ {test.__name__} 测试失败: {e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+测试热点路径计时工具
+"""
+import time
+
+import instrumentation
+from instrumentation import Histogram, span, timed, record
+
+
+def _reset(enabled):
+    instrumentation.reset()
+    if enabled:
+        instrumentation.enable()
+    else:
+        instrumentation.disable()
+
+
+def test_disabled_records_nothing():
+    """测试关闭时返回空计时器，不记录任何观测"""
+    _reset(False)
+
+    @timed('test.func')
+    def work():
+        return 42
+
+    with span('test.block') as s:
+        pass
+    assert s is span('test.other')
+    assert work() == 42
+    record('test.value', 10)
+    assert instrumentation.snapshot() == {}
+
+
+def test_spans_and_records():
+    """测试开启后计时区间、装饰器和数值观测都被汇总"""
+    _reset(True)
+    try:
+        @timed('test.func')
+        def work():
+            time.sleep(0.002)
+
+        for _ in range(5):
+            work()
+        with span('test.block'):
+            pass
+        timer = instrumentation.start('test.manual')
+        first = timer.stop()
+        assert timer.stop() == first
+        record('test.prompt_chars', 1200)
+
+        stats = instrumentation.snapshot()
+        assert stats['test.func']['count'] == 5
+        assert stats['test.func']['min'] >= 0.002
+        assert stats['test.block']['count'] == 1
+        assert stats['test.manual']['count'] == 1
+        assert stats['test.prompt_chars']['max'] == 1200
+
+        report = instrumentation.report()
+        assert 'test.func' in report and 'ms' in report
+        prompt_line = next(line for line in report.splitlines() if line.startswith('test.prompt_chars'))
+        assert 'ms' not in prompt_line
+    finally:
+        _reset(False)
+
+
+def test_histogram_quantiles():
+    """测试对数分桶的分位数误差在一个桶宽以内"""
+    histogram = Histogram()
+    values = [i / 1000 for i in range(1, 1001)]
+    for value in values:
+        histogram.observe(value)
+
+    width = 2 ** (1 / instrumentation.BUCKETS_PER_OCTAVE)
+    for q in (0.5, 0.95, 0.99):
+        exact = values[int(q * len(values)) - 1]
+        assert exact <= histogram.quantile(q) <= exact * width
+    assert histogram.quantile(1.0) == max(values)
+    assert len(histogram.buckets) < 50
+
+
+def test_disabled_overhead():
+    """测试关闭时计时区间的开销"""
+    print("\n===== 测试关闭时的开销 =====")
+    _reset(False)
+    n = 100000
+
+    start = time.perf_counter()
+    for _ in range(n):
+        with span('test.noop'):
+            pass
+    per_call = (time.perf_counter() - start) / n
+
+    print(f"每次空计时区间: {per_call * 1e9:.0f}ns")
+    assert per_call < 5e-6
+
+
+def main():
+    """运行所有测试"""
+    tests = [
+        test_disabled_records_nothing,
+        test_spans_and_records,
+        test_histogram_quantiles,
+        test_disabled_overhead
+    ]
+
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__} 测试通过")
+        except Exception as e:
+            print(f"❌ {test.__name__} 测试失败: {e}")
+
+
+if __name__ == "__main__":
+    main()
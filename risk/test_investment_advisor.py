@@ -0,0 +1,136 @@
+"""
+测试投资顾问的财富预测与配置优化功能
+"""
+import time
+
+import numpy as np
+
+from investment_advisor import InvestmentAdvisor
+from wealth_simulator import WealthSimulator, horizon_to_months
+from allocation_optimizer import AllocationOptimizer, project_to_bounds
+
+
+def test_horizon_to_months():
+    """测试投资期限转换"""
+    assert horizon_to_months("短期(1年以内)") == 12
+    assert horizon_to_months("长期(5年以上)") == 120
+    assert horizon_to_months(2.5) == 30
+    assert horizon_to_months(None) == 60
+
+
+def test_project_wealth():
+    """测试三种风险等级组合的财富预测"""
+    print("\n===== 测试财富预测 =====")
+    advisor = InvestmentAdvisor()
+
+    start = time.perf_counter()
+    projection = advisor.project_wealth(1000, "中期(1-5年)", n_paths=100000, seed=7)
+    elapsed = time.perf_counter() - start
+    print(f"100,000条路径 x 3个组合 x 60个月 耗时: {elapsed:.3f}s")
+
+    assert set(projection) == {'High', 'Medium', 'Low'}
+    for level, result in projection.items():
+        bands = result['bands']
+        # 分位数带单调，起点为初始资金
+        assert np.all(bands[5] <= bands[50]) and np.all(bands[50] <= bands[95])
+        assert bands[50][0] == 0
+        assert result['months'][-1] == 60
+        assert result['final']['total_contributed'] == 60000
+        print(f"{level}: 中位数 ¥{result['final']['median']:,.0f}, 亏损概率 {result['final']['probability_of_loss']:.1%}")
+
+    # 高风险组合的结果区间更宽
+    spread = {level: r['bands'][95][-1] - r['bands'][5][-1] for level, r in projection.items()}
+    assert spread['High'] > spread['Medium'] > spread['Low']
+
+    # 相同种子结果可复现
+    again = advisor.project_wealth(1000, "中期(1-5年)", n_paths=100000, seed=7)
+    assert np.array_equal(again['High']['bands'][50], projection['High']['bands'][50])
+
+
+def test_zero_volatility_matches_annuity():
+    """测试零波动时模拟结果等于定投终值公式"""
+    simulator = WealthSimulator(n_paths=1000, seed=1)
+    products = [{'name': '定期存款', 'allocation': 100}]
+    simulator.portfolio_moments = lambda _: {'expected_return': 0.06, 'volatility': 0.0}
+
+    result = simulator.simulate({'Low': products}, monthly_contribution=100, months=24)['Low']
+    rate = 0.06 / 12
+    expected = 100 * ((1 + rate) ** 24 - 1) / rate * (1 + rate)
+    assert np.isclose(result['final']['median'], expected, rtol=1e-4)
+
+
+def test_project_to_bounds():
+    """测试权重投影满足总和与上下限约束"""
+    rng = np.random.default_rng(0)
+    lower = np.full(5, 0.02)
+    upper = np.full(5, 0.6)
+    for _ in range(200):
+        w = project_to_bounds(rng.normal(0, 1, 5), lower, upper)
+        assert np.isclose(w.sum(), 1.0)
+        assert np.all(w >= lower - 1e-12) and np.all(w <= upper + 1e-12)
+
+
+def test_personalized_allocations():
+    """测试个性化建议的配置比例由优化器计算"""
+    print("\n===== 测试个性化配置优化 =====")
+    advisor = InvestmentAdvisor()
+
+    for level in ['High', 'Medium', 'Low']:
+        start = time.perf_counter()
+        rec = advisor.get_personalized_recommendation(level, age=40, balance=20000)
+        elapsed = time.perf_counter() - start
+        allocations = [p['allocation'] for p in rec['products']]
+        print(f"{level}: {allocations} ({elapsed * 1000:.2f}ms)")
+        assert sum(allocations) == 100
+        assert min(allocations) >= 2 and max(allocations) <= 60
+
+    # 老年且有贷款的高风险成员，高波动产品比例受到限制
+    senior = advisor.get_personalized_recommendation('High', age=65, balance=20000, has_loans=True)
+    young = advisor.get_personalized_recommendation('High', age=25, balance=20000)
+    assert senior['optimization']['volatility'] < young['optimization']['volatility']
+    assert all(p['allocation'] <= 15 for p in senior['products'] if p['name'] != '高收益债券')
+
+    # 余额较低时，波动最低的产品至少配置20%
+    low_balance = advisor.get_personalized_recommendation('Medium', age=40, balance=1000)
+    assert next(p for p in low_balance['products'] if p['name'] == '优质公司债')['allocation'] >= 20
+
+    # 基础建议不受影响
+    assert advisor.get_investment_recommendation('High')['products'][0]['allocation'] == 30
+
+
+def test_risk_parity():
+    """测试风险平价配置中各产品的风险贡献接近"""
+    from product_assumptions import product_moments
+
+    advisor = InvestmentAdvisor()
+    products = advisor.get_investment_recommendation('Medium')['products']
+    optimizer = AllocationOptimizer(method='risk_parity', min_weight=0.0, max_weight=1.0)
+    result = optimizer.optimize(products, 'Medium')
+
+    _, cov = product_moments([p['name'] for p in products])
+    w = result['weights']
+    contributions = w * (cov @ w)
+    assert contributions.max() / contributions.min() < 1.01
+
+
+def main():
+    """运行所有测试"""
+    tests = [
+        test_horizon_to_months,
+        test_project_wealth,
+        test_zero_volatility_matches_annuity,
+        test_project_to_bounds,
+        test_personalized_allocations,
+        test_risk_parity
+    ]
+
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__} 测试通过")
+        except Exception as e:
+            print(f"❌ {test.__name__} 测试失败: {e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+测试中文字体查找索引
+"""
+import os
+import shutil
+
+import matplotlib
+import matplotlib.font_manager as fm
+
+import matplotlib_chinese
+from matplotlib_chinese import discover_chinese_fonts
+
+
+def test_font_index(tmp_path, monkeypatch):
+    """测试字体查找结果写入索引，字体目录变化后重新查找"""
+    font_dir = tmp_path / "fonts"
+    (font_dir / "sub").mkdir(parents=True)
+    source = os.path.join(matplotlib.get_data_path(), 'fonts', 'ttf', 'DejaVuSans.ttf')
+    shutil.copy(source, font_dir / "sub" / "DejaVuSans.ttf")
+    index_path = str(tmp_path / "font_index.json")
+
+    parsed = []
+    original = fm.FontProperties
+
+    class CountingFontProperties(original):
+        def __init__(self, *args, **kwargs):
+            if kwargs.get('fname'):
+                parsed.append(kwargs['fname'])
+            super().__init__(*args, **kwargs)
+
+    monkeypatch.setattr(matplotlib_chinese.fm, 'FontProperties', CountingFontProperties)
+
+    fonts = discover_chinese_fonts([str(font_dir)], ['DejaVu Sans'], index_path)
+    assert [name for _, name in fonts] == ['DejaVu Sans']
+    assert len(parsed) == 1
+
+    # 字体目录未变化时直接读取索引
+    assert discover_chinese_fonts([str(font_dir)], ['DejaVu Sans'], index_path) == fonts
+    assert len(parsed) == 1
+
+    # 候选字体变化时重新查找
+    assert discover_chinese_fonts([str(font_dir)], ['Noto Sans CJK SC'], index_path) == []
+    assert len(parsed) == 2
+
+    # 子目录中新增字体文件后重新查找
+    shutil.copy(source, font_dir / "sub" / "DejaVuSans-Copy.ttf")
+    fonts = discover_chinese_fonts([str(font_dir)], ['DejaVu Sans'], index_path)
+    assert len(fonts) == 2
+    assert len(parsed) == 4
+
+
+def main():
+    """运行所有测试"""
+    import pytest
+    pytest.main([__file__, "-q"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+测试家庭成员特征库
+"""
+import os
+import tempfile
+import threading
+from unittest import mock
+
+from risk_classifier import FamilyRiskClassifier
+from member_store import MemberStore, input_hash, normalize_member
+
+MEMBERS = [
+    {'name': '张三', 'age': 25, 'balance': -100, 'loan': True, 'housing': True, 'job': 'student'},
+    {'name': '李四', 'age': 45, 'balance': 500, 'loan': False, 'housing': True, 'job': 'management'},
+    {'name': '王五', 'age': 60, 'balance': 20000, 'loan': 'no', 'housing': 'no', 'job': 'retired'}
+]
+
+
+def test_input_hash():
+    """测试输入摘要只取决于评估字段，贷款字段的布尔值和 'yes'/'no' 等价"""
+    member = dict(MEMBERS[0])
+    assert normalize_member(member)['loan'] == 'yes' and normalize_member(member)['marital'] == 'unknown'
+    assert input_hash(member) == input_hash(dict(member, name='其他', loan='yes', risk_rf='High'))
+    assert input_hash(member) != input_hash(dict(member, balance=-99))
+
+
+def test_score_only_stale_members():
+    """测试只有新成员、输入变化或模型版本变化的成员才重新评估"""
+    print("\n===== 测试成员特征库 =====")
+    classifier = FamilyRiskClassifier()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, 'members.sqlite')
+        store = MemberStore(path)
+        with mock.patch.object(classifier, 'classify_risk_levels', wraps=classifier.classify_risk_levels) as classify:
+            first = store.score(classifier, MEMBERS)
+            assert classify.call_count == 1 and len(classify.call_args[0][0]) == 3
+            assert [r['random_forest'] for r in first] == ['High', 'Medium', 'Low']
+            assert len(store) == 3 and store.misses == 3
+
+            # 输入和模型版本不变时直接读取
+            assert store.score(classifier, MEMBERS) == first
+            assert classify.call_count == 1 and store.hits == 3
+
+            # 其他进程（新实例）读取同一个文件
+            other = MemberStore(path)
+            assert other.score(classifier, MEMBERS) == first and other.hits == 3
+            assert classify.call_count == 1
+
+            # 只有输入变化的成员重新评估
+            changed = [MEMBERS[0], dict(MEMBERS[1], balance=5000), MEMBERS[2]]
+            results = store.score(classifier, changed)
+            assert classify.call_count == 2 and len(classify.call_args[0][0]) == 1
+            assert results[1]['random_forest'] == 'Low' and results[0] == first[0]
+
+            # 模型版本变化后全部重新评估
+            with mock.patch.object(FamilyRiskClassifier, 'model_version', new_callable=mock.PropertyMock,
+                                   return_value='retrained'):
+                store.score(classifier, changed)
+            assert classify.call_count == 3 and len(classify.call_args[0][0]) == 3
+
+        record = store.get('李四')
+        assert record['model_version'] == 'retrained' and record['features']['balance'] == 5000
+        assert set(record['result']) >= {'rule_based', 'decision_tree', 'random_forest', 'confidence', 'probabilities'}
+        store.delete(['李四'])
+        assert store.get('李四') is None and len(store) == 2
+        store.clear()
+        assert len(store) == 0
+
+
+def test_memory_store_threads():
+    """测试内存数据库在多个线程（Streamlit会话）间共享"""
+    classifier = FamilyRiskClassifier(auto_init=False)
+    store = MemberStore(':memory:')
+    errors = []
+
+    def worker(offset):
+        try:
+            members = [dict(MEMBERS[1], name=f"成员{offset}-{i}", balance=offset * 100 + i) for i in range(50)]
+            results = store.score(classifier, members)
+            assert len(results) == 50 and store.score(classifier, members) == results
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not errors and len(store) == 200
+    assert store.get('成员0-5')['result']['rule_based'] == 'Medium'
+
+
+def main():
+    """运行所有测试"""
+    tests = [
+        test_input_hash,
+        test_score_only_stale_members,
+        test_memory_store_threads
+    ]
+
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__} 测试通过")
+        except Exception as e:
+            print(f"❌ {test.__name__} 测试失败: {e}")
+
+
+if __name__ == "__main__":
+    main()
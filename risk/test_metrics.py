@@ -0,0 +1,137 @@
+"""
+测试Prometheus指标注册表和抓取端点
+"""
+import os
+import tempfile
+import urllib.request
+from unittest import mock
+
+import instrumentation
+import metrics
+from metrics import MetricsRegistry
+from risk_classifier import FamilyRiskClassifier
+from financial_data_provider import FinancialDataProvider
+from ai_assistant import AIAssistant
+
+
+class FakeResponse:
+    def __init__(self, status_code, payload=None):
+        self.status_code = status_code
+        self.text = str(payload)
+        self._payload = payload or {}
+
+    def json(self):
+        return self._payload
+
+
+def test_registry_text_format():
+    """测试计数器、仪表值和直方图的文本格式"""
+    registry = MetricsRegistry()
+    requests_total = registry.counter('demo_requests_total', "请求次数", ('endpoint', 'status'))
+    requests_total.inc(endpoint='prices', status=200)
+    requests_total.inc(2, endpoint='prices', status=200)
+    requests_total.inc(endpoint='news', status='error')
+    registry.gauge('demo_version', "版本", ('version',)).set(1, version='a"b')
+
+    assert registry.counter('demo_requests_total', "请求次数", ('endpoint', 'status')) is requests_total
+    try:
+        requests_total.inc(endpoint='prices')
+        assert False, "缺少标签时应当抛出异常"
+    except ValueError:
+        pass
+
+    instrumentation.reset()
+    instrumentation.enable()
+    try:
+        for _ in range(3):
+            with instrumentation.span('demo.block'):
+                pass
+        instrumentation.record('demo.prompt_chars', 500)
+        text = registry.render()
+    finally:
+        instrumentation.disable()
+        instrumentation.reset()
+
+    assert '# TYPE demo_requests_total counter' in text
+    assert 'demo_requests_total{endpoint="prices",status="200"} 3' in text
+    assert 'demo_requests_total{endpoint="news",status="error"} 1' in text
+    assert 'demo_version{version="a\\"b"} 1' in text
+    assert '# TYPE risk_span_duration_seconds histogram' in text
+    assert 'risk_span_duration_seconds_bucket{span="demo.block",le="+Inf"} 3' in text
+    assert 'risk_span_duration_seconds_count{span="demo.block"} 3' in text
+    assert 'risk_observation_sum{name="demo.prompt_chars"} 500' in text
+
+
+def test_components_report_metrics():
+    """测试分类器、金融数据API和AI助手上报指标"""
+    metrics.REGISTRY.clear()
+
+    with tempfile.TemporaryDirectory() as model_path:
+        classifier = FamilyRiskClassifier(auto_init=False)
+        classifier.model_path = model_path
+        classifier._initialize_models()
+        assert classifier.model_version == 'rules'
+        classifier.classify_risk_levels([{'balance': -10}, {'balance': 5000}])
+        assert metrics.CLASSIFIER_MEMBERS.value(model_version='rules', method='rules') == 2
+
+        trained = FamilyRiskClassifier()
+        if trained.dt_model is not None:
+            assert len(trained.model_version) == 12
+            assert trained.model_version == trained.compute_model_version()
+            trained.classify_risk_level(age=40, balance=100, loan='no', housing='yes')
+            assert metrics.CLASSIFIER_CALLS.value(model_version=trained.model_version) == 1
+
+    provider = FinancialDataProvider(api_key='test')
+    with mock.patch('financial_data_provider.requests.request', return_value=FakeResponse(200, {'prices': []})):
+        provider.get_stock_prices('AAPL')
+    with mock.patch('financial_data_provider.requests.request', return_value=FakeResponse(429)):
+        provider.get_news('AAPL')
+    assert metrics.FINANCIAL_API_REQUESTS.value(endpoint='prices', status=200) == 1
+    assert metrics.FINANCIAL_API_REQUESTS.value(endpoint='news', status=429) == 1
+
+    assistant = AIAssistant(api_key='test')
+    usage = {'usage': {'prompt_tokens': 120, 'completion_tokens': 30}}
+    with mock.patch('ai_assistant.requests.post', return_value=FakeResponse(200, usage)):
+        assistant.chat_completion([{'role': 'user', 'content': '你好'}])
+    with mock.patch('ai_assistant.requests.post', side_effect=ConnectionError("断开")):
+        assistant.chat_completion([{'role': 'user', 'content': '你好'}])
+    assert metrics.LLM_TOKENS.value(type='prompt') == 120
+    assert metrics.LLM_TOKENS.value(type='completion') == 30
+    assert metrics.LLM_REQUESTS.value(status=200) == 1
+    assert metrics.LLM_REQUESTS.value(status='error') == 1
+
+
+def test_http_endpoint():
+    """测试独立进程使用的抓取端点"""
+    metrics.REGISTRY.clear()
+    metrics.CACHE_REQUESTS.inc(cache='chart', result='hit')
+    server = metrics.start_http_server(0)
+    try:
+        port = server.server_address[1]
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics", timeout=5) as response:
+            assert response.headers['Content-Type'] == metrics.CONTENT_TYPE
+            body = response.read().decode('utf-8')
+    finally:
+        server.shutdown()
+        server.server_close()
+    assert 'cache_requests_total{cache="chart",result="hit"} 1' in body
+
+
+def main():
+    """运行所有测试"""
+    tests = [
+        test_registry_text_format,
+        test_components_report_metrics,
+        test_http_endpoint
+    ]
+
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__} 测试通过")
+        except Exception as e:
+            print(f"❌ {test.__name__} 测试失败: {e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+测试随机森林的剪枝与量化压缩
+"""
+import os
+import tempfile
+import warnings
+from unittest import mock
+
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+
+from dataset_loader import file_sha256, load_dataset
+from risk_classifier import FamilyRiskClassifier
+from model_compression import (CompactForest, COMPACT_RF_FILE, compress_random_forest,
+                               format_report, load_compact_forest, select_trees, validation_set)
+
+
+def test_compact_forest_matches_sklearn():
+    """测试不剪枝时压缩森林与sklearn的预测一致，并且可以保存和加载"""
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(2000, 6))
+    y = (X[:, 0] + 0.5 * X[:, 1] * X[:, 2] > 0).astype(int) + (X[:, 3] > 1)
+    forest = RandomForestClassifier(n_estimators=20, random_state=0).fit(X[:1500], y[:1500])
+
+    compact = CompactForest.from_forest(forest)
+    assert compact.n_estimators == 20
+    assert compact.leaf_proba.dtype == np.uint8 and compact.threshold.dtype == np.float32
+    assert np.abs(compact.predict_proba(X[1500:]) - forest.predict_proba(X[1500:])).max() < 0.01
+    assert (compact.predict(X[1500:]) == forest.predict(X[1500:])).mean() > 0.99
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, 'forest.npz')
+        compact.metadata['source_sha256'] = 'abc'
+        compact.save(path)
+        loaded = CompactForest.load(path)
+    assert loaded.metadata == {'source_sha256': 'abc'}
+    assert (loaded.predict(X) == compact.predict(X)).all()
+
+    trees = select_trees(forest, X[1500:], y[1500:], tolerance=0.02)
+    assert 1 <= len(trees) <= 20 and len(set(trees)) == len(trees)
+
+
+def test_compress_classifier_models():
+    """测试压缩分类器的随机森林，分类器自动使用压缩模型，重新训练后旧的压缩模型失效"""
+    print("\n===== 测试模型压缩 =====")
+    data = load_dataset()
+    with tempfile.TemporaryDirectory() as model_path:
+        classifier = FamilyRiskClassifier(auto_init=False)
+        classifier.model_path = model_path
+        classifier.train(data, model_types=['dt', 'rf'])
+
+        report = compress_random_forest(classifier, data, tolerance=0.005)
+        print(format_report(report))
+        assert report['path'] == os.path.join(model_path, COMPACT_RF_FILE)
+        assert report['compact']['n_trees'] < report['original']['n_trees']
+        assert report['compact']['size_bytes'] < report['original']['size_bytes']
+        assert report['compact']['accuracy'] >= report['original']['accuracy'] - 0.005
+
+        loaded = FamilyRiskClassifier(auto_init=False)
+        loaded.model_path = model_path
+        assert loaded.load_models()
+        assert isinstance(loaded.rf_model, CompactForest)
+        X_select, y_select, X_eval, y_eval = validation_set(loaded, data)
+        assert (loaded.rf_model.predict(X_eval) == y_eval).mean() == report['compact']['accuracy']
+        # 选择集和评估集互不重叠，评估集只用于报告准确率
+        assert not set(X_select.index) & set(X_eval.index)
+        assert report['selection_rows'] == len(y_select) and report['validation_rows'] == len(y_eval)
+        assert loaded.classify_risk_level(25, -100, 'yes', 'yes')['random_forest'] == 'High'
+
+        # 源模型文件的哈希按修改时间和大小缓存，不会在每次加载时重新计算
+        with mock.patch('model_compression.file_sha256', wraps=file_sha256) as sha256:
+            assert load_compact_forest(model_path) is not None
+            assert load_compact_forest(model_path) is not None
+        assert sha256.call_count == 0
+
+        # 重新训练后压缩模型与随机森林不再对应，改为加载原模型
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            classifier.train(data.sample(frac=0.8, random_state=1), model_types=['dt', 'rf'])
+        reloaded = FamilyRiskClassifier(auto_init=False)
+        reloaded.model_path = model_path
+        assert reloaded.load_models()
+        assert isinstance(reloaded.rf_model, RandomForestClassifier)
+
+
+def main():
+    """运行所有测试"""
+    tests = [
+        test_compact_forest_matches_sklearn,
+        test_compress_classifier_models
+    ]
+
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__} 测试通过")
+        except Exception as e:
+            print(f"❌ {test.__name__} 测试失败: {e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+测试风险分类模型的超参数搜索
+"""
+import os
+import tempfile
+
+import numpy as np
+from sklearn.tree import DecisionTreeClassifier
+
+from dataset_loader import load_dataset
+from risk_classifier import FamilyRiskClassifier
+from model_tuning import format_report, halving_search, tune_models
+
+# 测试用的小搜索空间
+SMALL_GRIDS = {
+    'dt': {'max_depth': [1, 2, 4, 8], 'min_samples_leaf': [1, 20]},
+    'rf': {'n_estimators': [10, 30], 'max_depth': [2, None]}
+}
+
+
+def test_halving_search_prunes_candidates():
+    """测试逐次减半：每轮淘汰部分参数组合，样本量逐轮增加"""
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(3000, 4)).astype(np.float32)
+    y = ((X[:, 0] > 0) ^ (X[:, 1] > 0.5)).astype(int)
+
+    search = halving_search(DecisionTreeClassifier(random_state=0), {'max_depth': [1, 2, 3, 4, 6, 8, 10, 12, 16]},
+                            X, y, cv=3, factor=3, n_jobs=2)
+    assert search.n_candidates_ == [9, 3, 1]
+    assert search.n_resources_[0] < search.n_resources_[-1]
+    assert search.best_params_['max_depth'] >= 2
+    assert not hasattr(search, 'best_estimator_')
+
+
+def test_tune_models_publishes_best_models():
+    """测试搜索后最优模型通过正常的保存流程发布，可以被加载使用"""
+    print("\n===== 测试超参数搜索 =====")
+    data = load_dataset()
+    progress = []
+    with tempfile.TemporaryDirectory() as model_path:
+        classifier = FamilyRiskClassifier(auto_init=False)
+        classifier.model_path = model_path
+        results = tune_models(classifier, data, model_types=['dt', 'rf'], param_grids=SMALL_GRIDS, n_jobs=2,
+                              progress_callback=lambda fraction, message, metrics=None: progress.append(fraction))
+        print(format_report(results))
+
+        assert results['dt_candidates'] == 8 and results['dt_iterations'] >= 2
+        assert results['dt_best_params']['max_depth'] >= 4
+        assert results['dt_accuracy'] > 0.95 and results['rf_accuracy'] > 0.95
+        assert {'dt_report', 'rf_report', 'rf_best_params', 'rf_cv_score'} <= set(results)
+        assert classifier.hgb_model is None
+        assert progress == sorted(progress) and progress[-1] == 1.0
+
+        params = classifier.dt_model.get_params()
+        assert all(params[key] == value for key, value in results['dt_best_params'].items())
+        assert list(classifier.dt_model.feature_names_in_) == classifier.feature_names
+
+        loaded = FamilyRiskClassifier(auto_init=False)
+        loaded.model_path = model_path
+        assert loaded.load_models()
+        assert loaded.model_version == classifier.model_version
+        assert loaded.dt_model.get_params() == params
+        result = loaded.classify_risk_level(25, -100, 'yes', 'yes')
+        assert result['decision_tree'] == 'High' and result['random_forest'] == 'High'
+        assert os.path.exists(os.path.join(model_path, 'dt_model.pkl'))
+
+
+def main():
+    """运行所有测试"""
+    tests = [
+        test_halving_search_prunes_candidates,
+        test_tune_models_publishes_best_models
+    ]
+
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__} 测试通过")
+        except Exception as e:
+            print(f"❌ {test.__name__} 测试失败: {e}")
+
+
+if __name__ == "__main__":
+    main()
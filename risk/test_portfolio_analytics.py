@@ -0,0 +1,228 @@
+"""
+测试投资组合量化分析与历史回测模块
+"""
+import time
+
+import numpy as np
+import pandas as pd
+
+from portfolio_analytics import (
+    build_price_matrix, portfolio_weights, compute_portfolio_metrics,
+    summarize_metrics, max_drawdown, value_at_risk
+)
+from portfolio_backtester import PortfolioBacktester, load_product_prices
+from investment_advisor import InvestmentAdvisor
+
+
+def test_build_price_matrix():
+    """测试不同格式的价格数据对齐为价格矩阵"""
+    print("\n===== 测试价格矩阵对齐 =====")
+    stocks_data = [
+        {'ticker': 'AAPL', 'data': {'prices': [
+            {'time': f'2024-01-0{d}T05:00:00Z', 'close': 100 + d} for d in range(1, 6)
+        ]}},
+        {'ticker': 'MSFT', 'data': {'historical': {'results': [
+            {'date': f'2024-01-0{d}', 'close': 50 - d} for d in range(2, 7)
+        ]}}},
+        {'ticker': 'EMPTY', 'data': {'prices': []}}
+    ]
+
+    dates, tickers, prices = build_price_matrix(stocks_data)
+    print(f"对齐后: {len(dates)} 个交易日, 股票: {tickers}")
+
+    assert tickers == ['AAPL', 'MSFT']
+    assert prices.shape == (5, 2)
+    # AAPL 在最后一天停牌，使用前值填充
+    assert prices[-1, 0] == 105
+
+
+def test_portfolio_weights():
+    """测试持仓权重计算"""
+    tickers = ['AAPL', 'MSFT']
+    weights = portfolio_weights(
+        [{'ticker': 'AAPL', 'shares': 10}, {'ticker': 'MSFT', 'shares': 30}],
+        tickers, last_prices=np.array([300.0, 100.0])
+    )
+    assert np.allclose(weights, [0.5, 0.5])
+    assert np.allclose(portfolio_weights([{'name': '现金'}], tickers), [0.5, 0.5])
+
+
+def test_risk_measures():
+    """测试最大回撤和VaR的计算"""
+    returns = np.array([[0.10], [-0.50], [0.20], [0.0]])
+    assert np.isclose(max_drawdown(returns)[0], -0.5)
+
+    rng = np.random.default_rng(7)
+    normal_returns = rng.normal(0.0, 0.01, size=(200000, 1))
+    var = value_at_risk(normal_returns, confidence=0.95)
+    # 正态分布下历史法与参数法结果应接近
+    assert abs(var['historical_var'][0] - var['parametric_var'][0]) < 5e-4
+    assert abs(var['historical_cvar'][0] - var['parametric_cvar'][0]) < 5e-4
+    assert var['historical_cvar'][0] > var['historical_var'][0]
+
+
+def test_large_portfolio_metrics():
+    """测试数百只持仓的指标计算耗时和摘要大小"""
+    print("\n===== 测试大规模组合指标计算 =====")
+    rng = np.random.default_rng(42)
+    days, assets = 504, 300
+    prices = 100 * np.cumprod(1 + rng.normal(0.0005, 0.02, size=(days, assets)), axis=0)
+    weights = np.full(assets, 1 / assets)
+
+    start = time.perf_counter()
+    metrics = compute_portfolio_metrics(prices, weights)
+    summary = summarize_metrics(metrics)
+    elapsed = time.perf_counter() - start
+    print(f"{assets} 只持仓指标计算耗时: {elapsed * 1000:.1f}ms")
+
+    assert elapsed < 1.0
+    assert metrics['correlation'].shape == (assets, assets)
+    assert np.allclose(np.diag(metrics['correlation']), 1.0)
+    # 以组合自身为基准时，组合beta为1
+    assert np.isclose(metrics['portfolio']['beta'], 1.0)
+    assert summary['holdings_count'] == assets
+    assert len(summary['top_holdings']) == 10
+
+
+def _synthetic_product_prices(product_names, years=12, seed=3):
+    """生成各产品的模拟日价格"""
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range("2012-01-02", periods=252 * years)
+    daily = rng.normal(0.0003, 0.01, size=(len(dates), len(product_names)))
+    return pd.DataFrame(100 * np.cumprod(1 + daily, axis=0), index=dates, columns=product_names)
+
+
+def test_backtest_matches_reference():
+    """测试向量化回测与逐月循环的参考实现一致"""
+    returns = np.random.default_rng(5).normal(0.005, 0.04, size=(60, 3))
+    weights = np.array([[0.6, 0.3, 0.1], [0.2, 0.3, 0.5]])
+    backtester = PortfolioBacktester(rebalance_every=6, monthly_contribution=100, initial_wealth=1000)
+    metrics = backtester.run_returns(returns, weights, np.array([0, 10, 24]), horizon=36)
+
+    for t, w in enumerate(weights):
+        for s, start in enumerate([0, 10, 24]):
+            holdings = 1000 * w
+            for month in range(36):
+                holdings = (holdings + 100 * w) * (1 + returns[start + month])
+                if (month + 1) % 6 == 0:
+                    holdings = holdings.sum() * w
+            assert np.isclose(metrics['final_wealth'][t, s], holdings.sum())
+
+
+def test_backtest_recommendations():
+    """测试三种风险等级组合在多个起始日期上的回测"""
+    print("\n===== 测试投资组合历史回测 =====")
+    advisor = InvestmentAdvisor()
+    names = [p['name'] for rec in advisor.investment_recommendations.values() for p in rec['products']]
+    prices = _synthetic_product_prices(names)
+
+    start = time.perf_counter()
+    result = advisor.backtest_portfolios(prices, horizon_months=36, monthly_contribution=500)
+    elapsed = time.perf_counter() - start
+    print(f"3个组合 x {len(result['start_dates'])}个起始月份 回测耗时: {elapsed * 1000:.1f}ms")
+
+    assert result['levels'] == ['High', 'Medium', 'Low']
+    assert result['metrics']['cagr'].shape == (3, len(result['start_dates']))
+    assert np.all(result['metrics']['max_drawdown'] <= 0)
+    for level, summary in result['summary'].items():
+        assert summary['cagr']['worst'] <= summary['cagr']['median'] <= summary['cagr']['best']
+        assert summary['total_contributed'] == 10000 + 500 * 36
+
+    too_long = advisor.backtest_portfolios(prices, horizon_months=12 * 20)
+    assert 'error' in too_long
+
+
+def test_load_product_prices_cache(tmp_path):
+    """测试代理价格从API获取后写入本地缓存，再次加载时不访问API"""
+    class FakeFinancialData:
+        calls = 0
+
+        def get_stock_prices(self, ticker, **kwargs):
+            FakeFinancialData.calls += 1
+            dates = pd.bdate_range("2024-01-01", periods=30)
+            return {'prices': [{'time': d.isoformat(), 'close': 100 + i} for i, d in enumerate(dates)]}
+
+    fake = FakeFinancialData()
+    prices = load_product_prices(['黄金ETF', '定期存款'], fake, cache_dir=str(tmp_path))
+    assert list(prices.columns) == ['黄金ETF', '定期存款']
+    assert prices['定期存款'].iloc[0] == 1.0 and prices['定期存款'].iloc[-1] > 1.0
+    assert FakeFinancialData.calls == 1
+
+    again = load_product_prices(['黄金ETF'], fake, cache_dir=str(tmp_path))
+    assert FakeFinancialData.calls == 1
+    assert np.allclose(again['黄金ETF'].to_numpy(), prices['黄金ETF'].to_numpy())
+
+
+def test_proxy_price_cache_extends_range(tmp_path):
+    """测试请求超出已缓存的日期范围时重新获取，结果与请求顺序无关"""
+    from portfolio_backtester import load_proxy_prices
+
+    class FakeFinancialData:
+        calls = []
+
+        def get_stock_prices(self, ticker, start_date=None, end_date=None, **kwargs):
+            FakeFinancialData.calls.append((start_date, end_date))
+            dates = pd.bdate_range(start_date or "2020-01-01", end_date)
+            return {'prices': [{'time': d.isoformat(), 'close': float(d.dayofyear)} for d in dates]}
+
+    fake = FakeFinancialData()
+    cache_dir = str(tmp_path)
+    short = load_proxy_prices('GLD', fake, '2024-06-01', '2024-06-30', cache_dir)
+    assert short.index.min() >= pd.Timestamp('2024-06-01') and len(FakeFinancialData.calls) == 1
+
+    # 更长的范围超出缓存，按并集重新获取
+    full = load_proxy_prices('GLD', fake, '2024-01-01', '2024-12-31', cache_dir)
+    assert FakeFinancialData.calls[-1] == ('2024-01-01', '2024-12-31')
+    assert full.index.min() == pd.Timestamp('2024-01-01') and full.index.max() == pd.Timestamp('2024-12-31')
+
+    # 范围内的请求直接读取缓存
+    inner = load_proxy_prices('GLD', fake, '2024-03-01', '2024-09-30', cache_dir)
+    assert len(FakeFinancialData.calls) == 2
+    assert inner.equals(full.loc['2024-03-01':'2024-09-30'])
+    fresh = load_proxy_prices('GLD', fake, '2024-03-01', '2024-09-30', str(tmp_path / "fresh"))
+    assert np.allclose(inner.to_numpy(), fresh.to_numpy())
+
+    # 未指定结束日期时需要今天获取的数据
+    load_proxy_prices('GLD', fake, '2024-01-01', None, cache_dir)
+    assert FakeFinancialData.calls[-1] == ('2024-01-01', pd.Timestamp.today().strftime('%Y-%m-%d'))
+    assert len(FakeFinancialData.calls) == 4
+    load_proxy_prices('GLD', fake, '2024-02-01', None, cache_dir)
+    assert len(FakeFinancialData.calls) == 4
+
+    # 没有数据接口时返回已缓存的部分
+    assert len(load_proxy_prices('GLD', None, '2023-01-01', '2024-01-31', cache_dir)) == 23
+
+
+def test_backtest_without_price_data(tmp_path):
+    """测试没有数据接口也没有缓存时，回测返回历史数据不足而不是抛出异常"""
+    advisor = InvestmentAdvisor()
+    names = [p['name'] for rec in advisor.investment_recommendations.values() for p in rec['products']]
+    prices = load_product_prices(names, None, '2020-01-01', '2024-12-31', cache_dir=str(tmp_path))
+    assert prices.empty and isinstance(prices.index, pd.DatetimeIndex)
+    assert PortfolioBacktester.monthly_returns(prices).empty
+
+    result = advisor.backtest_portfolios(prices)
+    assert '历史数据不足' in result['error']
+
+
+def main():
+    """运行所有测试"""
+    tests = [
+        test_build_price_matrix,
+        test_portfolio_weights,
+        test_risk_measures,
+        test_large_portfolio_metrics,
+        test_backtest_matches_reference,
+        test_backtest_recommendations
+    ]
+
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__} 测试通过")
+        except Exception as e:
+            print(f"❌ {test.__name__} 测试失败: {e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+测试按请求开启的性能剖析
+"""
+import os
+import json
+import time
+import tempfile
+from unittest import mock
+
+import profiling
+
+
+def busy_wait(seconds):
+    """占用CPU一段时间，保证能被采样到"""
+    deadline = time.perf_counter() + seconds
+    total = 0
+    while time.perf_counter() < deadline:
+        total += sum(range(100))
+    return total
+
+
+def test_is_requested():
+    """测试环境变量和查询参数两种开启方式"""
+    with mock.patch.dict(os.environ, {'RISK_PROFILE': ''}):
+        assert not profiling.is_requested()
+        assert not profiling.is_requested({'page': '投资建议'})
+        assert profiling.is_requested({'profile': '1'})
+        assert profiling.is_requested({'profile': ['true']})
+    with mock.patch.dict(os.environ, {'RISK_PROFILE': '1'}):
+        assert profiling.is_requested()
+    assert isinstance(profiling.maybe_profile('off', False), type(profiling.contextlib.nullcontext()))
+
+
+def test_sampler_writes_folded_stacks():
+    """测试内置采样器输出折叠栈"""
+    with tempfile.TemporaryDirectory() as output_dir:
+        with profiling.Profile('page.投资建议', output_dir=output_dir, interval=0.001, backend='sampler') as profile:
+            busy_wait(0.2)
+
+        assert profile.path.endswith('.folded') and os.path.dirname(profile.path) == output_dir
+        with open(profile.path, encoding='utf-8') as f:
+            lines = f.read().splitlines()
+        assert lines
+        for line in lines:
+            stack, count = line.rsplit(' ', 1)
+            assert int(count) > 0
+        busy = sum(int(line.rsplit(' ', 1)[1]) for line in lines if 'busy_wait (test_profiling.py' in line)
+        assert busy >= 0.5 * sum(int(line.rsplit(' ', 1)[1]) for line in lines)
+        assert profile.stop() == profile.path
+
+
+def test_pyinstrument_backend():
+    """测试安装了pyinstrument时输出speedscope文件"""
+    if not profiling.pyinstrument_available():
+        print("未安装pyinstrument，跳过")
+        return
+    with tempfile.TemporaryDirectory() as output_dir:
+        profile = profiling.start('api.recommendations', output_dir=output_dir, interval=0.001)
+        busy_wait(0.1)
+        path = profile.stop()
+        assert path.endswith('.speedscope.json')
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+        assert any(frame['name'] == 'busy_wait' for frame in data['shared']['frames'])
+
+
+def main():
+    """运行所有测试"""
+    tests = [
+        test_is_requested,
+        test_sampler_writes_folded_stacks,
+        test_pyinstrument_backend
+    ]
+
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__} 测试通过")
+        except Exception as e:
+            print(f"❌ {test.__name__} 测试失败: {e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+"""
+测试风险分类器的模型类型（决策树、随机森林、梯度提升）
+"""
+import os
+import shutil
+import tempfile
+import warnings
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+
+from dataset_loader import load_dataset
+from risk_classifier import ConfidenceCalibrator, FamilyRiskClassifier, MODEL_FILE_NAMES
+
+MEMBERS = [
+    {'age': 25, 'balance': -100, 'loan': 'yes', 'housing': 'yes', 'job': 'student', 'marital': 'single', 'education': 'secondary'},
+    {'age': 45, 'balance': 500, 'loan': 'no', 'housing': 'yes', 'job': 'management', 'marital': 'married', 'education': 'tertiary'},
+    {'age': 60, 'balance': 20000, 'loan': 'no', 'housing': 'no', 'job': 'retired', 'marital': 'married', 'education': 'primary'}
+]
+
+
+def _classifier(model_path):
+    classifier = FamilyRiskClassifier(auto_init=False)
+    classifier.model_path = model_path
+    return classifier
+
+
+def test_gradient_boosting_train_save_load():
+    """测试梯度提升模型的训练、报告、保存和加载"""
+    data = load_dataset()
+    with tempfile.TemporaryDirectory() as model_path:
+        classifier = _classifier(model_path)
+        results = classifier.train(data)
+        assert results['hgb_accuracy'] > 0.95
+        assert 'High' in results['hgb_report']
+        assert {'dt_accuracy', 'rf_accuracy', 'dt_report', 'rf_report'} <= set(results)
+        assert os.path.exists(os.path.join(model_path, 'hgb_model.pkl'))
+
+        trained = classifier.classify_risk_levels(MEMBERS)
+        assert [r['gradient_boosting'] for r in trained] == ['High', 'Medium', 'Low']
+
+        loaded = _classifier(model_path)
+        assert loaded.load_models()
+        assert loaded.model_version == classifier.model_version
+        assert loaded.classify_risk_levels(MEMBERS) == trained
+
+        try:
+            loaded.predict(data.head(), 'svm')
+            assert False, "不支持的模型类型应当抛出异常"
+        except ValueError:
+            pass
+
+
+def test_train_selected_model_types():
+    """测试只训练梯度提升模型时，其他模型使用规则型分类"""
+    data = load_dataset()
+    with tempfile.TemporaryDirectory() as model_path:
+        classifier = _classifier(model_path)
+        results = classifier.train(data, model_types=['hgb'])
+        assert set(results) == {'hgb_accuracy', 'hgb_report'}
+        assert classifier.dt_model is None and classifier.rf_model is None
+        # 未训练的模型不保存
+        assert not os.path.exists(os.path.join(model_path, 'dt_model.pkl'))
+        assert not os.path.exists(os.path.join(model_path, 'rf_model.pkl'))
+
+        loaded = _classifier(model_path)
+        assert loaded.load_models()
+        assert loaded.model_version != 'rules'
+        for result in loaded.classify_risk_levels(MEMBERS):
+            assert result['decision_tree'] == result['rule_based']
+            assert result['gradient_boosting'] in ('High', 'Medium', 'Low')
+
+
+def test_models_without_gradient_boosting():
+    """测试旧版本的模型目录（没有梯度提升模型）仍可加载"""
+    source = FamilyRiskClassifier(auto_init=False).model_path
+    if not all(os.path.exists(os.path.join(source, name)) for name in MODEL_FILE_NAMES):
+        return
+    with tempfile.TemporaryDirectory() as model_path:
+        for name in MODEL_FILE_NAMES:
+            shutil.copy(os.path.join(source, name), model_path)
+        classifier = _classifier(model_path)
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            assert classifier.load_models()
+        assert classifier.hgb_model is None
+        result = classifier.classify_risk_level(**MEMBERS[0])
+        assert 'gradient_boosting' not in result and result['random_forest'] == 'High'
+
+
+def test_score_probabilities_and_confidence():
+    """测试一次预处理返回各模型概率和校准置信度，标签与逐个模型预测一致"""
+    data = load_dataset()
+    with tempfile.TemporaryDirectory() as model_path:
+        classifier = _classifier(model_path)
+        classifier.train(data, model_types=['dt', 'rf'])
+        assert classifier.confidence_calibrator is not None
+
+        sample = data[classifier.feature_names].sample(500, random_state=0)
+        sample['loan'] = (sample['loan'] == 'yes').astype(int)
+        sample['housing'] = (sample['housing'] == 'yes').astype(int)
+        with mock.patch.object(classifier, 'preprocess_data', wraps=classifier.preprocess_data) as preprocess:
+            scores = classifier.score(sample)
+        assert preprocess.call_count == 1
+        assert scores['levels'] == list(classifier.risk_encoder.classes_)
+        assert set(scores['probabilities']) == {'dt', 'rf'}
+        for model_type, proba in scores['probabilities'].items():
+            assert proba.shape == (500, 3) and np.allclose(proba.sum(axis=1), 1.0)
+            assert np.allclose(proba, classifier.predict_proba(sample.copy(), model_type))
+            labels = np.asarray(scores['levels'])[proba.argmax(axis=1)]
+            assert (labels == classifier.predict(sample.copy(), model_type)).all()
+        assert ((scores['confidence'] >= 0) & (scores['confidence'] <= 1)).all()
+
+        # 规则型结果的独热概率
+        assert (classifier.predict_proba(sample.copy(), 'hgb').max(axis=1) == 1.0).all()
+
+        results = classifier.classify_risk_levels(MEMBERS)
+        assert [r['random_forest'] for r in results] == ['High', 'Medium', 'Low']
+        assert all(0 <= r['confidence'] <= 1 for r in results)
+
+        loaded = _classifier(model_path)
+        assert loaded.load_models()
+        assert loaded.confidence_calibrator is not None
+        assert loaded.classify_risk_levels(MEMBERS) == results
+
+
+def test_calibration_split_is_separate():
+    """测试置信度校准在校准集上拟合，准确率在不重叠的评估集上报告"""
+    data = load_dataset()
+    with tempfile.TemporaryDirectory() as model_path:
+        classifier = _classifier(model_path)
+        with mock.patch.object(classifier, 'fit_confidence_calibrator',
+                               wraps=classifier.fit_confidence_calibrator) as fit, \
+                mock.patch.object(classifier, 'evaluate', wraps=classifier.evaluate) as evaluate:
+            classifier.train(data, model_types=['dt'])
+        X_calibration = fit.call_args.args[0]
+        X_eval = evaluate.call_args.args[1]
+        assert len(X_calibration) > 0 and len(X_eval) > 0
+        assert not set(X_calibration.index) & set(X_eval.index)
+        assert abs(len(X_calibration) - len(X_eval)) <= 1
+
+
+def test_confidence_calibrator():
+    """测试校准：样本多的分箱接近实际正确率，样本少的分箱接近原始置信度，结果单调"""
+    rng = np.random.default_rng(0)
+    raw = np.concatenate([np.full(5000, 0.95), np.full(3, 0.65), rng.uniform(0.4, 1.0, 500)])
+    correct = np.concatenate([rng.random(5000) < 0.8, [1, 1, 1], rng.random(500) < 0.5])
+    calibrator = ConfidenceCalibrator().fit(raw, correct)
+    assert abs(calibrator.predict([0.95])[0] - 0.8) < 0.02
+    assert 0.5 < calibrator.predict([0.65])[0] < 0.9
+    assert (np.diff(calibrator.predict(np.linspace(0, 1, 101))) >= 0).all()
+
+
+def test_confidence_without_models():
+    """测试没有模型时置信度为1（规则型分类），没有校准器时使用平均概率的最大值"""
+    classifier = FamilyRiskClassifier(auto_init=False)
+    result = classifier.classify_risk_level(**MEMBERS[1])
+    assert result['confidence'] == 1.0 and result['decision_tree'] == result['rule_based'] == 'Medium'
+
+    data = load_dataset()
+    with tempfile.TemporaryDirectory() as model_path:
+        classifier = _classifier(model_path)
+        classifier.train(data, model_types=['rf'])
+        classifier.confidence_calibrator = None
+        members = pd.DataFrame([{'age': 40, 'balance': 999, 'loan': 0, 'housing': 1, 'job': 'admin.',
+                                 'marital': 'married', 'education': 'secondary'}])
+        scores = classifier.score(members)
+        assert scores['confidence'][0] == scores['probabilities']['rf'].max()
+
+
+def main():
+    """运行所有测试"""
+    tests = [
+        test_gradient_boosting_train_save_load,
+        test_train_selected_model_types,
+        test_models_without_gradient_boosting,
+        test_score_probabilities_and_confidence,
+        test_calibration_split_is_separate,
+        test_confidence_calibrator,
+        test_confidence_without_models
+    ]
+
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__} 测试通过")
+        except Exception as e:
+            print(f"❌ {test.__name__} 测试失败: {e}")
+
+
+if __name__ == "__main__":
+    main()
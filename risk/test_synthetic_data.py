@@ -0,0 +1,93 @@
+"""
+测试合成家庭数据生成器
+"""
+import os
+import json
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from dataset_loader import load_dataset
+from synthetic_data import SyntheticHouseholdGenerator
+
+
+def _risk_levels(data):
+    """与 FamilyRiskClassifier.assign_risk_levels 相同的规则"""
+    balance = data['balance']
+    both_loans = (data['housing'].astype(str) == 'yes') & (data['loan'].astype(str) == 'yes')
+    return pd.Series(np.select([(balance < 0) | both_loans, balance < 1000], ['High', 'Medium'], default='Low'))
+
+
+def test_matches_source_distributions():
+    """测试类别频率、贷款组合和风险等级比例与原数据一致"""
+    real = load_dataset()
+    generator = SyntheticHouseholdGenerator.fit(real)
+    synthetic = pd.concat(generator.generate(300_000, chunk_size=100_000, seed=7), ignore_index=True)
+
+    assert len(synthetic) == 300_000
+    assert list(synthetic.columns) == list(real.columns)
+    assert synthetic.dtypes.equals(real.dtypes)
+
+    for col in ['job', 'marital', 'education', 'month']:
+        real_freq = real[col].value_counts(normalize=True)
+        synthetic_freq = synthetic[col].value_counts(normalize=True).reindex(real_freq.index)
+        assert (real_freq - synthetic_freq).abs().max() < 0.01, col
+
+    real_joint = pd.crosstab(real['housing'], real['loan'], normalize=True)
+    synthetic_joint = pd.crosstab(synthetic['housing'], synthetic['loan'], normalize=True)
+    assert (real_joint - synthetic_joint).abs().to_numpy().max() < 0.01
+
+    real_risk = _risk_levels(real).value_counts(normalize=True)
+    synthetic_risk = _risk_levels(synthetic).value_counts(normalize=True)
+    assert (real_risk - synthetic_risk.reindex(real_risk.index)).abs().max() < 0.01
+
+    assert abs(synthetic['balance'].median() - real['balance'].median()) < 0.05 * real['balance'].std()
+    assert synthetic['age'].between(real['age'].min(), real['age'].max()).all()
+
+
+def test_streaming_write_and_reproducibility():
+    """测试分块写出CSV/Parquet，以及相同种子生成相同数据"""
+    generator = SyntheticHouseholdGenerator.from_dataset()
+    restored = SyntheticHouseholdGenerator.from_dict(json.loads(json.dumps(generator.to_dict())))
+
+    first = pd.concat(generator.generate(25_000, chunk_size=10_000, seed=3), ignore_index=True)
+    second = pd.concat(restored.generate(25_000, chunk_size=10_000, seed=3), ignore_index=True)
+    pd.testing.assert_frame_equal(first, second)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        csv_path = os.path.join(tmp_dir, 'households.csv')
+        progress = []
+        assert generator.write(csv_path, 25_000, chunk_size=10_000, seed=3,
+                               progress_callback=lambda p, m: progress.append(p)) == 25_000
+        assert progress == [0.4, 0.8, 1.0]
+        from_csv = pd.read_csv(csv_path)
+        assert len(from_csv) == 25_000
+        assert (from_csv['balance'].to_numpy() == first['balance'].to_numpy()).all()
+
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            return
+        parquet_path = os.path.join(tmp_dir, 'households.parquet')
+        generator.write(parquet_path, 25_000, chunk_size=10_000, seed=3)
+        pd.testing.assert_frame_equal(pd.read_parquet(parquet_path), first)
+
+
+def main():
+    """运行所有测试"""
+    tests = [
+        test_matches_source_distributions,
+        test_streaming_write_and_reproducibility
+    ]
+
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__} 测试通过")
+        except Exception as e:
+            print(f"❌ {test.__name__} 测试失败: {e}")
+
+
+if __name__ == "__main__":
+    main()
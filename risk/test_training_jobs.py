@@ -0,0 +1,87 @@
+"""
+测试后台模型训练任务
+"""
+import os
+import time
+
+import pandas as pd
+
+from dataset_loader import DATASET_PATH
+from risk_classifier import FamilyRiskClassifier
+from training_jobs import TrainingJobManager, MODEL_FILES
+
+
+def test_training_job(tmp_path):
+    """测试训练任务去重、进度回传和模型发布"""
+    print("\n===== 测试后台训练任务 =====")
+    model_path = str(tmp_path / "models")
+    manager = TrainingJobManager(model_path=model_path)
+    published = []
+    manager.add_publish_listener(published.append)
+
+    start = time.perf_counter()
+    job_id = manager.submit(DATASET_PATH)
+    submit_time = time.perf_counter() - start
+    print(f"提交任务耗时: {submit_time * 1000:.1f}ms")
+
+    # 提交立即返回，重复提交合并为同一个任务
+    assert submit_time < 0.5
+    assert manager.submit(DATASET_PATH) == job_id
+
+    job = manager.wait(job_id, timeout=300)
+    print(f"任务状态: {job['status']}, 总耗时: {time.perf_counter() - start:.1f}s")
+
+    assert job['status'] == 'completed', job['error']
+    assert job['progress'] == 1.0 and job['version'] == 1
+    assert job['metrics']['dt_accuracy'] == job['results']['dt_accuracy']
+    assert [p['id'] for p in published] == [job_id]
+    assert sorted(os.listdir(model_path)) == sorted(MODEL_FILES)
+
+    # 发布的模型可以被分类器加载
+    classifier = FamilyRiskClassifier(auto_init=False)
+    classifier.model_path = model_path
+    assert classifier.load_models()
+
+    # 任务结束后再次提交会创建新任务
+    second_id = manager.submit(DATASET_PATH)
+    assert second_id != job_id
+    assert manager.wait(second_id, timeout=300)['version'] == 2
+
+
+def test_tuning_job_uses_parallel_workers(tmp_path):
+    """测试训练子进程中的超参数搜索能使用多个工作进程（守护进程中 joblib 会退化为单进程）"""
+    dataset_path = str(tmp_path / "bank_sample.csv")
+    pd.read_csv(DATASET_PATH).sample(1500, random_state=0).to_csv(dataset_path, index=False)
+
+    grids = {'dt': {'max_depth': [2, 4, 8]}, 'rf': {'n_estimators': [10, 20]}, 'hgb': {'max_leaf_nodes': [7, 15]}}
+    manager = TrainingJobManager(model_path=str(tmp_path / "models"), n_jobs=2, param_grids=grids)
+    job = manager.wait(manager.submit(dataset_path, tune=True), timeout=600)
+    assert job['status'] == 'completed', job['error']
+    assert job['results']['search_workers'] == 2
+    assert 'rf_best_params' in job['results']
+
+    # 关闭后不再接受新任务
+    manager.shutdown()
+    try:
+        manager.submit(dataset_path)
+        assert False, "关闭后提交任务应当抛出异常"
+    except RuntimeError:
+        pass
+
+
+def main():
+    """运行所有测试"""
+    import tempfile
+    from pathlib import Path
+
+    for test in [test_training_job, test_tuning_job_uses_parallel_workers]:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            try:
+                test(Path(tmp_dir))
+                print(f"✅ {test.__name__} 测试通过")
+            except Exception as e:
+                print(f"❌ {test.__name__} 测试失败: {e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,309 @@
+import os
+import time
+import uuid
+import queue
+import atexit
+import shutil
+import threading
+import traceback
+import multiprocessing
+from typing import Dict, List, Any, Optional, Callable
+
+# 默认训练特征
+DEFAULT_FEATURES = ['age', 'job', 'marital', 'education', 'balance', 'housing', 'loan']
+
+# 训练产出的模型文件，与 FamilyRiskClassifier.save_models 保持一致
+MODEL_FILES = ['dt_model.pkl', 'rf_model.pkl', 'hgb_model.pkl', 'confidence_calibrator.pkl',
+               'label_encoders.pkl', 'risk_encoder.pkl', 'feature_names.pkl']
+
+# 任务状态
+PENDING = 'pending'
+RUNNING = 'running'
+COMPLETED = 'completed'
+FAILED = 'failed'
+ACTIVE_STATUSES = (PENDING, RUNNING)
+
+
+def _train_worker(job_id: str, dataset_path: str, features: List[str], staging_dir: str, events,
+                  tune: bool = False, n_jobs: Optional[int] = -1,
+                  param_grids: Optional[Dict[str, Dict[str, List[Any]]]] = None) -> None:
+    """
+    训练子进程入口：加载数据集并把模型训练到暂存目录，进度和结果通过队列回传
+
+    tune 为真时先做超参数搜索（见 model_tuning，n_jobs 个进程并行），再用最优参数训练
+    """
+    try:
+        from dataset_loader import load_dataset
+        from risk_classifier import FamilyRiskClassifier
+
+        def progress(fraction, message, metrics=None):
+            events.put(('progress', job_id, fraction, message, metrics))
+
+        progress(0.0, "正在加载数据集...")
+        data = load_dataset(dataset_path)[features]
+
+        classifier = FamilyRiskClassifier(auto_init=False)
+        classifier.model_path = staging_dir
+        if tune:
+            from joblib.externals.loky import get_reusable_executor
+            from model_tuning import tune_models
+            try:
+                results = tune_models(classifier, data, features=features, param_grids=param_grids, n_jobs=n_jobs,
+                                      progress_callback=progress)
+            finally:
+                # 关闭 joblib 的工作进程池，否则子进程退出时要等待空闲的工作进程超时（300秒）
+                get_reusable_executor().shutdown(wait=True)
+        else:
+            results = classifier.train(data, progress_callback=progress)
+        events.put(('completed', job_id, results))
+    except Exception:
+        events.put(('failed', job_id, traceback.format_exc()))
+
+
+class TrainingJobManager:
+    """
+    模型训练任务管理器
+
+    训练在独立的子进程中执行，Streamlit会话只提交任务和读取任务表，不会被训练阻塞。
+    参数相同且尚未结束的任务会合并为同一个任务；同一时间只运行一个训练，其余任务排队。
+    模型先训练到暂存目录，成功后再替换到模型目录并通知发布监听器重新加载。
+
+    训练子进程不是守护进程：joblib 在守护进程中无法创建工作进程，会把超参数搜索退化为单核。
+    为了不让未结束的训练阻塞解释器退出，管理器在退出时（或调用 shutdown）终止正在运行的子进程。
+    """
+
+    def __init__(self, model_path: Optional[str] = None, poll_interval: float = 0.2,
+                 n_jobs: Optional[int] = -1, param_grids: Optional[Dict[str, Dict[str, List[Any]]]] = None):
+        """
+        参数:
+        - model_path: 模型发布目录，默认为 risk/models
+        - poll_interval: 读取子进程事件的间隔（秒）
+        - n_jobs: 超参数搜索的并行进程数，-1 表示使用全部CPU核
+        - param_grids: 超参数搜索空间，默认为 model_tuning.PARAM_GRIDS
+        """
+        self.model_path = model_path or os.path.join(os.path.dirname(__file__), 'models')
+        self.poll_interval = poll_interval
+        self.n_jobs = n_jobs
+        self.param_grids = param_grids
+        self.published_version = 0
+
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._order: List[str] = []
+        self._lock = threading.Lock()
+        self._runner: Optional[threading.Thread] = None
+        self._publish_listeners: List[Callable[[Dict[str, Any]], None]] = []
+        self._context = multiprocessing.get_context('spawn')
+        self._process = None
+        self._closed = False
+        atexit.register(self.shutdown)
+
+    @staticmethod
+    def job_key(dataset_path: str, features: List[str], tune: bool = False) -> tuple:
+        """任务去重键：数据集文件（路径、修改时间、大小）、训练特征和是否搜索超参数"""
+        stat = os.stat(dataset_path)
+        return (os.path.abspath(dataset_path), stat.st_mtime_ns, stat.st_size, tuple(features), tune)
+
+    def add_publish_listener(self, listener: Callable[[Dict[str, Any]], None]) -> None:
+        """注册模型发布后的回调，参数为完成的任务"""
+        self._publish_listeners.append(listener)
+
+    def submit(self, dataset_path: str, features: Optional[List[str]] = None, tune: bool = False) -> str:
+        """
+        提交训练任务
+
+        参数:
+        - dataset_path: 数据集CSV路径
+        - features: 训练特征，默认使用 DEFAULT_FEATURES
+        - tune: 是否先做超参数搜索（耗时更长），最优模型同样经暂存目录发布
+
+        返回:
+        - 任务ID；已有相同参数的任务在排队或运行时返回该任务的ID
+        """
+        features = list(features or DEFAULT_FEATURES)
+        key = self.job_key(dataset_path, features, tune)
+
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("训练任务管理器已关闭")
+            for job in self._jobs.values():
+                if job['key'] == key and job['status'] in ACTIVE_STATUSES:
+                    return job['id']
+
+            job_id = uuid.uuid4().hex[:12]
+            self._jobs[job_id] = {
+                'id': job_id,
+                'key': key,
+                'dataset_path': os.path.abspath(dataset_path),
+                'features': features,
+                'tune': tune,
+                'status': PENDING,
+                'progress': 0.0,
+                'message': "等待训练...",
+                'metrics': {},
+                'results': None,
+                'error': None,
+                'version': None,
+                'submitted_at': time.time(),
+                'started_at': None,
+                'finished_at': None
+            }
+            self._order.append(job_id)
+
+            if self._runner is None or not self._runner.is_alive():
+                self._runner = threading.Thread(target=self._run_pending, name="training-jobs", daemon=True)
+                self._runner.start()
+        return job_id
+
+    def get(self, job_id: Optional[str]) -> Optional[Dict[str, Any]]:
+        """获取任务状态的快照"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return self._snapshot(job) if job else None
+
+    def jobs(self) -> List[Dict[str, Any]]:
+        """按提交顺序返回所有任务的快照"""
+        with self._lock:
+            return [self._snapshot(self._jobs[job_id]) for job_id in self._order]
+
+    def latest(self) -> Optional[Dict[str, Any]]:
+        """返回最近提交的任务"""
+        with self._lock:
+            return self._snapshot(self._jobs[self._order[-1]]) if self._order else None
+
+    def shutdown(self, timeout: float = 5.0) -> None:
+        """终止正在运行的训练子进程，之后不再接受新任务"""
+        with self._lock:
+            self._closed = True
+            process = self._process
+        if process is not None and process.is_alive():
+            process.terminate()
+            process.join(timeout)
+            if process.is_alive():
+                process.kill()
+                process.join()
+
+    def wait(self, job_id: str, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """等待任务结束，返回任务快照；超时时返回当前状态"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            job = self.get(job_id)
+            if job is None or job['status'] not in ACTIVE_STATUSES:
+                return job
+            if deadline is not None and time.monotonic() >= deadline:
+                return job
+            time.sleep(self.poll_interval)
+
+    @staticmethod
+    def _snapshot(job: Dict[str, Any]) -> Dict[str, Any]:
+        snapshot = dict(job)
+        snapshot['metrics'] = dict(job['metrics'])
+        return snapshot
+
+    def _update(self, job_id: str, **fields) -> None:
+        with self._lock:
+            self._jobs[job_id].update(fields)
+
+    def _next_pending(self) -> Optional[str]:
+        with self._lock:
+            for job_id in self._order:
+                job = self._jobs[job_id]
+                if job['status'] != PENDING:
+                    continue
+                if self._closed:
+                    # 关闭后排队中的任务不再启动
+                    job.update({'status': FAILED, 'error': "训练任务管理器已关闭", 'message': "训练失败",
+                                'finished_at': time.time()})
+                    continue
+                job.update({'status': RUNNING, 'started_at': time.time(), 'message': "正在启动训练进程..."})
+                return job_id
+            # 没有待处理任务时退出，下次提交重新启动
+            self._runner = None
+            return None
+
+    def _run_pending(self) -> None:
+        """依次执行排队中的任务"""
+        while True:
+            job_id = self._next_pending()
+            if job_id is None:
+                return
+            try:
+                self._run_job(job_id)
+            except Exception as e:
+                self._update(job_id, status=FAILED, error=str(e), message="训练失败", finished_at=time.time())
+
+    def _run_job(self, job_id: str) -> None:
+        job = self.get(job_id)
+        os.makedirs(self.model_path, exist_ok=True)
+        staging_dir = os.path.join(self.model_path, f".staging-{job_id}")
+        os.makedirs(staging_dir, exist_ok=True)
+
+        events = self._context.Queue()
+        process = self._context.Process(
+            target=_train_worker,
+            args=(job_id, job['dataset_path'], job['features'], staging_dir, events, job['tune'], self.n_jobs,
+                  self.param_grids),
+            daemon=False
+        )
+        try:
+            with self._lock:
+                if self._closed:
+                    raise RuntimeError("训练任务管理器已关闭")
+                process.start()
+                self._process = process
+
+            outcome = None
+            while outcome is None:
+                try:
+                    event = events.get(timeout=self.poll_interval)
+                except queue.Empty:
+                    if not process.is_alive():
+                        outcome = ('failed', job_id, f"训练进程异常退出 (exit code {process.exitcode})")
+                    continue
+
+                if event[0] == 'progress':
+                    _, _, fraction, message, metrics = event
+                    with self._lock:
+                        self._jobs[job_id].update({'progress': fraction, 'message': message})
+                        if metrics:
+                            self._jobs[job_id]['metrics'].update(metrics)
+                else:
+                    outcome = event
+
+            process.join()
+            if outcome[0] == 'completed':
+                self._publish(job_id, staging_dir, outcome[2])
+            else:
+                self._update(job_id, status=FAILED, error=outcome[2], message="训练失败", finished_at=time.time())
+        finally:
+            with self._lock:
+                self._process = None
+            events.close()
+            shutil.rmtree(staging_dir, ignore_errors=True)
+
+    def _publish(self, job_id: str, staging_dir: str, results: Dict[str, Any]) -> None:
+        """把暂存目录中的模型替换到发布目录，并通知监听器（本次未训练的模型从发布目录中删除）"""
+        for name in MODEL_FILES:
+            staged = os.path.join(staging_dir, name)
+            published = os.path.join(self.model_path, name)
+            if os.path.exists(staged):
+                os.replace(staged, published)
+            elif os.path.exists(published):
+                os.remove(published)
+
+        with self._lock:
+            self.published_version += 1
+            self._jobs[job_id].update({
+                'status': COMPLETED,
+                'progress': 1.0,
+                'message': "模型训练完成",
+                'results': results,
+                'version': self.published_version,
+                'finished_at': time.time()
+            })
+            job = self._snapshot(self._jobs[job_id])
+
+        for listener in self._publish_listeners:
+            try:
+                listener(job)
+            except Exception as e:
+                print(f"模型发布回调失败: {e}")